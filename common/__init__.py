@@ -0,0 +1,3 @@
+# common/__init__.py
+# Modul bersama yang dipakai oleh semua service dan API Gateway.
+# Setiap service menambahkan root repo ke sys.path sebelum mengimpor modul ini.
@@ -0,0 +1,245 @@
+# common/events.py
+"""
+Event bus lokal (pengganti sementara message broker) berbasis SQLite.
+
+Service mem-publish event (cth: user.registered) ke satu file SQLite bersama
+(EVENT_BUS_PATH) lalu langsung menjawab request; consumer di service lain
+membaca event per batch di thread latar dan menyimpan offset masing-masing.
+
+Pengiriman bersifat at-least-once: jika handler gagal, batch yang sama
+dicoba lagi. Handler harus idempoten.
+
+Consumer bernama sama di beberapa proses (worker gunicorn) berbagi satu offset.
+Supaya batch yang sama tidak diproses oleh setiap worker, hanya pemegang lease
+consumer tersebut (tabel consumer_leases, EVENT_LEASE_TTL detik, diperpanjang
+selama pemegangnya hidup) yang membaca & meng-ack; worker lain menunggu dan
+mengambil alih lease jika pemegangnya mati. Duplikat masih mungkin saat lease
+berpindah di tengah batch.
+
+Untuk invalidasi cache in-memory setiap proses harus melihat semua event:
+subscribe(..., per_process=True) menyimpan offset di memori proses (tanpa lease)
+dan mulai dari event terbaru saat start().
+
+Semua service harus berjalan di host yang sama (berbagi file SQLite).
+Set EVENT_BUS_ENABLED=0 untuk kembali ke panggilan HTTP langsung.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+
+# =============================
+# KONFIGURASI (via .env)
+# =============================
+EVENT_BUS_ENABLED = os.getenv("EVENT_BUS_ENABLED", "1") not in ("0", "false", "False")
+EVENT_BUS_PATH = os.getenv(
+    "EVENT_BUS_PATH",
+    os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "events.sqlite3")),
+)
+# Event maksimum per panggilan handler
+EVENT_BATCH_SIZE = int(os.getenv("EVENT_BATCH_SIZE", 100))
+# Jeda polling consumer saat tidak ada event baru (detik)
+EVENT_POLL_INTERVAL = float(os.getenv("EVENT_POLL_INTERVAL", 0.5))
+# Event lebih tua dari ini (detik) dihapus; consumer yang tertinggal lebih lama akan kehilangan event
+EVENT_RETENTION = float(os.getenv("EVENT_RETENTION", 7 * 24 * 3600))
+# Lama lease consumer (detik): batas waktu worker lain mengambil alih jika pemegangnya mati
+EVENT_LEASE_TTL = float(os.getenv("EVENT_LEASE_TTL", 30))
+# Lama menunggu file SQLite yang sedang dikunci penulis lain sebelum "database is locked" (detik)
+EVENT_BUSY_TIMEOUT = float(os.getenv("EVENT_BUSY_TIMEOUT", 10))
+
+Event = namedtuple("Event", ["id", "topic", "payload", "created_at"])
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    topic TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_events_topic_id ON events (topic, id);
+CREATE TABLE IF NOT EXISTS consumer_offsets (
+    consumer TEXT PRIMARY KEY,
+    last_id INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS consumer_leases (
+    consumer TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+"""
+
+
+class EventBus:
+    def __init__(self, path=EVENT_BUS_PATH, batch_size=EVENT_BATCH_SIZE,
+                 poll_interval=EVENT_POLL_INTERVAL, retention=EVENT_RETENTION, lease_ttl=EVENT_LEASE_TTL,
+                 busy_timeout=EVENT_BUSY_TIMEOUT):
+        self.path = path
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.retention = retention
+        self.lease_ttl = lease_ttl
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+        self._subscriptions = []
+        self._threads = []
+        self._process_offsets = {}  # consumer per_process -> offset di memori
+        # Consumer di proses yang sama dibangunkan saat ada publish (tanpa menunggu poll)
+        self._wake = threading.Event()
+
+    def _conn(self):
+        # Koneksi SQLite tidak boleh dipakai lintas thread: satu koneksi per thread
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")  # pembaca tidak memblokir penulis
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    # =============================
+    # PRODUCER
+    # =============================
+    def publish(self, topic, payload):
+        self.publish_many([(topic, payload)])
+
+    def publish_many(self, events):
+        """Tulis banyak event (list of (topic, payload)) dalam satu transaksi SQLite."""
+        if not events:
+            return
+        now = time.time()
+        rows = [(topic, json.dumps(payload, default=str), now) for topic, payload in events]
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany("INSERT INTO events (topic, payload, created_at) VALUES (?, ?, ?)", rows)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        self._wake.set()
+
+    # =============================
+    # CONSUMER
+    # =============================
+    def fetch(self, consumer, topics, limit=None, after=None):
+        """Event untuk `consumer` setelah offset tersimpannya (atau setelah id `after`)."""
+        conn = self._conn()
+        if after is None:
+            row = conn.execute("SELECT last_id FROM consumer_offsets WHERE consumer = ?", (consumer,)).fetchone()
+            last_id = row[0] if row else 0
+        else:
+            last_id = after
+        placeholders = ",".join("?" * len(topics))
+        rows = conn.execute(
+            f"SELECT id, topic, payload, created_at FROM events "
+            f"WHERE id > ? AND topic IN ({placeholders}) ORDER BY id LIMIT ?",
+            (last_id, *topics, limit or self.batch_size),
+        ).fetchall()
+        return [Event(id_, topic, json.loads(payload), created_at) for id_, topic, payload, created_at in rows]
+
+    def ack(self, consumer, last_id):
+        self._conn().execute(
+            "INSERT INTO consumer_offsets (consumer, last_id) VALUES (?, ?) "
+            "ON CONFLICT(consumer) DO UPDATE SET last_id = MAX(last_id, excluded.last_id)",
+            (consumer, last_id),
+        )
+
+    def acquire_lease(self, consumer, owner):
+        """
+        Ambil / perpanjang lease `consumer` untuk `owner`. True jika `owner` pemegangnya
+        (lease kosong, kedaluwarsa, atau memang miliknya).
+        """
+        now = time.time()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT owner, expires_at FROM consumer_leases WHERE consumer = ?",
+                               (consumer,)).fetchone()
+            held = row is None or row[0] == owner or row[1] < now
+            if held:
+                conn.execute(
+                    "INSERT INTO consumer_leases (consumer, owner, expires_at) VALUES (?, ?, ?) "
+                    "ON CONFLICT(consumer) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at",
+                    (consumer, owner, now + self.lease_ttl),
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return held
+
+    def subscribe(self, consumer, topics, handler, per_process=False):
+        """
+        Daftarkan handler(list_of_events) untuk consumer `consumer`.
+        Thread-nya baru berjalan setelah start().
+        per_process=True: offset tidak disimpan di SQLite; setiap proses menerima
+        semua event sejak start() (untuk cache in-memory per proses).
+        """
+        self._subscriptions.append((consumer, tuple(topics), handler, per_process))
+
+    def start(self):
+        for consumer, topics, handler, per_process in self._subscriptions:
+            if per_process:
+                # Cache proses baru masih kosong: event lama tidak perlu diputar ulang
+                self._process_offsets[consumer] = self.last_event_id()
+            thread = threading.Thread(target=self._run, args=(consumer, topics, handler, per_process),
+                                      name=f"events-{consumer}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _run(self, consumer, topics, handler, per_process=False):
+        last_prune = 0.0
+        # Identitas pemegang lease: unik per proses & thread (dibuat setelah fork)
+        owner = f"{os.getpid()}-{threading.get_ident()}"
+        while True:
+            try:
+                # Di dalam try: "database is locked" saat mengambil lease tidak boleh mematikan thread
+                if not per_process and not self.acquire_lease(consumer, owner):
+                    # Worker lain memegang consumer ini; coba lagi mendekati habisnya lease
+                    time.sleep(self.lease_ttl / 2)
+                    continue
+                events = self.fetch(consumer, topics,
+                                    after=self._process_offsets[consumer] if per_process else None)
+                if events:
+                    handler(events)
+                    if per_process:
+                        self._process_offsets[consumer] = events[-1].id
+                    else:
+                        self.ack(consumer, events[-1].id)
+                if time.monotonic() - last_prune > 3600:
+                    self.prune()
+                    last_prune = time.monotonic()
+            except Exception as e:
+                # Batch yang sama dicoba lagi pada putaran berikutnya
+                print(f"[events] Consumer '{consumer}' gagal: {e}")
+                events = None
+            if not events or len(events) < self.batch_size:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+
+    # =============================
+    # PERAWATAN & STATISTIK
+    # =============================
+    def prune(self):
+        self._conn().execute("DELETE FROM events WHERE created_at < ?", (time.time() - self.retention,))
+
+    def last_event_id(self):
+        return self._conn().execute("SELECT COALESCE(MAX(id), 0) FROM events").fetchone()[0]
+
+    def stats(self):
+        conn = self._conn()
+        last_event = self.last_event_id()
+        consumers = {
+            consumer: {"offset": last_id, "behind": last_event - last_id}
+            for consumer, last_id in conn.execute("SELECT consumer, last_id FROM consumer_offsets")
+        }
+        for consumer, owner, expires_at in conn.execute("SELECT consumer, owner, expires_at FROM consumer_leases"):
+            if consumer in consumers:
+                consumers[consumer]["lease"] = {"owner": owner, "expires_in": round(expires_at - time.time(), 1)}
+        # Consumer per_process: offset milik proses yang menjawab request ini saja
+        for consumer, last_id in self._process_offsets.items():
+            consumers[f"{consumer}@{os.getpid()}"] = {"offset": last_id, "behind": last_event - last_id}
+        return {"path": self.path, "last_event_id": last_event, "consumers": consumers}
@@ -0,0 +1,202 @@
+# common/http_client.py
+"""
+Klien HTTP antar-service dengan connection pool keep-alive per upstream.
+
+Setiap upstream (user, wallet, transaction, payee) punya satu requests.Session
+sendiri, sehingga koneksi TCP dipakai ulang antar request dan tidak dibuka-tutup
+setiap kali sebuah service memanggil service lain.
+"""
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from common.internal_auth import internal_headers
+from common.metrics import observe_upstream
+from common import tracing
+
+# =============================
+# KONFIGURASI (via .env)
+# =============================
+# Jumlah koneksi maksimum yang disimpan per upstream
+POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", 20))
+# Jika True, request menunggu koneksi bebas saat pool penuh (bukan membuka koneksi baru)
+POOL_BLOCK = os.getenv("HTTP_POOL_BLOCK", "0") in ("1", "true", "True")
+# Timeout dipisah: connect (buka koneksi) dan read (menunggu respon)
+CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", 2))
+READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", 10))
+# HTTP_KEEPALIVE=0 mematikan keep-alive (kirim 'Connection: close')
+KEEPALIVE = os.getenv("HTTP_KEEPALIVE", "1") not in ("0", "false", "False")
+
+
+class ServiceClient:
+    """Klien untuk satu upstream, lengkap dengan pool koneksi dan metrik."""
+
+    def __init__(self, name, base_url, pool_size=None, connect_timeout=None,
+                 read_timeout=None, keepalive=None, guard=None):
+        self.name = name
+        self.base_url = base_url.rstrip("/")
+        self.pool_size = pool_size or POOL_SIZE
+        self.connect_timeout = connect_timeout or CONNECT_TIMEOUT
+        self.read_timeout = read_timeout or READ_TIMEOUT
+        self.keepalive = KEEPALIVE if keepalive is None else keepalive
+        # Opsional: common.resilience.UpstreamGuard (breaker, retry, batas konkurensi)
+        self.guard = guard
+
+        self._lock = threading.Lock()
+        self._counters = {"requests": 0, "errors": 0, "timeouts": 0, "total_ms": 0.0}
+        self.session = self._new_session()
+
+    def _new_session(self):
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size,
+                              pool_block=POOL_BLOCK, max_retries=0)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        if not self.keepalive:
+            session.headers["Connection"] = "close"
+        return session
+
+    def url(self, path):
+        return f"{self.base_url}/{path.lstrip('/')}"
+
+    def _timeout(self, timeout):
+        # Angka tunggal dianggap read timeout; connect timeout tetap dari konfigurasi
+        if timeout is None:
+            return (self.connect_timeout, self.read_timeout)
+        if isinstance(timeout, (int, float)):
+            return (min(self.connect_timeout, timeout), timeout)
+        return timeout
+
+    def request(self, method, path, timeout=None, hold=False, **kwargs):
+        """hold=True: slot bulkhead dipegang sampai release_hold() (lihat UpstreamGuard.execute)."""
+        if self.guard is not None:
+            return self.guard.execute(method, lambda: self._send(method, path, timeout, **kwargs), hold=hold)
+        return self._send(method, path, timeout, **kwargs)
+
+    def release_hold(self):
+        if self.guard is not None:
+            self.guard.exit()
+
+    def _send(self, method, path, timeout=None, headers=None, **kwargs):
+        # Span CLIENT per percobaan; traceparent-nya diteruskan ke service tujuan
+        span = tracing.begin_span(f"{method} {self.name}", tracing.CLIENT, {
+            "peer.service": self.name, "http.method": method, "http.url": self.url(path)})
+        headers = tracing.inject(dict(headers or {}))
+        start = time.perf_counter()
+        status = "error"
+        try:
+            response = self.session.request(method, self.url(path), timeout=self._timeout(timeout),
+                                            headers=headers, **kwargs)
+            status = response.status_code
+            return response
+        except requests.exceptions.Timeout:
+            self._count(errors=1, timeouts=1)
+            status = "timeout"
+            raise
+        except requests.exceptions.RequestException:
+            self._count(errors=1)
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            self._count(requests=1, total_ms=elapsed * 1000)
+            observe_upstream(self.name, method, status, elapsed)
+            span.set_attribute("http.status_code", status)
+            tracing.end_span(span, error=not isinstance(status, int) or status >= 500)
+
+    def get(self, path, **kwargs):
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path, **kwargs):
+        return self.request("POST", path, **kwargs)
+
+    def put(self, path, **kwargs):
+        return self.request("PUT", path, **kwargs)
+
+    def delete(self, path, **kwargs):
+        return self.request("DELETE", path, **kwargs)
+
+    def _count(self, **deltas):
+        with self._lock:
+            for key, value in deltas.items():
+                self._counters[key] += value
+
+    def stats(self):
+        """Metrik pool: jumlah koneksi yang pernah dibuka, koneksi idle, dan counter request."""
+        with self._lock:
+            counters = dict(self._counters)
+        requests_done = counters["requests"]
+        counters["avg_ms"] = round(counters.pop("total_ms") / requests_done, 2) if requests_done else 0.0
+
+        connections_opened = 0
+        idle = 0
+        adapter = self.session.get_adapter(self.base_url)
+        for key in adapter.poolmanager.pools.keys():
+            pool = adapter.poolmanager.pools.get(key)
+            if pool is None:
+                continue
+            connections_opened += pool.num_connections
+            idle += pool.pool.qsize() if pool.pool is not None else 0
+
+        return {
+            "base_url": self.base_url,
+            "pool_size": self.pool_size,
+            "keepalive": self.keepalive,
+            "timeout": {"connect": self.connect_timeout, "read": self.read_timeout},
+            "connections_opened": connections_opened,
+            "idle_connections": idle,
+            **counters,
+        }
+
+    def reset(self):
+        """Tutup semua koneksi dan buat pool baru."""
+        old, self.session = self.session, self._new_session()
+        old.close()
+
+
+# =============================
+# REGISTRY (satu klien per upstream per proses)
+# =============================
+_clients = {}
+_registry_lock = threading.Lock()
+
+
+def get_client(name, base_url=None, **options):
+    """Ambil (atau buat) klien bersama untuk upstream `name`."""
+    with _registry_lock:
+        client = _clients.get(name)
+        if client is None:
+            if base_url is None:
+                raise KeyError(f"Upstream '{name}' belum terdaftar")
+            client = ServiceClient(name, base_url, **options)
+            _clients[name] = client
+        return client
+
+
+def pool_stats():
+    with _registry_lock:
+        clients = list(_clients.values())
+    return {client.name: client.stats() for client in clients}
+
+
+def reset_pools():
+    with _registry_lock:
+        clients = list(_clients.values())
+    for client in clients:
+        client.reset()
+
+
+def notify(base_urls, method, path, timeout=1.0):
+    """
+    Panggilan best-effort ke beberapa service sekaligus (cth: invalidasi cache).
+    Kegagalan hanya dicatat di log, tidak menggagalkan request pemanggil.
+    Membawa X-Internal-Secret karena endpoint tujuan hanya menerima service internal.
+    """
+    for base_url in base_urls:
+        try:
+            get_client(f"notify:{base_url}", base_url).request(method, path, timeout=timeout,
+                                                               headers=internal_headers())
+        except requests.exceptions.RequestException as e:
+            print(f"[notify] Gagal {method} {base_url}/{path}: {e}")
@@ -0,0 +1,240 @@
+# common/idempotency.py
+"""
+Dukungan header `Idempotency-Key` untuk endpoint yang mengubah saldo.
+
+Hasil pertama untuk sebuah key disimpan (status + body) di TTLCache. Retry
+dengan key yang sama dijawab dari cache tanpa menyentuh tabel Wallet /
+Transaction. Retry yang datang saat request pertama masih diproses dijawab
+409, dan key yang dipakai ulang untuk payload berbeda dijawab 422.
+
+Dengan beberapa worker (common/server.py), retry bisa mendarat di proses lain:
+IDEMPOTENCY_BACKEND=sqlite (default) menyimpan key di file SQLite bersama
+(IDEMPOTENCY_PATH) supaya semua worker di host yang sama melihat key yang sama.
+IDEMPOTENCY_BACKEND=memory = TTLCache per proses (hanya aman untuk satu proses).
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from functools import wraps
+
+from flask import make_response, request
+
+from common.ttl_cache import TTLCache
+
+HEADER = "Idempotency-Key"
+# Jawaban "coba lagi nanti" (konflik lock / rate limit): tidak disimpan, sama seperti 5xx,
+# supaya retry dengan key yang sama benar-benar diproses ulang, bukan di-replay
+TRANSIENT_STATUS = (409, 429)
+
+# Berapa lama hasil disimpan, dan jumlah key maksimum per proses
+IDEMPOTENCY_TTL = float(os.getenv("IDEMPOTENCY_TTL", 3600))
+IDEMPOTENCY_MAX_KEYS = int(os.getenv("IDEMPOTENCY_MAX_KEYS", 100000))
+# Batas waktu sebuah key berstatus "sedang diproses" (jika proses crash di tengah jalan)
+IDEMPOTENCY_PENDING_TTL = float(os.getenv("IDEMPOTENCY_PENDING_TTL", 60))
+IDEMPOTENCY_BACKEND = os.getenv("IDEMPOTENCY_BACKEND", "sqlite")
+IDEMPOTENCY_PATH = os.getenv(
+    "IDEMPOTENCY_PATH",
+    os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "idempotency.sqlite3")),
+)
+
+
+class IdempotencyStore:
+    def __init__(self, maxsize=IDEMPOTENCY_MAX_KEYS, ttl=IDEMPOTENCY_TTL):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def begin(self, key, fingerprint):
+        """
+        Tandai key sebagai sedang diproses.
+        Mengembalikan (state, record):
+          ('new', None)          -> lanjutkan proses, lalu panggil complete()/release()
+          ('replay', record)     -> kirim ulang record = (status, body, content_type)
+          ('in_progress', None)  -> request pertama belum selesai
+          ('mismatch', None)     -> key sama tapi payload berbeda
+        """
+        if self._cache.add(key, ("pending", fingerprint, None), ttl=IDEMPOTENCY_PENDING_TTL):
+            return "new", None
+        entry = self._cache.get(key)
+        if entry is None:
+            # Kedaluwarsa tepat di antara add() dan get(); coba sekali lagi
+            return self.begin(key, fingerprint)
+        state, stored_fingerprint, record = entry
+        if stored_fingerprint != fingerprint:
+            return "mismatch", None
+        if state == "pending":
+            return "in_progress", None
+        return "replay", record
+
+    def complete(self, key, fingerprint, status, body, content_type):
+        self._cache.set(key, ("done", fingerprint, (status, body, content_type)))
+
+    def release(self, key):
+        """Lepas key tanpa menyimpan hasil, sehingga retry akan diproses ulang."""
+        self._cache.pop(key)
+
+    def stats(self):
+        return self._cache.stats()
+
+
+class SQLiteIdempotencyStore:
+    """Antarmuka sama dengan IdempotencyStore, tetapi dibagi semua proses lewat SQLite (WAL)."""
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS idempotency_keys (
+        key TEXT PRIMARY KEY,
+        state TEXT NOT NULL,
+        fingerprint TEXT NOT NULL,
+        status INTEGER,
+        body BLOB,
+        content_type TEXT,
+        expires_at REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS ix_idempotency_expires ON idempotency_keys (expires_at);
+    """
+    # Jarak antar pembersihan key kedaluwarsa (detik)
+    PRUNE_INTERVAL = 60
+
+    def __init__(self, path=IDEMPOTENCY_PATH, ttl=IDEMPOTENCY_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._last_prune = 0.0
+        self.replays = 0
+
+    def _conn(self):
+        # Koneksi SQLite tidak boleh dipakai lintas thread: satu koneksi per thread
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(self.SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def begin(self, key, fingerprint):
+        now = time.time()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM idempotency_keys WHERE key = ? AND expires_at < ?", (key, now))
+            inserted = conn.execute(
+                "INSERT OR IGNORE INTO idempotency_keys (key, state, fingerprint, expires_at) "
+                "VALUES (?, 'pending', ?, ?)",
+                (key, fingerprint, now + IDEMPOTENCY_PENDING_TTL),
+            ).rowcount
+            row = None if inserted else conn.execute(
+                "SELECT state, fingerprint, status, body, content_type FROM idempotency_keys WHERE key = ?",
+                (key,),
+            ).fetchone()
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        self._maybe_prune(now)
+
+        if inserted:
+            return "new", None
+        state, stored_fingerprint, status, body, content_type = row
+        if stored_fingerprint != fingerprint:
+            return "mismatch", None
+        if state == "pending":
+            return "in_progress", None
+        with self._lock:
+            self.replays += 1
+        return "replay", (status, bytes(body), content_type)
+
+    def complete(self, key, fingerprint, status, body, content_type):
+        self._conn().execute(
+            "UPDATE idempotency_keys SET state = 'done', status = ?, body = ?, content_type = ?, expires_at = ? "
+            "WHERE key = ? AND fingerprint = ?",
+            (status, body, content_type, time.time() + self.ttl, key, fingerprint),
+        )
+
+    def release(self, key):
+        """Lepas key tanpa menyimpan hasil, sehingga retry akan diproses ulang."""
+        self._conn().execute("DELETE FROM idempotency_keys WHERE key = ?", (key,))
+
+    def _maybe_prune(self, now):
+        with self._lock:
+            if now - self._last_prune < self.PRUNE_INTERVAL:
+                return
+            self._last_prune = now
+        self._conn().execute("DELETE FROM idempotency_keys WHERE expires_at < ?", (now,))
+
+    def stats(self):
+        size = self._conn().execute("SELECT COUNT(*) FROM idempotency_keys").fetchone()[0]
+        return {"backend": "sqlite", "path": self.path, "size": size, "ttl": self.ttl, "replays": self.replays}
+
+
+def create_store():
+    """Store sesuai IDEMPOTENCY_BACKEND ('sqlite' = dibagi antar worker, 'memory' = per proses)."""
+    if IDEMPOTENCY_BACKEND == "memory":
+        return IdempotencyStore()
+    return SQLiteIdempotencyStore()
+
+
+def request_fingerprint(method, path, body):
+    digest = hashlib.sha256()
+    digest.update(method.encode())
+    digest.update(path.encode())
+    digest.update(body)
+    return digest.hexdigest()
+
+
+def fingerprint_request():
+    return request_fingerprint(request.method, request.path, request.get_data())
+
+
+def idempotent(store, scope=None):
+    """
+    Decorator Flask: aktif hanya untuk request yang mengubah data (bukan GET)
+    dan membawa header Idempotency-Key.
+    `scope()` mengembalikan string pemilik key (mis. user_id) supaya key dari
+    user berbeda tidak bertabrakan.
+    """
+    def decorator(f):
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            key = request.headers.get(HEADER)
+            if not key or request.method in ("GET", "HEAD", "OPTIONS"):
+                return f(*args, **kwargs)
+
+            scoped_key = f"{scope() if scope else ''}|{request.path}|{key}"
+            fingerprint = fingerprint_request()
+            state, record = store.begin(scoped_key, fingerprint)
+
+            if state == "replay":
+                status, body, content_type = record
+                response = make_response(body, status)
+                response.headers["Content-Type"] = content_type
+                response.headers["Idempotent-Replayed"] = "true"
+                return response
+            if state == "in_progress":
+                return {"message": "Request dengan Idempotency-Key ini masih diproses."}, 409
+            if state == "mismatch":
+                return {"message": "Idempotency-Key sudah dipakai untuk payload yang berbeda."}, 422
+
+            try:
+                response = make_response(f(*args, **kwargs))
+            except Exception:
+                store.release(scoped_key)
+                raise
+
+            # Error sementara (5xx, 409, 429) tidak disimpan supaya klien bisa retry
+            if response.status_code >= 500 or response.status_code in TRANSIENT_STATUS:
+                store.release(scoped_key)
+                return response
+            try:
+                # Body bisa berupa stream dari upstream yang putus di tengah
+                body = response.get_data()
+            except Exception:
+                store.release(scoped_key)
+                response.close()
+                raise
+            store.complete(scoped_key, fingerprint, response.status_code, body, response.headers.get("Content-Type"))
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,56 @@
+# common/internal_auth.py
+"""
+Bukti bahwa sebuah request datang dari service internal (gateway / service lain),
+bukan dari klien yang langsung menembak port service.
+
+INTERNAL_SECRET diset sama di semua service; pengirim menambahkan header
+X-Internal-Secret (internal_headers()) dan penerima mencocokkannya (is_internal()).
+Tanpa INTERNAL_SECRET hanya request dari loopback yang dianggap internal
+(cocok untuk dev di satu mesin, jangan diandalkan di balik reverse proxy lokal).
+
+Endpoint operasional (/admin/*) memakai pola yang sama dengan ADMIN_TOKEN dan
+header X-Admin-Token (is_admin() / decorator Flask require_admin).
+"""
+import hmac
+import os
+from functools import wraps
+
+INTERNAL_SECRET = os.getenv("INTERNAL_SECRET", "")
+INTERNAL_SECRET_HEADER = "X-Internal-Secret"
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+ADMIN_TOKEN_HEADER = "X-Admin-Token"
+
+LOOPBACK_ADDRESSES = ("127.0.0.1", "::1")
+
+
+def internal_headers():
+    """Header yang dikirim bersama request antar service (kosong jika secret belum diset)."""
+    return {INTERNAL_SECRET_HEADER: INTERNAL_SECRET} if INTERNAL_SECRET else {}
+
+
+def _matches(headers, header, secret, remote_addr):
+    if secret:
+        return hmac.compare_digest(headers.get(header, ""), secret)
+    return remote_addr in LOOPBACK_ADDRESSES
+
+
+def is_internal(headers, remote_addr):
+    """True jika header secret cocok, atau (tanpa INTERNAL_SECRET) request berasal dari loopback."""
+    return _matches(headers, INTERNAL_SECRET_HEADER, INTERNAL_SECRET, remote_addr)
+
+
+def is_admin(headers, remote_addr):
+    """True jika X-Admin-Token cocok, atau (tanpa ADMIN_TOKEN) request berasal dari loopback."""
+    return _matches(headers, ADMIN_TOKEN_HEADER, ADMIN_TOKEN, remote_addr)
+
+
+def require_admin(view):
+    """Decorator Flask untuk endpoint /admin/*: 403 jika bukan admin (lihat is_admin)."""
+    from flask import jsonify, request
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not is_admin(request.headers, request.remote_addr):
+            return jsonify({"message": f"Endpoint admin butuh header {ADMIN_TOKEN_HEADER} yang valid."}), 403
+        return view(*args, **kwargs)
+    return wrapper
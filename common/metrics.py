@@ -0,0 +1,288 @@
+# common/metrics.py
+"""
+Metrik format Prometheus (text exposition 0.0.4) tanpa dependensi tambahan.
+
+Setiap proses punya satu REGISTRY. Yang tercatat otomatis:
+
+- http_requests_total / http_request_duration_seconds / http_requests_in_flight /
+  http_request_errors_total per rute (pola rute Flask, bukan URL mentah,
+  supaya jumlah label tetap terbatas)
+- upstream_request_duration_seconds per target (dari common/http_client.py)
+- db_query_duration_seconds per jenis query (SELECT/INSERT/UPDATE/...)
+
+Pasang dengan instrument_flask(app, 'wallet'); endpoint GET /metrics ikut
+didaftarkan. Gateway aiohttp memakai aiohttp_middleware + metrics_text().
+Nilai bersifat per proses; dengan beberapa worker, Prometheus men-scrape
+tiap worker (label instance) atau agregasi dilakukan di sisi Prometheus.
+"""
+import os
+import threading
+import time
+from bisect import bisect_left
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") not in ("0", "false", "False")
+
+# Batas bucket histogram latensi (detik)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def header(self):
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def collect(self):
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {value}" for key, value in items]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # [jumlah per bucket (non-kumulatif) + +Inf, sum]
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][index] += 1
+            state[1] += value
+
+    def collect(self):
+        with self._lock:
+            items = [(key, list(counts), total) for key, (counts, total) in self._values.items()]
+        lines = []
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, [('le', le)])} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name, documentation, labelnames, **options):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, documentation, labelnames, **options)
+            return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.header())
+            lines.extend(metric.collect())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+# =============================
+# METRIK BAWAAN
+# =============================
+HTTP_REQUESTS = REGISTRY.counter("http_requests_total", "Request HTTP yang selesai",
+                                 ("service", "method", "route", "status"))
+HTTP_LATENCY = REGISTRY.histogram("http_request_duration_seconds", "Latensi request HTTP",
+                                  ("service", "method", "route"))
+HTTP_IN_FLIGHT = REGISTRY.gauge("http_requests_in_flight", "Request HTTP yang sedang diproses",
+                                ("service", "route"))
+HTTP_ERRORS = REGISTRY.counter("http_request_errors_total", "Request HTTP yang berakhir 5xx / exception",
+                               ("service", "method", "route"))
+UPSTREAM_LATENCY = REGISTRY.histogram("upstream_request_duration_seconds", "Latensi panggilan ke service lain",
+                                      ("upstream", "method", "status"))
+DB_LATENCY = REGISTRY.histogram("db_query_duration_seconds", "Latensi query database",
+                                ("service", "operation"))
+
+_service_name = ""
+
+
+def observe_upstream(upstream, method, status, seconds):
+    """Dipanggil common/http_client.py; status = kode HTTP atau 'error'."""
+    if METRICS_ENABLED:
+        UPSTREAM_LATENCY.observe(seconds, upstream=upstream, method=method, status=status)
+
+
+def metrics_text():
+    return REGISTRY.render()
+
+
+# =============================
+# INTEGRASI SQLALCHEMY
+# =============================
+def instrument_sqlalchemy():
+    """Catat durasi setiap query di semua engine SQLAlchemy pada proses ini."""
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+
+    if getattr(instrument_sqlalchemy, "installed", False):
+        return
+    instrument_sqlalchemy.installed = True
+
+    @event.listens_for(Engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(Engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get("query_start")
+        if not starts:
+            return
+        elapsed = time.perf_counter() - starts.pop()
+        operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "OTHER"
+        DB_LATENCY.observe(elapsed, service=_service_name, operation=operation)
+
+    @event.listens_for(Engine, "handle_error")
+    def _error(context):
+        # Query gagal tidak memicu after_cursor_execute: buang waktu mulainya
+        starts = context.connection.info.get("query_start") if context.connection is not None else None
+        if starts:
+            starts.pop()
+
+
+# =============================
+# INTEGRASI FLASK
+# =============================
+def instrument_flask(app, service_name):
+    """Pasang hook metrik per request + GET /metrics, dan timing query SQLAlchemy."""
+    global _service_name
+    _service_name = service_name
+    if not METRICS_ENABLED:
+        return
+
+    from flask import Response, g, request
+
+    @app.before_request
+    def _metrics_start():
+        g._metrics_start = time.perf_counter()
+        g._metrics_route = request.url_rule.rule if request.url_rule else "unmatched"
+        HTTP_IN_FLIGHT.inc(service=service_name, route=g._metrics_route)
+
+    @app.teardown_request
+    def _metrics_end(exc):
+        start = g.pop("_metrics_start", None)
+        if start is None:
+            return
+        route = g.pop("_metrics_route")
+        status = g.pop("_metrics_status", 500)
+        HTTP_IN_FLIGHT.dec(service=service_name, route=route)
+        HTTP_REQUESTS.inc(service=service_name, method=request.method, route=route, status=status)
+        HTTP_LATENCY.observe(time.perf_counter() - start, service=service_name,
+                             method=request.method, route=route)
+        if exc is not None or status >= 500:
+            HTTP_ERRORS.inc(service=service_name, method=request.method, route=route)
+
+    @app.after_request
+    def _metrics_status(response):
+        g._metrics_status = response.status_code
+        return response
+
+    @app.route("/metrics")
+    def metrics():
+        return Response(metrics_text(), content_type=CONTENT_TYPE)
+
+    try:
+        instrument_sqlalchemy()
+    except ImportError:
+        pass  # gateway tidak memakai SQLAlchemy
+
+
+# =============================
+# INTEGRASI AIOHTTP (gateway async)
+# =============================
+def aiohttp_middleware(service_name):
+    global _service_name
+    _service_name = service_name
+    from aiohttp import web
+
+    @web.middleware
+    async def middleware(request, handler):
+        if not METRICS_ENABLED:
+            return await handler(request)
+        resource = request.match_info.route.resource
+        route = resource.canonical if resource is not None else "unmatched"
+        start = time.perf_counter()
+        status = 500
+        HTTP_IN_FLIGHT.inc(service=service_name, route=route)
+        try:
+            response = await handler(request)
+            status = response.status
+            return response
+        except web.HTTPException as e:
+            status = e.status
+            raise
+        finally:
+            HTTP_IN_FLIGHT.dec(service=service_name, route=route)
+            HTTP_REQUESTS.inc(service=service_name, method=request.method, route=route, status=status)
+            HTTP_LATENCY.observe(time.perf_counter() - start, service=service_name,
+                                 method=request.method, route=route)
+            if status >= 500:
+                HTTP_ERRORS.inc(service=service_name, method=request.method, route=route)
+
+    return middleware
@@ -0,0 +1,155 @@
+# common/migrations.py
+"""
+Migrasi skema berversi, dijalankan lewat perintah eksplisit (bukan saat import app).
+
+Setiap service punya migrations.py berisi daftar MIGRATIONS = [Migration(...)]
+dengan nomor versi urut. Versi yang sudah diterapkan dicatat di tabel
+schema_version milik database service tersebut:
+
+    cd service-wallet
+    python migrations.py            # terapkan migrasi yang belum jalan
+    python migrations.py --status   # versi terpasang & yang masih tertunda
+    python migrations.py --to 3     # berhenti di versi 3
+
+Tabel di migrasi ditulis ulang (bukan diambil dari models.py) supaya isi
+migrasi lama tidak ikut berubah saat model berubah. Helper di bawah memeriksa
+dulu apakah tabel/kolom/index sudah ada, sehingga database lama yang dibuat
+db.create_all() bisa diadopsi tanpa error.
+
+Di MySQL, DDL meng-commit sendiri: migrasi yang gagal di tengah tidak di-rollback,
+tetapi karena helper-nya idempoten, cukup perbaiki penyebabnya lalu jalankan ulang.
+"""
+import argparse
+import time
+from collections import namedtuple
+from datetime import datetime
+
+import sqlalchemy as sa
+
+Migration = namedtuple("Migration", ["version", "description", "upgrade"])
+
+# Batas tunggu (detik) lock MySQL GET_LOCK, supaya dua proses deploy tidak bermigrasi bersamaan
+LOCK_TIMEOUT = 60
+
+schema_version = sa.Table(
+    "schema_version", sa.MetaData(),
+    sa.Column("version", sa.Integer, primary_key=True, autoincrement=False),
+    sa.Column("description", sa.String(255), nullable=False),
+    sa.Column("applied_at", sa.DateTime, nullable=False),
+    sa.Column("duration_ms", sa.Integer, nullable=False),
+)
+
+
+# =============================
+# HELPER DDL (idempoten)
+# =============================
+def create_table(conn, table):
+    """Buat tabel beserta index-nya jika belum ada."""
+    table.create(conn, checkfirst=True)
+
+
+def add_column(conn, table_name, column):
+    """ALTER TABLE ... ADD COLUMN, dilewati jika kolomnya sudah ada."""
+    if column.name in {c["name"] for c in sa.inspect(conn).get_columns(table_name)}:
+        return
+    quote = conn.dialect.identifier_preparer.quote
+    ddl = f"{quote(column.name)} {column.type.compile(dialect=conn.dialect)}"
+    if not column.nullable:
+        ddl += " NOT NULL"
+    if column.server_default is not None:
+        ddl += f" DEFAULT {column.server_default.arg}"
+    conn.execute(sa.text(f"ALTER TABLE {quote(table_name)} ADD COLUMN {ddl}"))
+
+
+def _index_names(conn, table_name):
+    return {index["name"] for index in sa.inspect(conn).get_indexes(table_name)}
+
+
+def create_index(conn, table_name, name, *columns, unique=False):
+    if name in _index_names(conn, table_name):
+        return
+    table = sa.Table(table_name, sa.MetaData(), autoload_with=conn)
+    sa.Index(name, *(table.c[column] for column in columns), unique=unique).create(conn)
+
+
+def drop_index(conn, table_name, name):
+    if name not in _index_names(conn, table_name):
+        return
+    table = sa.Table(table_name, sa.MetaData(), autoload_with=conn)
+    next(index for index in table.indexes if index.name == name).drop(conn)
+
+
+# =============================
+# RUNNER
+# =============================
+def applied_versions(conn):
+    if not sa.inspect(conn).has_table("schema_version"):
+        return {}
+    return {row.version: row for row in conn.execute(sa.select(schema_version))}
+
+
+def _check_order(migrations):
+    versions = [m.version for m in migrations]
+    if versions != sorted(set(versions)):
+        raise ValueError(f"Nomor versi migrasi harus unik dan urut: {versions}")
+
+
+def migrate(engine, migrations, target=None, log=print):
+    """Terapkan migrasi yang belum jalan (s/d `target`). Mengembalikan versi yang diterapkan."""
+    _check_order(migrations)
+    applied = []
+    with engine.connect() as conn:
+        locked = conn.dialect.name == "mysql"
+        if locked and not conn.execute(sa.text("SELECT GET_LOCK('schema_migrate', :t)"),
+                                       {"t": LOCK_TIMEOUT}).scalar():
+            raise RuntimeError("Migrasi lain sedang berjalan (GET_LOCK timeout)")
+        conn.commit()  # lock MySQL berlaku per koneksi, bukan per transaksi
+        try:
+            with conn.begin():
+                schema_version.create(conn, checkfirst=True)
+                done = applied_versions(conn)
+            for migration in migrations:
+                if migration.version in done or (target is not None and migration.version > target):
+                    continue
+                log(f"[migrate] {migration.version}: {migration.description} ...")
+                start = time.perf_counter()
+                with conn.begin():
+                    migration.upgrade(conn)
+                    conn.execute(schema_version.insert().values(
+                        version=migration.version,
+                        description=migration.description[:255],
+                        applied_at=datetime.utcnow(),
+                        duration_ms=int((time.perf_counter() - start) * 1000),
+                    ))
+                applied.append(migration.version)
+        finally:
+            if locked:
+                conn.execute(sa.text("SELECT RELEASE_LOCK('schema_migrate')"))
+    return applied
+
+
+def status(engine, migrations):
+    with engine.connect() as conn:
+        done = applied_versions(conn)
+    return [
+        {"version": m.version, "description": m.description,
+         "applied_at": done[m.version].applied_at.isoformat() if m.version in done else None}
+        for m in migrations
+    ]
+
+
+def main(app, db, migrations):
+    """Entry point `python migrations.py` untuk setiap service."""
+    parser = argparse.ArgumentParser(description="Migrasi skema database service")
+    parser.add_argument("--status", action="store_true", help="tampilkan versi terpasang & tertunda")
+    parser.add_argument("--to", type=int, help="berhenti di versi ini")
+    args = parser.parse_args()
+
+    with app.app_context():
+        engine = db.engine
+        if args.status:
+            for row in status(engine, migrations):
+                print(f"{row['version']:>4}  {row['applied_at'] or 'TERTUNDA':<26}  {row['description']}")
+            return
+        applied = migrate(engine, migrations, target=args.to)
+        print(f"[migrate] {len(applied)} migrasi diterapkan" if applied else "[migrate] Skema sudah terbaru")
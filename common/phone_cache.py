@@ -0,0 +1,67 @@
+# common/phone_cache.py
+"""
+Cache nomor HP -> user_id (hanya user aktif) di depan endpoint internal
+service-user. Dipakai service-transaction untuk transfer berulang ke penerima
+yang sama dan untuk transfer massal.
+
+Entry dihapus oleh service-user lewat DELETE /internal/cache/phones/<phone>
+saat nomor HP diganti atau akun ditutup.
+"""
+import os
+
+from common.ttl_cache import TTLCache
+
+PHONE_CACHE_TTL = float(os.getenv("PHONE_CACHE_TTL", 300))
+PHONE_CACHE_SIZE = int(os.getenv("PHONE_CACHE_SIZE", 50000))
+# Jumlah nomor maksimum per panggilan batch ke service-user
+PHONE_BATCH_SIZE = int(os.getenv("PHONE_BATCH_SIZE", 500))
+
+
+class PhoneLookupCache:
+    def __init__(self, client, maxsize=PHONE_CACHE_SIZE, ttl=PHONE_CACHE_TTL):
+        self.client = client
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def get(self, phone, timeout=None):
+        """
+        user_id pemilik nomor HP. Saat cache miss, memanggil service-user;
+        error HTTP (cth: 404) diteruskan sebagai requests.exceptions.HTTPError.
+        """
+        user_id = self._cache.get(phone)
+        if user_id is not None:
+            return user_id
+
+        res = self.client.get(f"users/internal/by-phone/{phone}", timeout=timeout)
+        res.raise_for_status()
+        user_id = res.json()["id"]
+        self._cache.set(phone, user_id)
+        return user_id
+
+    def get_many(self, phones, timeout=None):
+        """
+        Resolve banyak nomor sekaligus. Mengembalikan {phone: user_id} untuk
+        nomor yang ditemukan; nomor yang tidak ada/tidak aktif tidak disertakan.
+        """
+        found = {}
+        misses = []
+        for phone in dict.fromkeys(phones):
+            user_id = self._cache.get(phone)
+            if user_id is None:
+                misses.append(phone)
+            else:
+                found[phone] = user_id
+
+        for start in range(0, len(misses), PHONE_BATCH_SIZE):
+            chunk = misses[start:start + PHONE_BATCH_SIZE]
+            res = self.client.post("users/internal/by-phones", json={"phone_numbers": chunk}, timeout=timeout)
+            res.raise_for_status()
+            for user in res.json()["users"]:
+                found[user["phone_number"]] = user["id"]
+                self._cache.set(user["phone_number"], user["id"])
+        return found
+
+    def invalidate(self, phone):
+        self._cache.pop(phone)
+
+    def stats(self):
+        return self._cache.stats()
@@ -0,0 +1,229 @@
+# common/profiling.py
+"""
+Profiler sampling per request (opt-in) untuk service Flask.
+
+Request yang terpilih (PROFILE_SAMPLE_RATE, atau path yang cocok regex PROFILE_ROUTES)
+didaftarkan ke satu thread sampler. Thread itu membaca stack thread-thread
+tersebut setiap PROFILE_INTERVAL detik lewat sys._current_frames(), tanpa
+sys.setprofile. Request yang tidak terpilih tidak ikut melambat.
+
+Hasil:
+  GET    /admin/profile           stack teragregasi format "folded"
+                                  (`service;rute;frame;frame N`), bisa langsung
+                                  dipakai flamegraph.pl / speedscope
+  GET    /admin/profile/requests  ringkasan profil per request terakhir
+  POST   /admin/profile           ubah pengaturan saat berjalan
+                                  {"enabled": true, "sample_rate": 0.1, "routes": "^/internal/"}
+  DELETE /admin/profile           kosongkan data
+
+Semua endpoint /admin/profile butuh X-Admin-Token (ADMIN_TOKEN, lihat
+common/internal_auth.py); tanpa ADMIN_TOKEN hanya bisa dipanggil dari loopback.
+
+Saat mati (default), biaya per request hanya satu pengecekan boolean.
+"""
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter, deque
+
+from common.internal_auth import require_admin
+
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "0") in ("1", "true", "True")
+# Porsi request yang diprofil (0..1); path yang cocok regex PROFILE_ROUTES selalu diprofil
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", 0.01))
+PROFILE_ROUTES = os.getenv("PROFILE_ROUTES", "")
+# Jarak antar sampel stack (detik)
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL", 0.005))
+PROFILE_MAX_DEPTH = int(os.getenv("PROFILE_MAX_DEPTH", 128))
+PROFILE_RECENT_REQUESTS = int(os.getenv("PROFILE_RECENT_REQUESTS", 100))
+# Batas jumlah stack unik yang disimpan (stack baru di atas batas ini dibuang)
+PROFILE_MAX_STACKS = int(os.getenv("PROFILE_MAX_STACKS", 50000))
+
+
+def _frame_label(code):
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class _RequestProfile:
+    __slots__ = ("route", "method", "started", "samples")
+
+    def __init__(self, route, method):
+        self.route = route
+        self.method = method
+        self.started = time.perf_counter()
+        self.samples = Counter()  # stack (tuple label) -> jumlah sampel
+
+
+class SamplingProfiler:
+    def __init__(self, service_name, enabled=PROFILING_ENABLED, sample_rate=PROFILE_SAMPLE_RATE,
+                 routes=PROFILE_ROUTES, interval=PROFILE_INTERVAL):
+        self.service_name = service_name
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self.routes = re.compile(routes) if routes else None
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._active = {}  # thread id -> _RequestProfile
+        self._stacks = Counter()  # "service;rute;frame;..." -> jumlah sampel
+        self._recent = deque(maxlen=PROFILE_RECENT_REQUESTS)
+        self._thread = None
+        self.dropped_stacks = 0
+
+    # =============================
+    # PENGATURAN
+    # =============================
+    def configure(self, enabled=None, sample_rate=None, routes=None):
+        if enabled is not None:
+            self.enabled = bool(enabled)
+        if sample_rate is not None:
+            self.sample_rate = max(0.0, min(1.0, float(sample_rate)))
+        if routes is not None:
+            self.routes = re.compile(routes) if routes else None
+        return self.settings()
+
+    def settings(self):
+        return {"enabled": self.enabled, "sample_rate": self.sample_rate,
+                "routes": self.routes.pattern if self.routes else "", "interval": self.interval}
+
+    def should_profile(self, path):
+        if self.routes is not None and self.routes.search(path):
+            return True
+        return random.random() < self.sample_rate
+
+    # =============================
+    # PER REQUEST
+    # =============================
+    def begin(self, route, method):
+        profile = _RequestProfile(route, method)
+        with self._lock:
+            self._active[threading.get_ident()] = profile
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+                self._thread.start()
+        return profile
+
+    def end(self, profile, status=None):
+        duration_ms = (time.perf_counter() - profile.started) * 1000
+        with self._lock:
+            self._active.pop(threading.get_ident(), None)
+            total = sum(profile.samples.values())
+            # Frame teratas (self time) yang paling sering muncul di request ini
+            leaf = Counter()
+            for stack, count in profile.samples.items():
+                leaf[stack[-1]] += count
+            self._recent.append({
+                "route": profile.route,
+                "method": profile.method,
+                "status": status,
+                "duration_ms": round(duration_ms, 2),
+                "samples": total,
+                "top_frames": [{"frame": frame, "samples": count} for frame, count in leaf.most_common(10)],
+            })
+
+    # =============================
+    # THREAD SAMPLER
+    # =============================
+    def _run(self):
+        own = threading.get_ident()
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                if not self._active:
+                    # Tidak ada request yang diprofil: thread berhenti, dibuat lagi oleh begin()
+                    self._thread = None
+                    return
+                active = dict(self._active)
+            frames = sys._current_frames()
+            with self._lock:
+                for thread_id, profile in active.items():
+                    frame = frames.get(thread_id)
+                    if frame is None or thread_id == own:
+                        continue
+                    stack = []
+                    while frame is not None and len(stack) < PROFILE_MAX_DEPTH:
+                        stack.append(_frame_label(frame.f_code))
+                        frame = frame.f_back
+                    stack.reverse()
+                    stack = tuple(stack)
+                    profile.samples[stack] += 1
+                    key = ";".join((self.service_name, f"{profile.method} {profile.route}") + stack)
+                    if key in self._stacks or len(self._stacks) < PROFILE_MAX_STACKS:
+                        self._stacks[key] += 1
+                    else:
+                        self.dropped_stacks += 1
+
+    # =============================
+    # HASIL
+    # =============================
+    def folded(self, route=None):
+        with self._lock:
+            items = list(self._stacks.items())
+        lines = [f"{stack} {count}" for stack, count in items
+                 if route is None or stack.split(";", 2)[1].endswith(" " + route)]
+        return "\n".join(sorted(lines)) + ("\n" if lines else "")
+
+    def recent(self):
+        with self._lock:
+            return list(self._recent)
+
+    def reset(self):
+        with self._lock:
+            self._stacks.clear()
+            self._recent.clear()
+            self.dropped_stacks = 0
+
+
+# =============================
+# INTEGRASI FLASK
+# =============================
+def instrument_flask(app, service_name):
+    """Pasang hook profil per request + endpoint /admin/profile. Mengembalikan profiler-nya."""
+    from flask import Response, g, jsonify, request
+
+    profiler = SamplingProfiler(service_name)
+
+    @app.before_request
+    def _profile_start():
+        if not profiler.enabled or request.path.startswith("/admin/profile"):
+            return
+        if profiler.should_profile(request.path):
+            route = request.url_rule.rule if request.url_rule else "unmatched"
+            g._profile = profiler.begin(route, request.method)
+
+    @app.after_request
+    def _profile_status(response):
+        if g.get("_profile") is not None:
+            g._profile_status = response.status_code
+        return response
+
+    @app.teardown_request
+    def _profile_end(exc):
+        profile = g.pop("_profile", None)
+        if profile is not None:
+            profiler.end(profile, g.pop("_profile_status", 500))
+
+    @app.route("/admin/profile", methods=["GET", "POST", "DELETE"])
+    @require_admin
+    def admin_profile():
+        if request.method == "POST":
+            body = request.get_json(silent=True) or {}
+            try:
+                settings = profiler.configure(body.get("enabled"), body.get("sample_rate"), body.get("routes"))
+            except (ValueError, re.error) as e:
+                return jsonify({"message": f"Pengaturan profiler tidak valid: {e}"}), 400
+            return jsonify(settings)
+        if request.method == "DELETE":
+            profiler.reset()
+            return jsonify({"message": "Data profil dihapus."})
+        return Response(profiler.folded(request.args.get("route")), content_type="text/plain; charset=utf-8")
+
+    @app.route("/admin/profile/requests")
+    @require_admin
+    def admin_profile_requests():
+        return jsonify({"settings": profiler.settings(), "dropped_stacks": profiler.dropped_stacks,
+                        "requests": profiler.recent()})
+
+    return profiler
@@ -0,0 +1,289 @@
+# common/resilience.py
+"""
+Pengaman panggilan ke upstream (dipakai klien gateway):
+
+- CircuitBreaker: setelah BREAKER_FAILURE_THRESHOLD kegagalan beruntun
+  (error koneksi, timeout, atau 5xx) upstream dianggap mati dan request
+  langsung ditolak selama BREAKER_RESET_TIMEOUT detik. Setelah itu beberapa
+  request percobaan (half-open) menentukan apakah breaker ditutup lagi.
+- RetryBudget: retry hanya untuk GET, dengan backoff + jitter, dan jumlahnya
+  dibatasi proporsional terhadap trafik (RETRY_BUDGET_RATIO) supaya retry
+  tidak melipatgandakan beban saat upstream sedang kesulitan.
+- Bulkhead: batas request paralel per upstream (UPSTREAM_MAX_CONCURRENCY).
+  Upstream yang lambat hanya menghabiskan jatahnya sendiri, bukan semua
+  worker gateway.
+
+Request yang ditolak breaker / bulkhead gagal cepat dengan UpstreamUnavailable
+(turunan requests.exceptions.ConnectionError, jadi handler 503 yang sudah ada
+tetap berlaku).
+"""
+import asyncio
+import os
+import random
+import threading
+import time
+from collections import deque
+
+import requests
+
+# =============================
+# KONFIGURASI (via .env)
+# =============================
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", 5))
+BREAKER_RESET_TIMEOUT = float(os.getenv("BREAKER_RESET_TIMEOUT", 10))
+BREAKER_HALF_OPEN_MAX = int(os.getenv("BREAKER_HALF_OPEN_MAX", 1))
+# Retry boleh maksimal RATIO x jumlah request dalam WINDOW detik terakhir (+ MIN per detik)
+RETRY_BUDGET_RATIO = float(os.getenv("RETRY_BUDGET_RATIO", 0.1))
+RETRY_BUDGET_MIN_PER_SEC = float(os.getenv("RETRY_BUDGET_MIN_PER_SEC", 1))
+RETRY_BUDGET_WINDOW = float(os.getenv("RETRY_BUDGET_WINDOW", 10))
+RETRY_MAX_ATTEMPTS = int(os.getenv("RETRY_MAX_ATTEMPTS", 2))  # termasuk percobaan pertama
+RETRY_BACKOFF_BASE = float(os.getenv("RETRY_BACKOFF_BASE", 0.05))
+UPSTREAM_MAX_CONCURRENCY = int(os.getenv("UPSTREAM_MAX_CONCURRENCY", 50))
+
+RETRYABLE_METHODS = ("GET", "HEAD")
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class UpstreamUnavailable(requests.exceptions.ConnectionError):
+    """Request ditolak sebelum dikirim (breaker terbuka atau batas konkurensi penuh)."""
+
+    def __init__(self, upstream, reason, retry_after=1):
+        super().__init__(f"{upstream}: {reason}")
+        self.upstream = upstream
+        self.reason = reason
+        self.retry_after = max(1, int(round(retry_after)))
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold=BREAKER_FAILURE_THRESHOLD, reset_timeout=BREAKER_RESET_TIMEOUT,
+                 half_open_max=BREAKER_HALF_OPEN_MAX):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_max = half_open_max
+        self._lock = threading.Lock()
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probes = 0
+        self.times_opened = 0
+        self.rejected = 0
+
+    def allow(self):
+        with self._lock:
+            if self.state == OPEN:
+                if time.monotonic() - self.opened_at < self.reset_timeout:
+                    self.rejected += 1
+                    return False
+                self.state, self._probes = HALF_OPEN, 0
+            if self.state == HALF_OPEN:
+                if self._probes >= self.half_open_max:
+                    self.rejected += 1
+                    return False
+                self._probes += 1
+            return True
+
+    def retry_after(self):
+        with self._lock:
+            return max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+
+    def record_success(self):
+        with self._lock:
+            self.state, self.failures = CLOSED, 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    self.times_opened += 1
+                self.state, self.opened_at = OPEN, time.monotonic()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "state": self.state,
+                "consecutive_failures": self.failures,
+                "times_opened": self.times_opened,
+                "rejected": self.rejected,
+            }
+
+
+class RetryBudget:
+    def __init__(self, ratio=RETRY_BUDGET_RATIO, min_per_sec=RETRY_BUDGET_MIN_PER_SEC, window=RETRY_BUDGET_WINDOW):
+        self.ratio = ratio
+        self.min_retries = min_per_sec * window
+        self.window = window
+        self._lock = threading.Lock()
+        self._requests = deque()  # timestamp request pertama
+        self._retries = deque()   # timestamp retry
+        self.exhausted = 0
+
+    def _trim(self, now):
+        for events in (self._requests, self._retries):
+            while events and events[0] <= now - self.window:
+                events.popleft()
+
+    def record_request(self):
+        now = time.monotonic()
+        with self._lock:
+            self._trim(now)
+            self._requests.append(now)
+
+    def try_retry(self):
+        now = time.monotonic()
+        with self._lock:
+            self._trim(now)
+            if len(self._retries) >= self.min_retries + self.ratio * len(self._requests):
+                self.exhausted += 1
+                return False
+            self._retries.append(now)
+            return True
+
+    def stats(self):
+        with self._lock:
+            self._trim(time.monotonic())
+            return {"requests_in_window": len(self._requests), "retries_in_window": len(self._retries),
+                    "exhausted": self.exhausted}
+
+
+class Bulkhead:
+    def __init__(self, limit=UPSTREAM_MAX_CONCURRENCY):
+        self.limit = limit
+        self._semaphore = threading.BoundedSemaphore(limit)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.rejected = 0
+
+    def acquire(self):
+        # Tanpa menunggu: lebih baik 503 cepat daripada antre di belakang upstream yang lambat
+        if not self._semaphore.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            return False
+        with self._lock:
+            self.in_flight += 1
+        return True
+
+    def release(self):
+        with self._lock:
+            self.in_flight -= 1
+        self._semaphore.release()
+
+    def stats(self):
+        with self._lock:
+            return {"limit": self.limit, "in_flight": self.in_flight, "rejected": self.rejected}
+
+
+class UpstreamGuard:
+    """Breaker + retry budget + bulkhead untuk satu upstream."""
+
+    def __init__(self, name, breaker=None, budget=None, bulkhead=None, max_attempts=RETRY_MAX_ATTEMPTS,
+                 backoff_base=RETRY_BACKOFF_BASE):
+        self.name = name
+        self.breaker = breaker or CircuitBreaker()
+        self.budget = budget or RetryBudget()
+        self.bulkhead = bulkhead or Bulkhead()
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+
+    def enter(self):
+        """Ambil slot bulkhead dan izin breaker, atau lempar UpstreamUnavailable."""
+        if not self.bulkhead.acquire():
+            raise UpstreamUnavailable(self.name, "concurrency_limit")
+        if not self.breaker.allow():
+            self.bulkhead.release()
+            raise UpstreamUnavailable(self.name, "circuit_open", self.breaker.retry_after())
+
+    def exit(self):
+        self.bulkhead.release()
+
+    def record(self, ok):
+        if ok:
+            self.breaker.record_success()
+        else:
+            self.breaker.record_failure()
+
+    def backoff(self, attempt):
+        # Full jitter: acak antara 0 dan base * 2^attempt
+        return random.uniform(0, self.backoff_base * (2 ** attempt))
+
+    def can_retry(self, method, attempt):
+        return (method.upper() in RETRYABLE_METHODS and attempt + 1 < self.max_attempts
+                and self.breaker.state == CLOSED and self.budget.try_retry())
+
+    def execute(self, method, send, hold=False):
+        """
+        Jalankan send() (mengembalikan requests.Response) di bawah pengaman.
+        Error koneksi/timeout diteruskan setelah retry habis; respon 5xx
+        dikembalikan apa adanya (tetap dihitung sebagai kegagalan breaker).
+        hold=True (respon stream=True): slot bulkhead tetap dipegang setelah
+        respon dikembalikan; pemanggil wajib memanggil exit() setelah body habis.
+        """
+        self.enter()
+        held = False
+        try:
+            self.budget.record_request()
+            attempt = 0
+            while True:
+                try:
+                    response = send()
+                except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                    self.record(False)
+                    if not self.can_retry(method, attempt):
+                        raise
+                except BaseException:
+                    # Error lain tetap dicatat: probe half-open yang tidak pernah dicatat
+                    # membuat breaker menolak semua request selamanya
+                    self.record(False)
+                    raise
+                else:
+                    ok = response.status_code < 500
+                    self.record(ok)
+                    if ok or not self.can_retry(method, attempt):
+                        held = hold
+                        return response
+                    response.close()
+                time.sleep(self.backoff(attempt))
+                attempt += 1
+        finally:
+            if not held:
+                self.exit()
+
+    async def execute_async(self, method, send, errors):
+        """
+        Versi asyncio dari execute() untuk gateway aiohttp: send() adalah coroutine
+        yang mengembalikan respon dengan atribut .status; `errors` adalah tuple
+        exception koneksi/timeout yang boleh di-retry.
+        """
+        self.enter()
+        try:
+            self.budget.record_request()
+            attempt = 0
+            while True:
+                try:
+                    response = await send()
+                except errors:
+                    self.record(False)
+                    if not self.can_retry(method, attempt):
+                        raise
+                except BaseException:
+                    # Termasuk CancelledError (klien memutus koneksi): lihat execute()
+                    self.record(False)
+                    raise
+                else:
+                    ok = response.status < 500
+                    self.record(ok)
+                    if ok or not self.can_retry(method, attempt):
+                        return response
+                await asyncio.sleep(self.backoff(attempt))
+                attempt += 1
+        finally:
+            self.exit()
+
+    def healthy(self):
+        return self.breaker.state != OPEN
+
+    def stats(self):
+        return {"breaker": self.breaker.stats(), "retry_budget": self.budget.stats(),
+                "bulkhead": self.bulkhead.stats()}
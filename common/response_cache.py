@@ -0,0 +1,97 @@
+# common/response_cache.py
+"""
+Cache respon GET di gateway, per rute dan per user (X-User-Id).
+
+Body respon 200 disimpan apa adanya beserta ETag-nya. Klien yang
+mengirim If-None-Match dengan ETag yang sama cukup dijawab 304 tanpa body.
+Hanya rute yang punya TTL di ROUTE_TTLS yang di-cache.
+
+Entry dihapus saat ada penulisan lewat gateway (top up, transfer, payee,
+profil) dan saat event wallet.balance_changed / wallet.closed diterima,
+misalnya saldo penerima transfer. Cache ada di memori tiap worker, jadi
+penulisan di satu worker juga dipublikasikan sebagai event
+gateway.cache_invalidated (publish_invalidation) untuk worker lain.
+TTL tetap menjadi batas atas data basi kalau event bus dimatikan.
+"""
+import hashlib
+import os
+from collections import namedtuple
+
+from common.ttl_cache import TTLCache
+
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "1") not in ("0", "false", "False")
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", 20000))
+
+# TTL (detik) per rute; 0 = rute tidak di-cache
+ROUTE_TTLS = {
+    # Saldo: TTL pendek, andalan utamanya invalidasi
+    "wallets_me": float(os.getenv("RESPONSE_CACHE_TTL_WALLET", 5)),
+    "users_me": float(os.getenv("RESPONSE_CACHE_TTL_USER", 60)),
+    "payees": float(os.getenv("RESPONSE_CACHE_TTL_PAYEES", 60)),
+}
+
+CachedResponse = namedtuple("CachedResponse", ["body", "content_type", "etag"])
+
+# Invalidasi antar worker / instance gateway lewat event bus
+INVALIDATE_TOPIC = "gateway.cache_invalidated"
+# Rute yang sudah diinvalidasi lewat event service lain (wallet.balance_changed)
+EVENT_COVERED_ROUTES = ("wallets_me",)
+
+
+def publish_invalidation(events, user_id, routes):
+    """Beritahu worker gateway lain bahwa cache `routes` milik user ini basi (best effort)."""
+    routes = [route for route in routes if route not in EVENT_COVERED_ROUTES]
+    if not routes:
+        return
+    try:
+        events.publish(INVALIDATE_TOPIC, {"user_id": user_id, "routes": routes})
+    except Exception as e:
+        print(f"[events] Gagal publish {INVALIDATE_TOPIC}: {e}")
+
+
+def make_etag(body):
+    return '"%s"' % hashlib.sha1(body).hexdigest()
+
+
+def etag_matches(if_none_match, etag):
+    """Cek header If-None-Match (bisa berisi beberapa ETag, weak W/, atau *)."""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == "*" or candidate == etag:
+            return True
+    return False
+
+
+class ResponseCache:
+    def __init__(self, ttls=None, maxsize=RESPONSE_CACHE_SIZE, enabled=RESPONSE_CACHE_ENABLED):
+        self.ttls = dict(ROUTE_TTLS if ttls is None else ttls)
+        self.enabled = enabled
+        self._cache = TTLCache(maxsize=maxsize, ttl=max(self.ttls.values(), default=0))
+
+    def cacheable(self, route):
+        return self.enabled and self.ttls.get(route, 0) > 0
+
+    def get(self, route, user_id):
+        if not self.cacheable(route):
+            return None
+        return self._cache.get((route, str(user_id)))
+
+    def set(self, route, user_id, body, content_type):
+        """Simpan body respon 200. Mengembalikan CachedResponse (dengan ETag) walau rute tidak di-cache."""
+        entry = CachedResponse(body, content_type, make_etag(body))
+        if self.cacheable(route):
+            self._cache.set((route, str(user_id)), entry, ttl=self.ttls[route])
+        return entry
+
+    def invalidate(self, user_id, *routes):
+        for route in routes or self.ttls:
+            self._cache.pop((route, str(user_id)))
+
+    def stats(self):
+        data = self._cache.stats()
+        data.update({"enabled": self.enabled, "ttls": self.ttls})
+        return data
@@ -0,0 +1,125 @@
+# common/server.py
+"""
+Entry point bersama untuk menjalankan service: gunicorn (pre-fork, beberapa
+worker, tiap worker dengan thread pool "gthread") atau dev server Werkzeug.
+
+    python service-wallet/app.py                  # WEB_SERVER=gunicorn (default)
+    WEB_SERVER=dev python service-wallet/app.py   # dev server + debug reloader
+
+Pengaturan (via .env):
+  WEB_SERVER             gunicorn | dev
+  WEB_PORT               timpa port bawaan service (cth: untuk benchmark berdampingan)
+  WEB_WORKERS            jumlah proses worker (default: jumlah CPU)
+  WEB_THREADS            thread per worker (default 8)
+  WEB_BACKLOG            antrean koneksi listen() (default 2048)
+  WEB_TIMEOUT            worker yang diam lebih lama dari ini dibunuh & diganti
+  WEB_GRACEFUL_TIMEOUT   batas waktu request berjalan diselesaikan saat reload/stop
+  WEB_KEEPALIVE          detik koneksi keep-alive ditahan
+  WEB_MAX_REQUESTS       worker didaur ulang setelah N request (0 = tidak pernah)
+  WEB_PIDFILE            file PID master, untuk reload
+
+App diimport sekali di master lalu di-fork ke setiap worker. Reload:
+  kill -HUP $(cat $WEB_PIDFILE)    worker baru dibuat, worker lama berhenti setelah
+                                   request-nya selesai (maks. WEB_GRACEFUL_TIMEOUT)
+  kill -USR2 $(cat $WEB_PIDFILE)   master baru menjalankan ulang `python app.py`
+                                   (kode baru) di socket yang sama; setelah sehat,
+                                   hentikan master lama dengan kill -TERM <pid lama>
+
+Setelah fork, setiap worker membuang koneksi yang diwarisi dari master (pool
+SQLAlchemy, pool HTTP common/http_client.py) lalu menjalankan `background()`
+milik service (outbox worker, consumer event, snapshot ledger). Thread tidak
+ikut ter-fork, jadi thread latar harus dimulai di dalam worker, bukan di master.
+
+Cache in-memory (gateway, service-transaction) dibersihkan lewat event bus di
+setiap worker. Dengan EVENT_BUS_ENABLED=0 fallback-nya satu panggilan HTTP yang
+hanya sampai ke SATU worker penerima; worker lain menyimpan data basi sampai TTL.
+Fallback HTTP hanya benar dengan WEB_WORKERS=1 (run() mencetak peringatan).
+
+gunicorn tidak jalan di Windows: jika tidak terpasang, service jatuh ke dev server.
+"""
+import multiprocessing
+import os
+
+from common.events import EVENT_BUS_ENABLED
+from common.http_client import reset_pools
+
+WEB_SERVER = os.getenv("WEB_SERVER", "gunicorn")
+WEB_WORKERS = int(os.getenv("WEB_WORKERS", multiprocessing.cpu_count()))
+WEB_THREADS = int(os.getenv("WEB_THREADS", 8))
+WEB_BACKLOG = int(os.getenv("WEB_BACKLOG", 2048))
+WEB_TIMEOUT = int(os.getenv("WEB_TIMEOUT", 30))
+WEB_GRACEFUL_TIMEOUT = int(os.getenv("WEB_GRACEFUL_TIMEOUT", 30))
+WEB_KEEPALIVE = int(os.getenv("WEB_KEEPALIVE", 5))
+WEB_MAX_REQUESTS = int(os.getenv("WEB_MAX_REQUESTS", 0))
+WEB_MAX_REQUESTS_JITTER = int(os.getenv("WEB_MAX_REQUESTS_JITTER", 0))
+WEB_PIDFILE = os.getenv("WEB_PIDFILE")
+WEB_PORT = os.getenv("WEB_PORT")
+
+
+def after_fork(app, db=None):
+    """Buang koneksi warisan master; setiap worker membuka pool-nya sendiri."""
+    if db is not None:
+        with app.app_context():
+            # close=False: socket milik master tidak ditutup dari proses anak
+            db.engine.dispose(close=False)
+    reset_pools()
+
+
+def options(name, host, port):
+    return {
+        "bind": f"{host}:{port}",
+        "workers": WEB_WORKERS,
+        "threads": WEB_THREADS,
+        "worker_class": "gthread",
+        "backlog": WEB_BACKLOG,
+        "timeout": WEB_TIMEOUT,
+        "graceful_timeout": WEB_GRACEFUL_TIMEOUT,
+        "keepalive": WEB_KEEPALIVE,
+        "max_requests": WEB_MAX_REQUESTS,
+        "max_requests_jitter": WEB_MAX_REQUESTS_JITTER,
+        "pidfile": WEB_PIDFILE,
+        "proc_name": name,
+    }
+
+
+def run(app, name, port, host="127.0.0.1", db=None, background=None):
+    """
+    Jalankan `app` sesuai WEB_SERVER.
+    `background()` dipanggil sekali di setiap proses yang melayani request.
+    """
+    port = int(WEB_PORT or port)
+    if WEB_SERVER == "gunicorn":
+        try:
+            from gunicorn.app.base import BaseApplication
+        except ImportError:
+            print(f"[{name}] gunicorn tidak terpasang, memakai dev server (WEB_SERVER=dev)")
+        else:
+            return _run_gunicorn(BaseApplication, app, name, host, port, db, background)
+
+    # Dengan debug reloader, hanya proses anak (yang melayani request) yang menjalankan thread latar
+    if background is not None and os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        background()
+    app.run(host=host, port=port, debug=True)
+
+
+def _run_gunicorn(BaseApplication, app, name, host, port, db, background):
+    def post_fork(server, worker):
+        after_fork(app, db)
+        if background is not None:
+            background()
+
+    class Application(BaseApplication):
+        def load_config(self):
+            for key, value in options(name, host, port).items():
+                if value is not None:
+                    self.cfg.set(key, value)
+            self.cfg.set("post_fork", post_fork)
+
+        def load(self):
+            return app
+
+    print(f"[{name}] gunicorn di {host}:{port}: {WEB_WORKERS} worker x {WEB_THREADS} thread")
+    if WEB_WORKERS > 1 and not EVENT_BUS_ENABLED:
+        print(f"[{name}] PERINGATAN: EVENT_BUS_ENABLED=0 dengan {WEB_WORKERS} worker: invalidasi cache "
+              f"lewat HTTP hanya sampai ke satu worker. Aktifkan event bus atau set WEB_WORKERS=1.")
+    Application().run()
@@ -0,0 +1,383 @@
+# common/tracing.py
+"""
+Distributed tracing dengan propagasi W3C trace context (header traceparent).
+
+- Request masuk (Flask / aiohttp): traceparent dibaca (atau trace baru dibuat)
+  dan span SERVER dibuka untuk seluruh request.
+- Panggilan keluar lewat common/http_client.py: span CLIENT + header
+  traceparent diteruskan, jadi service tujuan melanjutkan trace yang sama.
+- Setiap query SQLAlchemy: span CLIENT "db SELECT" dsb. di bawah span aktif.
+
+Span yang selesai dikumpulkan lalu diekspor per batch oleh thread latar dalam
+format JSON OTLP (resourceSpans/scopeSpans/spans):
+  TRACE_EXPORTER=file  -> satu baris JSON per batch di TRACE_FILE (default)
+  TRACE_EXPORTER=otlp  -> POST ke OTEL_EXPORTER_OTLP_ENDPOINT/v1/traces (OTLP/HTTP JSON)
+  TRACE_EXPORTER=none  -> hanya propagasi header, tanpa ekspor
+
+Lihat critical path satu trace dengan scripts/trace_view.py.
+"""
+import contextvars
+import json
+import os
+import queue
+import random
+import re
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+
+# =============================
+# KONFIGURASI (via .env)
+# =============================
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "1") not in ("0", "false", "False")
+TRACE_EXPORTER = os.getenv("TRACE_EXPORTER", "file")
+TRACE_FILE = os.getenv(
+    "TRACE_FILE",
+    os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "traces.jsonl")),
+)
+OTLP_ENDPOINT = os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT", "http://localhost:4318")
+# Porsi trace baru yang direkam (trace lanjutan mengikuti flag sampled dari pemanggil)
+TRACE_SAMPLE_RATIO = float(os.getenv("TRACE_SAMPLE_RATIO", 1.0))
+TRACE_BATCH_SIZE = int(os.getenv("TRACE_BATCH_SIZE", 512))
+TRACE_FLUSH_INTERVAL = float(os.getenv("TRACE_FLUSH_INTERVAL", 2.0))
+TRACE_QUEUE_SIZE = int(os.getenv("TRACE_QUEUE_SIZE", 10000))
+
+HEADER = "traceparent"
+TRACEPARENT_RE = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+# Kode SpanKind OTLP
+INTERNAL, SERVER, CLIENT = 1, 2, 3
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+_service_name = "unknown"
+
+
+class Span:
+    __slots__ = ("name", "kind", "trace_id", "span_id", "parent_id", "sampled",
+                 "start_ns", "end_ns", "attributes", "error", "_token")
+
+    def __init__(self, name, kind, trace_id, parent_id, sampled, attributes=None):
+        self.name = name
+        self.kind = kind
+        self.trace_id = trace_id
+        self.span_id = "%016x" % random.getrandbits(64)
+        self.parent_id = parent_id
+        self.sampled = sampled
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.attributes = dict(attributes or {})
+        self.error = False
+        self._token = None
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def traceparent(self):
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+    def to_otlp(self):
+        data = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [_otlp_attribute(k, v) for k, v in self.attributes.items()],
+            "status": {"code": 2 if self.error else 1},
+        }
+        if self.parent_id:
+            data["parentSpanId"] = self.parent_id
+        return data
+
+
+def _otlp_attribute(key, value):
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+# =============================
+# API SPAN
+# =============================
+def current_span():
+    return _current_span.get()
+
+
+def current_trace_id():
+    span = _current_span.get()
+    return span.trace_id if span else None
+
+
+def parse_traceparent(value):
+    match = TRACEPARENT_RE.match((value or "").strip().lower())
+    if not match or match.group(1) == "0" * 32 or match.group(2) == "0" * 16:
+        return None
+    trace_id, parent_id, flags = match.groups()
+    return trace_id, parent_id, bool(int(flags, 16) & 1)
+
+
+def begin_span(name, kind=INTERNAL, attributes=None, traceparent=None):
+    """
+    Buka span dan jadikan span aktif. Induknya: traceparent (request masuk)
+    jika ada, selain itu span aktif saat ini; tanpa keduanya trace baru dibuat.
+    Harus ditutup dengan end_span().
+    """
+    parent = _current_span.get()
+    remote = parse_traceparent(traceparent) if traceparent else None
+    if remote:
+        trace_id, parent_id, sampled = remote
+    elif parent is not None:
+        trace_id, parent_id, sampled = parent.trace_id, parent.span_id, parent.sampled
+    else:
+        trace_id, parent_id = "%032x" % random.getrandbits(128), None
+        sampled = random.random() < TRACE_SAMPLE_RATIO
+    span = Span(name, kind, trace_id, parent_id, sampled, attributes)
+    span._token = _current_span.set(span)
+    return span
+
+
+def end_span(span, error=False):
+    span.end_ns = time.time_ns()
+    span.error = span.error or error
+    if span._token is not None:
+        try:
+            _current_span.reset(span._token)
+        except ValueError:
+            # Ditutup di context lain (cth: teardown di thread berbeda); cukup kosongkan
+            _current_span.set(None)
+        span._token = None
+    if span.sampled and TRACING_ENABLED:
+        _exporter().submit(span)
+
+
+@contextmanager
+def start_span(name, kind=INTERNAL, attributes=None, traceparent=None):
+    span = begin_span(name, kind, attributes, traceparent)
+    try:
+        yield span
+    except Exception:
+        span.error = True
+        raise
+    finally:
+        end_span(span)
+
+
+def inject(headers=None):
+    """Tambahkan header traceparent span aktif ke `headers` (dict) untuk panggilan keluar."""
+    headers = {} if headers is None else headers
+    span = _current_span.get()
+    if TRACING_ENABLED and span is not None:
+        headers[HEADER] = span.traceparent()
+    return headers
+
+
+# =============================
+# EKSPOR (batch, thread latar)
+# =============================
+class SpanExporter:
+    def __init__(self, kind=TRACE_EXPORTER, path=TRACE_FILE, endpoint=OTLP_ENDPOINT):
+        self.kind = kind
+        self.path = path
+        self.endpoint = endpoint.rstrip("/") + "/v1/traces"
+        # Antrian terbatas: kalau ekspor macet, span dibuang, request tidak ikut melambat
+        self._queue = queue.Queue(maxsize=TRACE_QUEUE_SIZE)
+        self.dropped = 0
+        self.exported = 0
+        self._thread = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+
+    def submit(self, span):
+        if self.kind == "none":
+            return
+        if self._pid != os.getpid():
+            with self._start_lock:
+                if self._pid != os.getpid():
+                    # Proses hasil fork tidak mewarisi thread: jalankan thread ekspor baru
+                    self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+                    self._thread.start()
+                    self._pid = os.getpid()
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        while True:
+            batch = []
+            deadline = time.monotonic() + TRACE_FLUSH_INTERVAL
+            while len(batch) < TRACE_BATCH_SIZE:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            if batch:
+                try:
+                    self.export(batch)
+                    self.exported += len(batch)
+                except Exception as e:
+                    self.dropped += len(batch)
+                    print(f"[tracing] Gagal ekspor {len(batch)} span: {e}")
+
+    def export(self, spans):
+        document = {"resourceSpans": [{
+            "resource": {"attributes": [_otlp_attribute("service.name", _service_name)]},
+            "scopeSpans": [{"scope": {"name": "ewallet"}, "spans": [span.to_otlp() for span in spans]}],
+        }]}
+        payload = json.dumps(document, separators=(",", ":"))
+        if self.kind == "otlp":
+            req = urllib.request.Request(self.endpoint, data=payload.encode(), method="POST",
+                                         headers={"Content-Type": "application/json"})
+            urllib.request.urlopen(req, timeout=5).close()
+        else:
+            # Satu write per batch dengan mode append: aman untuk beberapa proses
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(payload + "\n")
+
+    def stats(self):
+        return {"exporter": self.kind, "queued": self._queue.qsize(),
+                "exported": self.exported, "dropped": self.dropped}
+
+
+_exporter_instance = None
+_exporter_lock = threading.Lock()
+
+
+def _exporter():
+    global _exporter_instance
+    if _exporter_instance is None:
+        with _exporter_lock:
+            if _exporter_instance is None:
+                _exporter_instance = SpanExporter()
+    return _exporter_instance
+
+
+def exporter_stats():
+    return _exporter().stats()
+
+
+# =============================
+# INTEGRASI SQLALCHEMY
+# =============================
+def instrument_sqlalchemy():
+    """Span untuk setiap query di semua engine SQLAlchemy pada proses ini."""
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+
+    if getattr(instrument_sqlalchemy, "installed", False):
+        return
+    instrument_sqlalchemy.installed = True
+
+    @event.listens_for(Engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if _current_span.get() is None:
+            return  # query di luar request / span (cth: create_all) tidak direkam
+        operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "OTHER"
+        span = begin_span(f"db {operation}", CLIENT, {"db.system": "mysql", "db.statement": statement[:500]})
+        conn.info.setdefault("trace_spans", []).append(span)
+
+    @event.listens_for(Engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        spans = conn.info.get("trace_spans")
+        if spans:
+            end_span(spans.pop())
+
+    @event.listens_for(Engine, "handle_error")
+    def _error(context):
+        spans = context.connection.info.get("trace_spans") if context.connection is not None else None
+        if spans:
+            end_span(spans.pop(), error=True)
+
+
+# =============================
+# INTEGRASI FLASK
+# =============================
+def instrument_flask(app, service_name):
+    """Span SERVER per request (melanjutkan traceparent pemanggil) + span query SQLAlchemy."""
+    global _service_name
+    _service_name = service_name
+    if not TRACING_ENABLED:
+        return
+
+    from flask import g, request
+
+    @app.before_request
+    def _trace_start():
+        route = request.url_rule.rule if request.url_rule else "unmatched"
+        g._trace_span = begin_span(f"{request.method} {route}", SERVER, {
+            "service.name": service_name,
+            "http.method": request.method,
+            "http.route": route,
+            "http.target": request.full_path.rstrip("?"),
+        }, traceparent=request.headers.get(HEADER))
+
+    @app.after_request
+    def _trace_status(response):
+        span = g.get("_trace_span")
+        if span is not None:
+            span.set_attribute("http.status_code", response.status_code)
+            span.error = response.status_code >= 500
+            # Untuk korelasi log klien / gateway dengan trace
+            response.headers["X-Trace-Id"] = span.trace_id
+        return response
+
+    @app.teardown_request
+    def _trace_end(exc):
+        span = g.pop("_trace_span", None)
+        if span is not None:
+            end_span(span, error=exc is not None)
+
+    try:
+        instrument_sqlalchemy()
+    except ImportError:
+        pass  # gateway tidak memakai SQLAlchemy
+
+
+# =============================
+# INTEGRASI AIOHTTP (gateway async)
+# =============================
+def aiohttp_middleware(service_name):
+    global _service_name
+    _service_name = service_name
+    from aiohttp import web
+
+    @web.middleware
+    async def middleware(request, handler):
+        if not TRACING_ENABLED:
+            return await handler(request)
+        resource = request.match_info.route.resource
+        route = resource.canonical if resource is not None else "unmatched"
+        span = begin_span(f"{request.method} {route}", SERVER, {
+            "service.name": service_name,
+            "http.method": request.method,
+            "http.route": route,
+            "http.target": request.path_qs,
+        }, traceparent=request.headers.get(HEADER))
+        error = False
+        try:
+            response = await handler(request)
+            span.set_attribute("http.status_code", response.status)
+            error = response.status >= 500
+            if not response.prepared:
+                response.headers["X-Trace-Id"] = span.trace_id
+            return response
+        except web.HTTPException as e:
+            span.set_attribute("http.status_code", e.status)
+            error = e.status >= 500
+            raise
+        except Exception:
+            error = True
+            raise
+        finally:
+            end_span(span, error=error)
+
+    return middleware
@@ -0,0 +1,53 @@
+# common/wallet_cache.py
+"""
+Cache mapping user_id -> dompet aktif (id, user_id, status) di depan
+GET /internal/wallets/by-user/<user_id>.
+
+Saldo TIDAK ikut di-cache (selalu berubah); hanya identitas dompet yang
+hampir tidak pernah berubah. Entry dihapus oleh service-wallet lewat
+DELETE /internal/cache/wallets/<user_id> saat dompet ditutup.
+"""
+import os
+
+from common.ttl_cache import TTLCache
+
+WALLET_CACHE_TTL = float(os.getenv("WALLET_CACHE_TTL", 300))
+WALLET_CACHE_SIZE = int(os.getenv("WALLET_CACHE_SIZE", 10000))
+
+CACHED_FIELDS = ("id", "user_id", "status")
+
+
+class WalletLookupCache:
+    def __init__(self, client, maxsize=WALLET_CACHE_SIZE, ttl=WALLET_CACHE_TTL):
+        self.client = client
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def get(self, user_id, timeout=None):
+        """
+        Dompet aktif milik user. Saat cache miss, memanggil service-wallet;
+        error HTTP diteruskan sebagai requests.exceptions.HTTPError seperti biasa.
+        """
+        wallet = self.cached(user_id)
+        if wallet is not None:
+            return wallet
+
+        res = self.client.get(f"internal/wallets/by-user/{user_id}", timeout=timeout)
+        res.raise_for_status()
+        return self.remember(user_id, res.json())
+
+    # Dipakai langsung oleh gateway aiohttp (client=None), yang memanggil service-wallet sendiri
+    def cached(self, user_id):
+        return self._cache.get(int(user_id))
+
+    def remember(self, user_id, data):
+        """Simpan identitas dompet dari respon by-user; mengembalikan dict-nya."""
+        wallet = {field: data.get(field) for field in CACHED_FIELDS}
+        if wallet["id"]:
+            self._cache.set(int(user_id), wallet)
+        return wallet
+
+    def invalidate(self, user_id):
+        self._cache.pop(int(user_id))
+
+    def stats(self):
+        return self._cache.stats()
@@ -45,6 +45,15 @@ export async function getProfile(token) {
     return apiRequest(`${GATEWAY_URL}/api/users/me`, "GET", null, token);
 }
 
+// =================================================================
+// ===== DASHBOARD (via Gateway, satu request untuk semua bagian) =====
+// =================================================================
+export async function getDashboard(token) {
+    // Memanggil: GET /api/dashboard -> { profile, wallet, transactions, payees, errors }
+    // Bagian yang gagal bernilai null dan pesannya ada di errors[nama_bagian]
+    return apiRequest(`${GATEWAY_URL}/api/dashboard`, "GET", null, token);
+}
+
 // =================================================================
 // ===== WALLET & TRANSACTION SERVICE (via Gateway) =====
 // =================================================================
@@ -0,0 +1,68 @@
+# scripts/bench_batch_transfer.py
+"""
+Bandingkan throughput transfer satu-per-satu (POST /api/transactions) dengan
+transfer massal (POST /api/transactions/batch) lewat API Gateway.
+
+Pengirim harus punya saldo cukup untuk 2 x (jumlah penerima x amount).
+
+    python scripts/bench_batch_transfer.py --token <JWT> \\
+        --phones-file penerima.txt --amount 1000 --concurrency 16
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--gateway-url", default="http://localhost:3000")
+    parser.add_argument("--token", required=True, help="JWT pengirim")
+    parser.add_argument("--phones-file", required=True, help="satu nomor HP penerima per baris")
+    parser.add_argument("--amount", type=float, default=1000)
+    parser.add_argument("--concurrency", type=int, default=16, help="klien paralel untuk mode satu-per-satu")
+    parser.add_argument("--batch-size", type=int, default=1000, help="item per request batch")
+    args = parser.parse_args()
+
+    with open(args.phones_file) as f:
+        phones = [line.strip() for line in f if line.strip()]
+
+    base = args.gateway_url.rstrip("/")
+    session = requests.Session()
+    session.mount("http://", HTTPAdapter(pool_maxsize=args.concurrency))
+    session.headers["Authorization"] = f"Bearer {args.token}"
+
+    # --- Mode 1: satu request per penerima ---
+    def single(phone):
+        res = session.post(f"{base}/api/transactions", json={"receiver_phone": phone, "amount": args.amount})
+        return res.status_code == 201
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        single_ok = sum(pool.map(single, phones))
+    single_elapsed = time.perf_counter() - start
+
+    # --- Mode 2: transfer massal ---
+    start = time.perf_counter()
+    batch_ok = 0
+    for offset in range(0, len(phones), args.batch_size):
+        chunk = phones[offset:offset + args.batch_size]
+        res = session.post(f"{base}/api/transactions/batch",
+                           json={"items": [{"receiver_phone": p, "amount": args.amount} for p in chunk]})
+        if res.status_code in (201, 400):
+            batch_ok += res.json().get("succeeded", 0)
+    batch_elapsed = time.perf_counter() - start
+
+    print(f"penerima            : {len(phones)}")
+    print(f"satu-per-satu       : {single_ok} sukses dalam {single_elapsed:.2f}s "
+          f"-> {single_ok / single_elapsed:.1f} transfer/s (concurrency {args.concurrency})")
+    print(f"batch ({args.batch_size}/request) : {batch_ok} sukses dalam {batch_elapsed:.2f}s "
+          f"-> {batch_ok / batch_elapsed:.1f} transfer/s")
+    if single_elapsed and batch_elapsed:
+        print(f"speed-up            : {(batch_ok / batch_elapsed) / max(single_ok / single_elapsed, 1e-9):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
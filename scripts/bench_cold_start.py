@@ -0,0 +1,73 @@
+# scripts/bench_cold_start.py
+"""
+Ukur waktu cold start per worker: berapa lama interpreter baru butuh untuk
+mengimport app.py sebuah service (yang dilakukan setiap worker gunicorn / setiap
+proses baru saat scaling), diulang beberapa kali di proses terpisah.
+
+--create-all menambahkan `db.create_all()` setelah import, yaitu pekerjaan
+skema yang dulu dijalankan saat import (sebelum migrations.py), supaya
+sebelum & sesudah bisa dibandingkan di database yang sama.
+
+    python scripts/bench_cold_start.py service-wallet service-transaction --runs 10
+    python scripts/bench_cold_start.py service-wallet --create-all
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# Dijalankan di interpreter baru dengan cwd = folder service
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+schema_ms = None
+if sys.argv[1] == "1":
+    with app.app.app_context():
+        app.db.create_all()
+    schema_ms = (time.perf_counter() - imported) * 1000
+print(json.dumps({"import_ms": (imported - start) * 1000, "schema_ms": schema_ms}))
+"""
+
+
+def measure(service_dir, create_all):
+    out = subprocess.run([sys.executable, "-c", PROBE, "1" if create_all else "0"], cwd=service_dir,
+                         capture_output=True, text=True, check=True).stdout
+    # Baris terakhir = hasil; baris sebelumnya bisa berisi log dari app
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def summary(values):
+    values = sorted(values)
+    return (f"median={statistics.median(values):7.1f} ms  min={values[0]:7.1f} ms  "
+            f"max={values[-1]:7.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("services", nargs="+", help="folder service (cth: service-wallet)")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--create-all", action="store_true", help="ikut ukur db.create_all() (perilaku lama)")
+    args = parser.parse_args()
+
+    for service in args.services:
+        service_dir = service if os.path.isdir(service) else os.path.join(ROOT, service)
+        try:
+            results = [measure(service_dir, args.create_all) for _ in range(args.runs)]
+        except subprocess.CalledProcessError as e:
+            print(f"[{service}] gagal:\n{e.stderr}")
+            continue
+        print(f"[{service}] {args.runs} proses")
+        print(f"  import app   : {summary([r['import_ms'] for r in results])}")
+        if args.create_all:
+            print(f"  create_all   : {summary([r['schema_ms'] for r in results])}")
+            print(f"  total        : {summary([r['import_ms'] + r['schema_ms'] for r in results])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# scripts/bench_gateway.py
+"""
+Load benchmark untuk membandingkan gateway sync (Flask, app.py) dan gateway
+asyncio (aiohttp, async_app.py) pada rute dan upstream yang sama.
+
+Contoh (jalankan kedua gateway dan semua service terlebih dulu):
+
+    python scripts/bench_gateway.py \\
+        --target sync=http://localhost:3000 \\
+        --target async=http://localhost:3100 \\
+        --path /api/wallets/me --token <JWT> --concurrency 500 --duration 20
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import aiohttp
+
+
+async def run_target(name, base_url, args, extra_headers=None):
+    url = f"{base_url.rstrip('/')}{args.path}"
+    headers = {"Authorization": f"Bearer {args.token}"} if args.token else {}
+    headers.update(extra_headers or {})
+    latencies = []
+    status_counts = {}
+    errors = 0
+    deadline = time.perf_counter() + args.duration
+
+    connector = aiohttp.TCPConnector(limit=0)
+    timeout = aiohttp.ClientTimeout(total=args.timeout)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+
+        async def client():
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                try:
+                    async with session.request(args.method, url, headers=headers) as res:
+                        await res.read()
+                        status_counts[res.status] = status_counts.get(res.status, 0) + 1
+                    latencies.append((time.perf_counter() - start) * 1000)
+                except (aiohttp.ClientError, asyncio.TimeoutError):
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(client() for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return name, elapsed, latencies, status_counts, errors
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[index]
+
+
+def report(name, elapsed, latencies, status_counts, errors):
+    done = len(latencies)
+    print(f"[{name}]")
+    print(f"  requests   : {done} dalam {elapsed:.1f}s  ->  {done / elapsed:.1f} req/s")
+    if latencies:
+        print(f"  latency ms : p50={percentile(latencies, 50):.1f} p95={percentile(latencies, 95):.1f} "
+              f"p99={percentile(latencies, 99):.1f} mean={statistics.mean(latencies):.1f}")
+    print(f"  status     : {dict(sorted(status_counts.items()))}  errors={errors}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", action="append", required=True,
+                        help="nama=url gateway, boleh diulang (cth: sync=http://localhost:3000)")
+    parser.add_argument("--path", default="/api/wallets/me")
+    parser.add_argument("--method", default="GET")
+    parser.add_argument("--token", default=None, help="JWT untuk header Authorization")
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--duration", type=float, default=10.0, help="detik per target")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    args = parser.parse_args()
+
+    for target in args.target:
+        name, _, base_url = target.partition("=")
+        report(*asyncio.run(run_target(name, base_url, args)))
+
+
+if __name__ == "__main__":
+    main()
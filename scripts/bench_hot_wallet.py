@@ -0,0 +1,80 @@
+# scripts/bench_hot_wallet.py
+"""
+Benchmark kredit ke SATU dompet panas (merchant) lewat
+PUT /internal/wallets/<id>/balance, tanpa dan dengan sub-saldo (shard).
+
+Untuk setiap jumlah shard di --shards, script mengatur sharding dompet,
+mengirim kredit paralel selama --duration detik, lalu menggabungkan shard
+dan mengecek saldo akhir == saldo awal + (kredit sukses * amount).
+
+    python scripts/bench_hot_wallet.py --wallet-id 1 --shards 0 8 32 --concurrency 64
+"""
+import argparse
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+def run(session, base, wallet_id, shards, args):
+    res = session.put(f"{base}/internal/wallets/{wallet_id}/shards", json={"count": shards})
+    res.raise_for_status()
+    start_balance = Decimal(res.json()["balance"])  # shard sudah digabung saat diatur ulang
+    session.delete(f"{base}/internal/wallets/balance-stats")
+
+    deadline = time.perf_counter() + args.duration
+
+    def client():
+        ok = failed = 0
+        while time.perf_counter() < deadline:
+            r = session.put(f"{base}/internal/wallets/{wallet_id}/balance",
+                            json={"type": "credit", "amount": str(args.amount)})
+            if r.status_code == 200:
+                ok += 1
+            else:
+                failed += 1
+        return ok, failed
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(lambda _: client(), range(args.concurrency)))
+    elapsed = time.perf_counter() - started
+    ok = sum(r[0] for r in results)
+    failed = sum(r[1] for r in results)
+
+    collapsed = session.post(f"{base}/internal/wallets/{wallet_id}/shards/collapse").json()
+    final_balance = Decimal(collapsed["balance"])
+    expected = start_balance + ok * args.amount
+    stats = session.get(f"{base}/internal/wallets/balance-stats").json()
+
+    print(f"shards {shards:>3}: {ok / elapsed:8.1f} kredit/s  (sukses {ok}, gagal {failed}, "
+          f"lock wait maks {stats.get('lock_wait_ms_max')} ms)  "
+          f"saldo {final_balance} {'OK' if final_balance == expected else f'!= {expected}'}")
+    return final_balance == expected
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--wallet-url", default="http://localhost:3002")
+    parser.add_argument("--wallet-id", type=int, required=True, help="dompet panas yang diuji")
+    parser.add_argument("--shards", type=int, nargs="+", default=[0, 8, 32])
+    parser.add_argument("--amount", type=Decimal, default=Decimal("1"))
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=10)
+    args = parser.parse_args()
+
+    base = args.wallet_url.rstrip("/")
+    session = requests.Session()
+    session.mount("http://", HTTPAdapter(pool_maxsize=args.concurrency))
+
+    consistent = all([run(session, base, args.wallet_id, shards, args) for shards in args.shards])
+    # Kembalikan dompet ke mode normal
+    session.put(f"{base}/internal/wallets/{args.wallet_id}/shards", json={"count": 0})
+    sys.exit(0 if consistent else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+# scripts/bench_jwt.py
+"""
+Microbenchmark verifikasi JWT di gateway: decode penuh (tanda tangan + klaim)
+dibandingkan verify_jwt_token yang memakai cache klaim.
+
+    python scripts/bench_jwt.py --iterations 20000
+    python scripts/bench_jwt.py --algorithm RS256     # butuh paket 'cryptography'
+
+Tidak butuh service lain yang berjalan; jwt_utils di-import langsung.
+"""
+import argparse
+import datetime
+import json
+import os
+import sys
+import tempfile
+import time
+
+import jwt
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def setup_keys(algorithm):
+    """Siapkan env untuk jwt_utils, kembalikan (signing_key, headers)."""
+    if algorithm.startswith("HS"):
+        os.environ["JWT_SECRET_KEY"] = os.environ.get("JWT_SECRET_KEY") or "bench-secret"
+        os.environ["JWT_ALGORITHMS"] = algorithm
+        return os.environ["JWT_SECRET_KEY"], None
+
+    from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
+
+    if algorithm == "EdDSA":
+        private_key = ed25519.Ed25519PrivateKey.generate()
+        jwk = json.loads(jwt.algorithms.OKPAlgorithm.to_jwk(private_key.public_key()))
+    else:
+        private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        jwk = json.loads(jwt.algorithms.RSAAlgorithm.to_jwk(private_key.public_key()))
+    jwk.update({"kid": "bench", "alg": algorithm})
+
+    jwks_file = tempfile.NamedTemporaryFile("w", suffix=".json", delete=False)
+    json.dump({"keys": [jwk]}, jwks_file)
+    jwks_file.close()
+    os.environ["JWT_JWKS_PATH"] = jwks_file.name
+    os.environ["JWT_ALGORITHMS"] = algorithm
+    return private_key, {"kid": "bench"}
+
+
+def per_call_us(fn, token, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn(token)
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--algorithm", default="HS256", choices=["HS256", "RS256", "EdDSA"])
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    signing_key, headers = setup_keys(args.algorithm)
+    sys.path.append(os.path.join(ROOT, "service-gateway"))
+    sys.path.append(ROOT)
+    import jwt_utils
+
+    token = jwt.encode(
+        {"user_id": 1, "exp": datetime.datetime.utcnow() + datetime.timedelta(hours=1)},
+        signing_key, algorithm=args.algorithm, headers=headers,
+    )
+    bearer = f"Bearer {token}"
+
+    uncached = per_call_us(jwt_utils.decode_jwt_token, token, args.iterations)
+    jwt_utils.verify_jwt_token(bearer)  # isi cache
+    cached = per_call_us(jwt_utils.verify_jwt_token, bearer, args.iterations)
+
+    print(f"algoritma        : {args.algorithm}")
+    print(f"iterasi          : {args.iterations}")
+    print(f"decode (no cache): {uncached:8.2f} us/panggilan")
+    print(f"verify (cache)   : {cached:8.2f} us/panggilan")
+    print(f"speed-up         : {uncached / cached:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
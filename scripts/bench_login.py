@@ -0,0 +1,113 @@
+# scripts/bench_login.py
+"""
+Benchmark login service-user: login/detik selama badai login, sambil mengukur
+latensi GET /users/internal/by-phone/<phone> (request non-login) secara paralel.
+
+Jalankan ulang service-user dengan BCRYPT_LOG_ROUNDS berbeda untuk
+membandingkan cost, dan PASSWORD_HASH_WORKERS=0 untuk mode lama (inline):
+
+    python scripts/bench_login.py --phone 0812xxxx --password rahasia \\
+        --concurrency 32 --duration 15
+
+Tanpa --phone, hanya mengukur biaya bcrypt lokal per cost (hash/detik per core):
+
+    python scripts/bench_login.py --rounds 10 11 12 13
+"""
+import argparse
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import bcrypt
+import requests
+from requests.adapters import HTTPAdapter
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def bench_local(rounds_list, samples):
+    print("cost  ms/hash   hash/detik/core")
+    for rounds in rounds_list:
+        salt = bcrypt.gensalt(rounds)
+        start = time.perf_counter()
+        for _ in range(samples):
+            bcrypt.hashpw(b"bench-password", salt)
+        per_hash = (time.perf_counter() - start) / samples
+        print(f"{rounds:>4}  {per_hash * 1000:7.1f}   {1 / per_hash:8.1f}")
+
+
+def bench_service(args):
+    base = args.user_url.rstrip("/")
+    session = requests.Session()
+    session.mount("http://", HTTPAdapter(pool_maxsize=args.concurrency + 1))
+    deadline = time.perf_counter() + args.duration
+    login_latencies, probe_latencies = [], []
+    status_counts = {}
+    lock = threading.Lock()
+
+    def login_client():
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            res = session.post(f"{base}/users/login", json={"phone": args.phone, "password": args.password})
+            with lock:
+                status_counts[res.status_code] = status_counts.get(res.status_code, 0) + 1
+                if res.status_code == 200:
+                    login_latencies.append((time.perf_counter() - start) * 1000)
+
+    def probe_client():
+        # Request ringan yang seharusnya tidak ikut melambat saat login memuncak
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            session.get(f"{base}/users/internal/by-phone/{args.phone}")
+            probe_latencies.append((time.perf_counter() - start) * 1000)
+            time.sleep(0.05)
+
+    with ThreadPoolExecutor(max_workers=args.concurrency + 1) as pool:
+        pool.submit(probe_client)
+        for _ in range(args.concurrency):
+            pool.submit(login_client)
+
+    ok = status_counts.get(200, 0)
+    print(f"durasi            : {args.duration}s, concurrency {args.concurrency}")
+    print(f"status            : {dict(sorted(status_counts.items()))}")
+    print(f"login sukses/detik: {ok / args.duration:.1f}")
+    if login_latencies:
+        print(f"latensi login ms  : p50 {statistics.median(login_latencies):.1f}  "
+              f"p95 {percentile(login_latencies, 95):.1f}  p99 {percentile(login_latencies, 99):.1f}")
+    if probe_latencies:
+        print(f"latensi lookup ms : p50 {statistics.median(probe_latencies):.1f}  "
+              f"p95 {percentile(probe_latencies, 95):.1f}  p99 {percentile(probe_latencies, 99):.1f}")
+
+    try:
+        print(f"hasher            : {session.get(f'{base}/users/internal/hasher-stats').json()}")
+    except (requests.exceptions.RequestException, ValueError):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--user-url", default="http://localhost:3001")
+    parser.add_argument("--phone", help="nomor HP user uji (mode service)")
+    parser.add_argument("--password", help="password user uji (mode service)")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=15)
+    parser.add_argument("--rounds", type=int, nargs="+", default=[10, 11, 12, 13], help="cost untuk mode lokal")
+    parser.add_argument("--samples", type=int, default=5, help="hash per cost untuk mode lokal")
+    args = parser.parse_args()
+
+    if args.phone:
+        if not args.password:
+            parser.error("--password wajib diisi bersama --phone")
+        bench_service(args)
+    else:
+        bench_local(args.rounds, args.samples)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# scripts/bench_passthrough.py
+"""
+Ukur biaya CPU gateway per MB yang diproksikan, untuk membandingkan mode
+passthrough (GATEWAY_PASSTHROUGH=1, bytes upstream diteruskan apa adanya)
+dengan mode lama (GATEWAY_PASSTHROUGH=0, res.json() -> jsonify()).
+
+CPU diambil dari /proc/<pid>/stat (utime + stime) proses gateway sebelum dan
+sesudah beban, jadi hanya jalan di Linux dan harus di host yang sama.
+
+Contoh (dua gateway di port berbeda, service lain sudah jalan):
+
+    GATEWAY_PASSTHROUGH=1 PORT=3000 python service-gateway/app.py &
+    GATEWAY_PASSTHROUGH=0 PORT=3010 python service-gateway/app.py &
+    python scripts/bench_passthrough.py \\
+        --target passthrough http://localhost:3000 <PID1> \\
+        --target jsonify http://localhost:3010 <PID2> \\
+        --path "/api/transactions/?limit=100" --token <JWT> --duration 20
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+
+
+def cpu_seconds(pid):
+    with open(f"/proc/{pid}/stat") as f:
+        # Field ke-2 (comm) bisa berisi spasi: potong setelah ')' terakhir
+        fields = f.read().rsplit(")", 1)[1].split()
+    utime, stime = int(fields[11]), int(fields[12])
+    return (utime + stime) / CLOCK_TICKS
+
+
+def run_target(name, base_url, pid, args):
+    url = f"{base_url.rstrip('/')}{args.path}"
+    headers = {"Authorization": f"Bearer {args.token}"} if args.token else {}
+    deadline = time.perf_counter() + args.duration
+
+    def client(_):
+        session = requests.Session()
+        received = requests_done = errors = 0
+        while time.perf_counter() < deadline:
+            try:
+                res = session.get(url, headers=headers, timeout=args.timeout)
+                received += len(res.content)
+                requests_done += 1
+                if res.status_code >= 400:
+                    errors += 1
+            except requests.exceptions.RequestException:
+                errors += 1
+        return received, requests_done, errors
+
+    cpu_before = cpu_seconds(pid)
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(client, range(args.concurrency)))
+    elapsed = time.perf_counter() - started
+    cpu_used = cpu_seconds(pid) - cpu_before
+
+    received = sum(r[0] for r in results)
+    done = sum(r[1] for r in results)
+    errors = sum(r[2] for r in results)
+    mb = received / (1024 * 1024)
+    print(f"== {name} ({base_url}, pid {pid})")
+    print(f"   request      : {done} ({done / elapsed:.1f} req/s), error/4xx-5xx: {errors}")
+    print(f"   diterima     : {mb:.2f} MB ({mb / elapsed:.2f} MB/s)")
+    print(f"   CPU gateway  : {cpu_used:.2f} s ({cpu_used / elapsed * 100:.0f}% satu core)")
+    if mb:
+        print(f"   CPU per MB   : {cpu_used * 1000 / mb:.1f} ms")
+    if done:
+        print(f"   CPU per req  : {cpu_used * 1000 / done:.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", nargs=3, action="append", required=True, metavar=("NAMA", "URL", "PID"))
+    parser.add_argument("--path", default="/api/transactions/?limit=100")
+    parser.add_argument("--token", help="JWT untuk header Authorization")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=15)
+    parser.add_argument("--timeout", type=float, default=30)
+    args = parser.parse_args()
+
+    for name, url, pid in args.target:
+        run_target(name, url, int(pid), args)
+
+
+if __name__ == "__main__":
+    main()
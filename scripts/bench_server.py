@@ -0,0 +1,94 @@
+# scripts/bench_server.py
+"""
+Bandingkan requests per second satu service saat dijalankan dengan dev server
+Werkzeug (WEB_SERVER=dev) dan dengan gunicorn (WEB_SERVER=gunicorn, lihat
+common/server.py). Script ini menjalankan service-nya sendiri untuk setiap mode
+di port WEB_PORT, menunggu sampai siap, memberi beban (bench_gateway.run_target),
+lalu menghentikannya.
+
+    python scripts/bench_server.py service-gateway/app.py --path /health
+    python scripts/bench_server.py service-wallet/app.py --path /wallets/me \\
+        --header "X-User-Id: 1" --workers 4 --threads 8 --concurrency 200
+
+Database & service lain yang dipanggil rute tersebut harus sudah berjalan.
+"""
+import argparse
+import asyncio
+import os
+import signal
+import subprocess
+import sys
+import time
+
+import requests
+
+from bench_gateway import report, run_target
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def start_service(app_path, mode, args):
+    env = dict(os.environ, WEB_SERVER=mode, WEB_PORT=str(args.port),
+               WEB_WORKERS=str(args.workers), WEB_THREADS=str(args.threads))
+    # Sesi baru: dev server punya proses reloader, keduanya dihentikan lewat process group
+    return subprocess.Popen([sys.executable, os.path.basename(app_path)], cwd=os.path.dirname(app_path),
+                            env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                            start_new_session=True)
+
+
+def wait_ready(url, headers, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            requests.get(url, headers=headers, timeout=1)
+            return True
+        except requests.exceptions.RequestException:
+            time.sleep(0.2)
+    return False
+
+
+def stop_service(process):
+    os.killpg(process.pid, signal.SIGTERM)
+    try:
+        process.wait(timeout=15)
+    except subprocess.TimeoutExpired:
+        os.killpg(process.pid, signal.SIGKILL)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("app", help="path app.py service (cth: service-wallet/app.py)")
+    parser.add_argument("--mode", action="append", choices=("dev", "gunicorn"),
+                        help="mode yang diuji, boleh diulang (default: dev lalu gunicorn)")
+    parser.add_argument("--port", type=int, default=3900)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--path", default="/health")
+    parser.add_argument("--method", default="GET")
+    parser.add_argument("--header", action="append", default=[], help="'Nama: nilai', boleh diulang")
+    parser.add_argument("--token", default=None, help="JWT untuk header Authorization")
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--duration", type=float, default=10.0, help="detik per mode")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    args = parser.parse_args()
+
+    app_path = os.path.abspath(args.app if os.path.exists(args.app) else os.path.join(ROOT, args.app))
+    headers = {k.strip(): v.strip() for k, v in (h.split(":", 1) for h in args.header)}
+    base_url = f"http://127.0.0.1:{args.port}"
+
+    for mode in args.mode or ["dev", "gunicorn"]:
+        process = start_service(app_path, mode, args)
+        try:
+            if not wait_ready(base_url + args.path, headers):
+                print(f"[{mode}] service tidak siap di {base_url}")
+                continue
+            name = mode if mode == "dev" else f"gunicorn {args.workers}x{args.threads}"
+            name, elapsed, latencies, status_counts, errors = asyncio.run(
+                run_target(name, base_url, args, headers))
+            report(name, elapsed, latencies, status_counts, errors)
+        finally:
+            stop_service(process)
+
+
+if __name__ == "__main__":
+    main()
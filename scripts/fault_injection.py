@@ -0,0 +1,225 @@
+# scripts/fault_injection.py
+"""
+Uji fault-injection untuk common/resilience.py memakai upstream tiruan lokal
+(http.server di thread) yang bisa dibuat error, lambat, atau mati.
+
+Setiap skenario memakai ServiceClient + UpstreamGuard yang sama dengan
+gateway, lalu memeriksa perilakunya:
+
+  breaker      5xx beruntun membuka breaker; request berikutnya ditolak cepat
+               tanpa menyentuh upstream, lalu pulih lewat half-open
+  down         upstream mati (connection refused) juga membuka breaker
+  retry        GET di-retry dengan jitter tetapi dibatasi retry budget;
+               POST tidak pernah di-retry
+  bulkhead     upstream lambat: request di atas batas konkurensi langsung 503
+
+    python scripts/fault_injection.py            # semua skenario
+    python scripts/fault_injection.py breaker bulkhead
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from common.http_client import ServiceClient
+from common.resilience import (Bulkhead, CircuitBreaker, RetryBudget, UpstreamGuard,
+                               UpstreamUnavailable, CLOSED, OPEN)
+
+
+# =============================
+# UPSTREAM TIRUAN
+# =============================
+class StubUpstream:
+    """Server HTTP lokal; `mode` bisa diganti saat berjalan: ok, error, slow, flaky."""
+
+    def __init__(self, mode="ok", delay=1.0):
+        self.mode = mode
+        self.delay = delay
+        self.hits = 0
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _reply(self):
+                with stub._lock:
+                    stub.hits += 1
+                    hit = stub.hits
+                length = int(self.headers.get("Content-Length") or 0)
+                if length:
+                    self.rfile.read(length)
+                if stub.mode == "slow":
+                    time.sleep(stub.delay)
+                failing = stub.mode == "error" or (stub.mode == "flaky" and hit % 2)
+                body = b'{"error": "stub"}' if failing else b'{"ok": true}'
+                self.send_response(500 if failing else 200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            do_GET = do_POST = _reply
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def make_client(url, **guard_options):
+    guard = UpstreamGuard(
+        "stub",
+        breaker=CircuitBreaker(failure_threshold=guard_options.get("threshold", 3),
+                               reset_timeout=guard_options.get("reset_timeout", 0.5)),
+        budget=RetryBudget(ratio=guard_options.get("ratio", 0.2), min_per_sec=0, window=10),
+        bulkhead=Bulkhead(limit=guard_options.get("limit", 50)),
+        backoff_base=0.01,
+    )
+    return ServiceClient("stub", url, read_timeout=guard_options.get("read_timeout", 5), guard=guard)
+
+
+def check(condition, message):
+    print(f"  [{'OK' if condition else 'GAGAL'}] {message}")
+    return condition
+
+
+# =============================
+# SKENARIO
+# =============================
+def scenario_breaker():
+    stub = StubUpstream(mode="error")
+    client = make_client(stub.url, threshold=3, reset_timeout=0.5)
+    results = []
+    try:
+        for _ in range(3):
+            client.post("x")  # POST: tanpa retry, tiap panggilan = satu kegagalan
+        results.append(check(client.guard.breaker.state == OPEN, "breaker terbuka setelah 3 x 500"))
+
+        hits = stub.hits
+        start = time.perf_counter()
+        try:
+            client.get("x")
+            rejected = False
+        except UpstreamUnavailable as e:
+            rejected = e.reason == "circuit_open"
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        results.append(check(rejected and stub.hits == hits,
+                             f"request ditolak tanpa menyentuh upstream ({elapsed_ms:.2f} ms)"))
+
+        stub.mode = "ok"
+        time.sleep(0.6)
+        res = client.get("x")
+        results.append(check(res.status_code == 200 and client.guard.breaker.state == CLOSED,
+                             "pulih lewat half-open setelah reset_timeout"))
+    finally:
+        stub.stop()
+    return all(results)
+
+
+def scenario_down():
+    stub = StubUpstream()
+    url = stub.url
+    stub.stop()
+    client = make_client(url, threshold=3, reset_timeout=5)
+    for _ in range(3):
+        try:
+            client.post("x")
+        except UpstreamUnavailable:
+            break
+        except requests.exceptions.ConnectionError:
+            pass
+    start = time.perf_counter()
+    try:
+        client.get("x")
+        rejected = False
+    except UpstreamUnavailable:
+        rejected = True
+    except requests.exceptions.ConnectionError:
+        rejected = False
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    return check(client.guard.breaker.state == OPEN and rejected,
+                 f"upstream mati membuka breaker; penolakan berikutnya {elapsed_ms:.2f} ms")
+
+
+def scenario_retry():
+    stub = StubUpstream(mode="flaky")
+    client = make_client(stub.url, threshold=1000, ratio=0.2)
+    results = []
+    try:
+        calls = 100
+        ok = sum(1 for _ in range(calls) if client.get("x").status_code == 200)
+        retries = stub.hits - calls
+        results.append(check(0 < retries <= 0.2 * calls + 1,
+                             f"GET: {retries} retry untuk {calls} request (budget 20%), {ok} sukses"))
+
+        hits = stub.hits
+        for _ in range(10):
+            client.post("x")
+        results.append(check(stub.hits - hits == 10, "POST tidak pernah di-retry"))
+    finally:
+        stub.stop()
+    return all(results)
+
+
+def scenario_bulkhead():
+    stub = StubUpstream(mode="slow", delay=1.0)
+    client = make_client(stub.url, limit=5, threshold=1000)
+
+    def call(_):
+        start = time.perf_counter()
+        try:
+            client.get("x")
+            return "ok", time.perf_counter() - start
+        except UpstreamUnavailable as e:
+            return e.reason, time.perf_counter() - start
+
+    try:
+        with ThreadPoolExecutor(max_workers=20) as pool:
+            outcomes = list(pool.map(call, range(20)))
+    finally:
+        stub.stop()
+    rejected = [elapsed for reason, elapsed in outcomes if reason == "concurrency_limit"]
+    served = [elapsed for reason, elapsed in outcomes if reason == "ok"]
+    return check(len(served) == 5 and len(rejected) == 15 and max(rejected) < 0.1,
+                 f"{len(served)} dilayani, {len(rejected)} ditolak "
+                 f"(penolakan terlama {max(rejected, default=0) * 1000:.1f} ms)")
+
+
+SCENARIOS = {
+    "breaker": scenario_breaker,
+    "down": scenario_down,
+    "retry": scenario_retry,
+    "bulkhead": scenario_bulkhead,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("scenarios", nargs="*", metavar="SKENARIO", help=", ".join(SCENARIOS))
+    args = parser.parse_args()
+    unknown = [name for name in args.scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"skenario tidak dikenal: {', '.join(unknown)}")
+
+    passed = True
+    for name in args.scenarios or SCENARIOS:
+        print(f"{name}:")
+        passed = SCENARIOS[name]() and passed
+    sys.exit(0 if passed else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+# scripts/reconcile_ledger.py
+"""
+Rekonsiliasi ledger saldo service-wallet:
+
+  1. Wallet.balance vs saldo ledger (snapshot + tail) untuk semua dompet
+     (GET /internal/ledger/reconcile).
+  2. Total transfer per dompet di ledger vs total Transaction sukses di
+     service-transaction dalam rentang waktu yang sama.
+
+Ledger dicatat sebelum baris Transaction, jadi pakai rentang yang berakhir
+beberapa detik di masa lalu supaya transfer yang sedang berjalan tidak terhitung selisih.
+
+    python scripts/reconcile_ledger.py --from 2025-01-01 --to 2025-01-31T23:59:59
+"""
+import argparse
+import sys
+from decimal import Decimal
+
+import requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--wallet-url", default="http://localhost:3002")
+    parser.add_argument("--transaction-url", default="http://localhost:3003")
+    parser.add_argument("--from", dest="time_from", help="waktu awal ISO 8601")
+    parser.add_argument("--to", dest="time_to", help="waktu akhir ISO 8601")
+    args = parser.parse_args()
+
+    params = {k: v for k, v in (("from", args.time_from), ("to", args.time_to)) if v}
+    problems = 0
+
+    res = requests.get(f"{args.wallet_url.rstrip('/')}/internal/ledger/reconcile", params={"limit": 1000})
+    res.raise_for_status()
+    mismatches = res.json()["mismatches"]
+    for m in mismatches:
+        print(f"[saldo]    dompet {m['wallet_id']}: balance {m['balance']} != ledger {m['ledger_balance']}")
+    problems += len(mismatches)
+
+    ledger = requests.get(f"{args.wallet_url.rstrip('/')}/internal/ledger/summary", params=params)
+    ledger.raise_for_status()
+    transactions = requests.get(f"{args.transaction_url.rstrip('/')}/internal/transactions/summary", params=params)
+    transactions.raise_for_status()
+    ledger, transactions = ledger.json()["wallets"], transactions.json()["wallets"]
+
+    zero = {"debit": "0.00", "credit": "0.00"}
+    for wallet_id in sorted(set(ledger) | set(transactions), key=int):
+        for side in ("debit", "credit"):
+            in_ledger = Decimal(ledger.get(wallet_id, zero)[side])
+            in_transactions = Decimal(transactions.get(wallet_id, zero)[side])
+            if in_ledger != in_transactions:
+                print(f"[transfer] dompet {wallet_id} {side}: ledger {in_ledger} != transaksi {in_transactions}")
+                problems += 1
+
+    print(f"dompet dicek (transfer): {len(set(ledger) | set(transactions))}, selisih: {problems}")
+    sys.exit(1 if problems else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# scripts/stress_wallet_balance.py
+"""
+Stress test update saldo: ratusan debit paralel ke SATU dompet lewat
+PUT /internal/wallets/<id>/balance, lalu cek bahwa:
+
+  * saldo akhir == saldo awal - (jumlah debit sukses * amount)   (tidak ada lost update)
+  * saldo akhir >= 0                                             (tidak overdraw)
+
+Jalankan service-wallet dulu (coba WALLET_LOCK_MODE=pessimistic dan optimistic):
+
+    python scripts/stress_wallet_balance.py --user-id 1 --seed 1000 --debits 500 --amount 3
+"""
+import argparse
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--wallet-url", default="http://localhost:3002")
+    parser.add_argument("--user-id", type=int, required=True, help="pemilik dompet yang diuji")
+    parser.add_argument("--seed", type=Decimal, default=Decimal("0"), help="kredit awal sebelum test")
+    parser.add_argument("--debits", type=int, default=500)
+    parser.add_argument("--amount", type=Decimal, default=Decimal("3"))
+    parser.add_argument("--concurrency", type=int, default=100)
+    args = parser.parse_args()
+
+    base = args.wallet_url.rstrip("/")
+    session = requests.Session()
+    session.mount("http://", HTTPAdapter(pool_maxsize=args.concurrency))
+
+    wallet = session.get(f"{base}/internal/wallets/by-user/{args.user_id}").json()
+    wallet_id = wallet["id"]
+    balance_url = f"{base}/internal/wallets/{wallet_id}/balance"
+
+    if args.seed > 0:
+        session.put(balance_url, json={"type": "credit", "amount": float(args.seed)}).raise_for_status()
+    session.delete(f"{base}/internal/wallets/balance-stats")
+    initial = Decimal(session.get(f"{base}/internal/wallets/by-user/{args.user_id}").json()["balance"])
+
+    def debit(_):
+        res = session.put(balance_url, json={"type": "debit", "amount": float(args.amount)})
+        return res.status_code
+
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        codes = list(pool.map(debit, range(args.debits)))
+
+    final = Decimal(session.get(f"{base}/internal/wallets/by-user/{args.user_id}").json()["balance"])
+    stats = session.get(f"{base}/internal/wallets/balance-stats").json()
+
+    summary = {code: codes.count(code) for code in sorted(set(codes))}
+    succeeded = summary.get(200, 0)
+    expected = initial - succeeded * args.amount
+
+    print(f"dompet {wallet_id}: saldo awal {initial}, akhir {final}, diharapkan {expected}")
+    print(f"status debit : {summary}")
+    print(f"statistik    : {stats}")
+
+    ok = True
+    if final != expected:
+        print("GAGAL: lost update terdeteksi (saldo akhir tidak sesuai jumlah debit sukses)")
+        ok = False
+    if final < 0:
+        print("GAGAL: saldo minus")
+        ok = False
+    if ok:
+        print("OK: tidak ada lost update dan saldo tidak minus")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
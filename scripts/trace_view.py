@@ -0,0 +1,116 @@
+# scripts/trace_view.py
+"""
+Tampilkan trace dari file ekspor common/tracing.py (TRACE_EXPORTER=file)
+sebagai pohon span dengan offset & durasi, dan tandai critical path
+(rantai span anak yang paling akhir selesai) dengan '*'.
+
+    python scripts/trace_view.py --slowest 5             # 5 trace paling lambat
+    python scripts/trace_view.py 4bf92f3577b34da6a3ce929d0e0e4736
+    python scripts/trace_view.py --name "POST /transactions/"   # trace terbaru dengan root tsb
+"""
+import argparse
+import json
+import os
+from collections import defaultdict
+
+DEFAULT_FILE = os.getenv(
+    "TRACE_FILE",
+    os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "traces.jsonl")),
+)
+
+
+def load_spans(path):
+    """trace_id -> list span (dict OTLP + 'service')."""
+    traces = defaultdict(list)
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            for resource_spans in json.loads(line).get("resourceSpans", []):
+                attributes = resource_spans.get("resource", {}).get("attributes", [])
+                service = next((a["value"].get("stringValue") for a in attributes
+                                if a["key"] == "service.name"), "?")
+                for scope_spans in resource_spans.get("scopeSpans", []):
+                    for span in scope_spans.get("spans", []):
+                        span["service"] = service
+                        span["start"] = int(span["startTimeUnixNano"])
+                        span["end"] = int(span["endTimeUnixNano"])
+                        traces[span["traceId"]].append(span)
+    return traces
+
+
+def roots_of(spans):
+    ids = {span["spanId"] for span in spans}
+    # Root = span tanpa induk, atau induknya tidak terekam (cth: pemanggil tidak di-sample)
+    return [span for span in spans if span.get("parentSpanId") not in ids]
+
+
+def trace_duration_ms(spans):
+    return (max(s["end"] for s in spans) - min(s["start"] for s in spans)) / 1e6
+
+
+def critical_path(span, children):
+    """Span anak yang selesai paling akhir, secara rekursif."""
+    path = {span["spanId"]}
+    kids = children.get(span["spanId"])
+    if kids:
+        path |= critical_path(max(kids, key=lambda s: s["end"]), children)
+    return path
+
+
+def print_trace(trace_id, spans):
+    children = defaultdict(list)
+    for span in spans:
+        children[span.get("parentSpanId")].append(span)
+    for kids in children.values():
+        kids.sort(key=lambda s: s["start"])
+    t0 = min(span["start"] for span in spans)
+
+    print(f"trace {trace_id}  {trace_duration_ms(spans):.1f} ms  {len(spans)} span")
+    for root in sorted(roots_of(spans), key=lambda s: s["start"]):
+        hot = critical_path(root, children)
+
+        def walk(span, depth):
+            offset = (span["start"] - t0) / 1e6
+            duration = (span["end"] - span["start"]) / 1e6
+            error = "  ERROR" if span.get("status", {}).get("code") == 2 else ""
+            marker = "*" if span["spanId"] in hot else " "
+            print(f"{marker} {offset:8.1f} ms {duration:8.1f} ms  {'  ' * depth}[{span['service']}] "
+                  f"{span['name']}{error}")
+            for child in children.get(span["spanId"], []):
+                walk(child, depth + 1)
+
+        walk(root, 0)
+    print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("trace_id", nargs="?")
+    parser.add_argument("--file", default=DEFAULT_FILE)
+    parser.add_argument("--slowest", type=int, help="tampilkan N trace paling lambat")
+    parser.add_argument("--name", help="trace terbaru yang root span-nya bernama ini")
+    args = parser.parse_args()
+
+    traces = load_spans(args.file)
+    if args.trace_id:
+        selected = [args.trace_id]
+    elif args.name:
+        matching = [(max(s["start"] for s in spans), trace_id) for trace_id, spans in traces.items()
+                    if any(root["name"] == args.name for root in roots_of(spans))]
+        selected = [max(matching)[1]] if matching else []
+    else:
+        selected = sorted(traces, key=lambda t: trace_duration_ms(traces[t]), reverse=True)[:args.slowest or 5]
+
+    if not selected:
+        print("Tidak ada trace yang cocok.")
+    for trace_id in selected:
+        if trace_id not in traces:
+            print(f"Trace {trace_id} tidak ditemukan di {args.file}")
+            continue
+        print_trace(trace_id, traces[trace_id])
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,40 @@
 # gateway.py
-from flask import Flask, request, jsonify, g
+from flask import Flask, Response, request, jsonify, g
 from flask_cors import CORS
 import requests
+import contextvars
+import json
 import os
+import sys
+from concurrent.futures import ThreadPoolExecutor, wait
+from functools import wraps
 from dotenv import load_dotenv
 
-from jwt_utils import require_jwt  # JWT middleware
+# Modul bersama (common/) berada di root repo
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from jwt_utils import require_jwt, claims_cache  # JWT middleware
+from dashboard import (SECTIONS as DASHBOARD_SECTIONS, DASHBOARD_SECTION_TIMEOUT, DASHBOARD_WORKERS,
+                       build_document, upstream_error)
+from common.http_client import get_client, pool_stats
+from common.resilience import UpstreamGuard, UpstreamUnavailable, CLOSED, HALF_OPEN, OPEN
+from common.idempotency import create_store, idempotent, HEADER as IDEMPOTENCY_HEADER
+from common.wallet_cache import WalletLookupCache
+from common.events import EventBus, EVENT_BUS_ENABLED
+from common.internal_auth import internal_headers, is_internal, require_admin
+from common.response_cache import ResponseCache, INVALIDATE_TOPIC, etag_matches, publish_invalidation
+from common.metrics import instrument_flask
+from common import tracing, profiling, server
 
 load_dotenv()
 
 app = Flask(__name__)
+instrument_flask(app, "gateway")  # GET /metrics
+tracing.instrument_flask(app, "gateway")  # span per request + propagasi traceparent
+profiling.instrument_flask(app, "gateway")  # opt-in: PROFILING_ENABLED=1, lihat /admin/profile
 
 # Izinkan SEMUA origin (untuk frontend http://localhost:8000)
-CORS(app, resources={r"/*": {"origins": "*"}})
+CORS(app, resources={r"/*": {"origins": "*"}}, expose_headers=["X-Next-Cursor", "Location", "Preference-Applied", "ETag", "X-Cache"])
 
 # =============================
 # SERVICE ENDPOINTS
@@ -26,58 +48,246 @@ SERVICES = {
     # -----------------------------
 }
 
+# Satu klien (connection pool keep-alive) per upstream, masing-masing dengan
+# circuit breaker, retry budget (GET) dan batas konkurensi sendiri
+CLIENTS = {name: get_client(name, url, guard=UpstreamGuard(name)) for name, url in SERVICES.items()}
+
+
+def unavailable_response(service_name, error):
+    """503 cepat saat upstream ditolak breaker / bulkhead (tanpa menunggu timeout)."""
+    return jsonify({
+        "error": f"{service_name} service unavailable",
+        "reason": error.reason
+    }), 503, {"Retry-After": str(error.retry_after)}
+
+# Cache user_id -> dompet (id/status) untuk top up
+WALLET_CACHE = WalletLookupCache(CLIENTS["wallet"])
+
+# Hasil top up / transfer per Idempotency-Key (retry dijawab dari sini)
+IDEMPOTENCY = create_store()
+
+# Cache respon GET per user (/api/wallets/me, /api/users/me, /api/payees) + ETag
+RESPONSE_CACHE = ResponseCache()
+
+# Event bus: dompet ditutup -> hapus cache dompet (menggantikan panggilan HTTP invalidasi);
+# saldo berubah (termasuk sebagai penerima transfer) -> hapus cache respon dompet;
+# profil/payee diubah lewat worker lain -> hapus cache respon rute tersebut
+EVENTS = EventBus()
+
+
+def on_cache_events(batch):
+    for event in batch:
+        user_id = event.payload["user_id"]
+        if event.topic == INVALIDATE_TOPIC:
+            RESPONSE_CACHE.invalidate(user_id, *event.payload["routes"])
+            continue
+        if event.topic == "wallet.closed":
+            WALLET_CACHE.invalidate(user_id)
+        RESPONSE_CACHE.invalidate(user_id, "wallets_me")
+
+
+# per_process: cache ada di memori tiap worker, jadi setiap worker harus menerima semua event
+EVENTS.subscribe("gateway", ["wallet.closed", "wallet.balance_changed", INVALIDATE_TOPIC], on_cache_events,
+                 per_process=True)
+
+
+def current_user_scope():
+    return str(g.user_claims.get('user_id')) if getattr(g, 'user_claims', None) else ''
+
+# Header respon upstream yang diteruskan ke klien
+PASSTHROUGH_HEADERS = ("X-Next-Cursor", "Location", "Preference-Applied")
+# Header request klien yang diteruskan ke upstream
+FORWARDED_REQUEST_HEADERS = (IDEMPOTENCY_HEADER, "Prefer")
+
+
+# GATEWAY_PASSTHROUGH=1: body upstream diteruskan apa adanya (tanpa res.json() -> jsonify()),
+# per chunk, tanpa buffer penuh. 0 = perilaku lama (parse + serialisasi ulang)
+GATEWAY_PASSTHROUGH = os.getenv("GATEWAY_PASSTHROUGH", "1") not in ("0", "false", "False")
+# Header body yang ikut diteruskan dalam mode passthrough (bytes tidak di-decode, jadi
+# Content-Encoding & Content-Length upstream tetap berlaku)
+BODY_HEADERS = ("Content-Type", "Content-Length", "Content-Encoding")
+
+
+def passthrough_headers(upstream_headers):
+    headers = {h: upstream_headers[h] for h in PASSTHROUGH_HEADERS if h in upstream_headers}
+    # Location dari service (cth: /transactions/5) dipetakan ke rute gateway (/api/transactions/5)
+    if headers.get("Location", "").startswith("/"):
+        headers["Location"] = "/api" + headers["Location"]
+    return headers
+
+# =============================
+# CACHE RESPON (dipasang di bawah require_jwt)
+# =============================
+def cached_response(route):
+    """Layani GET tanpa query string dari RESPONSE_CACHE; 304 jika If-None-Match cocok."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if request.method != "GET" or request.args:
+                return view(*args, **kwargs)
+            user_id = g.user_claims.get('user_id')
+            entry = RESPONSE_CACHE.get(route, user_id)
+            cache_status = "HIT"
+            if entry is None:
+                response = app.make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+                try:
+                    entry = RESPONSE_CACHE.set(route, user_id, response.get_data(), response.content_type)
+                finally:
+                    # Respon asli (bisa berupa stream passthrough) tidak dikirim: tutup koneksi upstream-nya
+                    # dan lepas slot bulkhead-nya, juga saat body putus di tengah
+                    response.close()
+                cache_status = "MISS"
+
+            # no-cache: browser menyimpan respon tetapi selalu revalidasi dengan If-None-Match
+            headers = {"ETag": entry.etag, "Cache-Control": "private, no-cache", "X-Cache": cache_status}
+            if etag_matches(request.headers.get("If-None-Match"), entry.etag):
+                return Response(status=304, headers=headers)
+            return Response(entry.body, status=200, content_type=entry.content_type, headers=headers)
+        return wrapper
+    return decorator
+
+
+def invalidates(*routes):
+    """Hapus cache respon user ini untuk `routes` setelah penulisan yang berhasil."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            response = app.make_response(view(*args, **kwargs))
+            if request.method != "GET" and response.status_code < 400:
+                user_id = g.user_claims.get('user_id')
+                RESPONSE_CACHE.invalidate(user_id, *routes)
+                if EVENT_BUS_ENABLED:
+                    publish_invalidation(EVENTS, user_id, routes)
+            return response
+        return wrapper
+    return decorator
+
+
 # =============================
 # FORWARD FUNCTION
 # =============================
-def forward(service_name, path, method, data=None):
-    base = SERVICES.get(service_name)
-    if not base:
+def forward(service_name, path, method, data=None, timeout=None):
+    client = CLIENTS.get(service_name)
+    if not client:
         return jsonify({"error": f"Service '{service_name}' not found"}), 404
 
-    # Logika untuk memastikan URL tidak ganda slash
-    if base.endswith("/"):
-        base = base[:-1]
-    if path.startswith("/"):
-        path = path[1:]
-
-    url = f"{base}/{path}"
+    url = client.url(path)
     headers = {}
     incoming_auth = request.headers.get("Authorization")
     if incoming_auth:
         headers["Authorization"] = incoming_auth
+    # Idempotency-Key diteruskan supaya service tujuan juga bisa menolak eksekusi ganda;
+    # Prefer (cth: respond-async) supaya service bisa memilih mode async
+    for name in FORWARDED_REQUEST_HEADERS:
+        if request.headers.get(name):
+            headers[name] = request.headers[name]
 
     # --- INJEKSI X-User-Id ---
     if hasattr(g, 'user_claims') and g.user_claims:
         user_id = g.user_claims.get('user_id')
         if user_id:
             headers['X-User-Id'] = str(user_id)
+            headers.update(internal_headers())  # bukti X-User-Id berasal dari gateway
     # -------------------------
 
-    print(f"[Gateway] → {method} {url} data={data} headers={headers.get('X-User-Id', 'No ID')}")
+    print(f"[Gateway] → {method} {url} data={data} headers={headers.get('X-User-Id', 'No ID')} "
+          f"trace={tracing.current_trace_id()}")
 
+    if method not in ("GET", "POST", "PUT", "DELETE"):
+        return jsonify({"error": "Method Not Allowed"}), 405
 
     try:
-        if method == "GET":
-            res = requests.get(url, headers=headers, timeout=10)
-        elif method == "POST":
-            res = requests.post(url, json=data, headers=headers, timeout=10)
-        elif method == "PUT":
-            res = requests.put(url, json=data, headers=headers, timeout=10)
-        elif method == "DELETE":
-            res = requests.delete(url, headers=headers, timeout=10)
-        else:
-            return jsonify({"error": "Method Not Allowed"}), 405
-
+        body = data if method in ("POST", "PUT") else None
+        # Query string (cth: ?limit=&cursor=) ikut diteruskan
+        res = client.request(method, path, json=body, headers=headers, params=request.args, timeout=timeout,
+                             stream=GATEWAY_PASSTHROUGH, hold=GATEWAY_PASSTHROUGH)
+        extra_headers = passthrough_headers(res.headers)
+
+        if GATEWAY_PASSTHROUGH:
+            return passthrough_response(client, res, extra_headers)
         try:
-            return jsonify(res.json()), res.status_code
+            return jsonify(res.json()), res.status_code, extra_headers
         except ValueError:
-            return res.text, res.status_code, {"Content-Type": res.headers.get("Content-Type")}
+            return res.text, res.status_code, {"Content-Type": res.headers.get("Content-Type"), **extra_headers}
 
+    except UpstreamUnavailable as e:
+        return unavailable_response(service_name, e)
     except requests.exceptions.ConnectionError:
         return jsonify({
             "error": f"{service_name} service unreachable",
             "url": url
         }), 503
+    except requests.exceptions.Timeout:
+        return jsonify({
+            "error": f"{service_name} service timeout",
+            "url": url
+        }), 504
+
+
+# Versi streaming: body upstream diteruskan per chunk tanpa di-buffer / di-parse
+STREAM_CHUNK_SIZE = 64 * 1024
+STREAM_HEADERS = ("Content-Type", "Content-Disposition")
+
+
+def streamed_response(client, res, chunks, **kwargs):
+    """
+    Response Flask dari body upstream yang dibaca per chunk (request stream=True, hold=True).
+    Slot bulkhead upstream baru dilepas setelah klien selesai menerima, dan body yang putus
+    di tengah (read timeout / reset) dicatat sebagai kegagalan breaker.
+    """
+    released = []
+
+    def release():
+        # Sekali saja: bisa dipanggil dari body() yang error dan lagi dari close()
+        if not released:
+            released.append(True)
+            res.close()
+            client.release_hold()
+
+    def body():
+        try:
+            yield from chunks
+        except Exception:
+            if client.guard is not None:
+                client.guard.record(False)
+            release()
+            raise
+
+    response = Response(body(), status=res.status_code, **kwargs)
+    # Kembalikan koneksi ke pool dan lepas slot setelah klien selesai menerima
+    response.call_on_close(release)
+    return response
+
+
+def passthrough_response(client, res, extra_headers):
+    """Respon dari upstream (request stream=True): bytes mentah per chunk, tanpa decode/encode."""
+    headers = {h: res.headers[h] for h in BODY_HEADERS if h in res.headers}
+    headers.update(extra_headers)
+    return streamed_response(client, res, res.raw.stream(STREAM_CHUNK_SIZE, decode_content=False), headers=headers)
+
+
+def forward_stream(service_name, path):
+    client = CLIENTS[service_name]
+    headers = {}
+    if request.headers.get("Authorization"):
+        headers["Authorization"] = request.headers["Authorization"]
+    if getattr(g, 'user_claims', None) and g.user_claims.get('user_id'):
+        headers['X-User-Id'] = str(g.user_claims['user_id'])
+        headers.update(internal_headers())
+
+    try:
+        res = client.get(path, headers=headers, params=request.args, stream=True, hold=True)
+    except UpstreamUnavailable as e:
+        return unavailable_response(service_name, e)
+    except requests.exceptions.ConnectionError:
+        return jsonify({"error": f"{service_name} service unreachable", "url": client.url(path)}), 503
+    except requests.exceptions.Timeout:
+        return jsonify({"error": f"{service_name} service timeout", "url": client.url(path)}), 504
+
+    return streamed_response(client, res, res.iter_content(chunk_size=STREAM_CHUNK_SIZE),
+                             headers={h: res.headers[h] for h in STREAM_HEADERS if h in res.headers})
 
 
 # =============================
@@ -96,6 +306,8 @@ def users_public():
 # PROTECTED USER ROUTES
 @app.route("/api/users/me", methods=["GET", "PUT", "DELETE"])
 @require_jwt(optional=False)
+@invalidates("users_me", "wallets_me", "payees")
+@cached_response("users_me")
 def users_me():
     body = request.get_json() if request.method == "PUT" or request.method == "DELETE" else None
     return forward("user", "users/me", request.method, body)
@@ -104,6 +316,7 @@ def users_me():
 # WALLET ROUTES (Publik)
 @app.route("/api/wallets/me", methods=["GET"])
 @require_jwt(optional=False)
+@cached_response("wallets_me")
 def wallets_me():
     return forward("wallet", "wallets/me", "GET")
 
@@ -111,6 +324,8 @@ def wallets_me():
 # RUTE TOP UP
 @app.route("/api/topup", methods=["POST"])
 @require_jwt(optional=False)
+@idempotent(IDEMPOTENCY, scope=current_user_scope)
+@invalidates("wallets_me")
 def topup_saldo():
     user_id = g.user_claims.get('user_id')
     data = request.get_json()
@@ -119,11 +334,8 @@ def topup_saldo():
     if not amount or float(amount) <= 0:
         return jsonify({"message": "Jumlah Top Up tidak valid"}), 400
 
-    wallet_url = f"{SERVICES['wallet']}/internal/wallets/by-user/{user_id}"
     try:
-        wallet_res = requests.get(wallet_url, timeout=5)
-        wallet_res.raise_for_status() 
-        wallet_id = wallet_res.json().get('id')
+        wallet_id = WALLET_CACHE.get(user_id, timeout=5).get('id')
         
         if not wallet_id:
              return jsonify({"message": "ID Wallet tidak ditemukan di respon internal"}), 404
@@ -132,22 +344,33 @@ def topup_saldo():
          if e.response.status_code == 404:
              return jsonify({"message": "Wallet aktif tidak ditemukan untuk user ini"}), 404
          return jsonify({"message": f"Error di Wallet Service: {str(e)}"}), 500
+    except UpstreamUnavailable as e:
+        return unavailable_response("wallet", e)
     except requests.exceptions.ConnectionError:
         return jsonify({"message": "Wallet Service tidak terjangkau (saat GET)"}), 503
 
     balance_payload = {
         "type": "credit",
-        "amount": amount
+        "amount": amount,
+        "source": "topup"
     }
-    balance_url = f"{SERVICES['wallet']}/internal/wallets/{wallet_id}/balance"
-    
+    balance_headers = {}
+    idempotency_key = request.headers.get(IDEMPOTENCY_HEADER)
+    if idempotency_key:
+        balance_headers[IDEMPOTENCY_HEADER] = f"topup:{user_id}:{idempotency_key}"
     try:
-        balance_res = requests.put(balance_url, json=balance_payload, timeout=5)
+        balance_res = CLIENTS['wallet'].put(f"internal/wallets/{wallet_id}/balance",
+                                            json=balance_payload, headers=balance_headers, timeout=5)
         balance_res.raise_for_status() 
         return jsonify(balance_res.json()), balance_res.status_code
         
+    except UpstreamUnavailable as e:
+        return unavailable_response("wallet", e)
     except requests.exceptions.RequestException as e:
         print(f"Error saat update balance: {e}")
+        if e.response is not None and e.response.status_code in (403, 404):
+            # Dompet ditutup/hilang: mapping di cache sudah basi
+            WALLET_CACHE.invalidate(user_id)
         try:
             return jsonify(e.response.json()), e.response.status_code
         except:
@@ -157,15 +380,105 @@ def topup_saldo():
 # TRANSACTIONS (Publik: GET Riwayat, POST Transfer)
 @app.route("/api/transactions", methods=["GET", "POST"])
 @require_jwt(optional=False)
+@idempotent(IDEMPOTENCY, scope=current_user_scope)
+@invalidates("wallets_me")
 def transactions_collection():
     body = request.get_json() if request.method == "POST" else None
     return forward("transaction", "transactions/", request.method, body) 
 
 
+# STATUS SATU TRANSAKSI (polling / long-poll ?wait= untuk transfer async)
+@app.route("/api/transactions/<int:transaction_id>", methods=["GET"])
+@require_jwt(optional=False)
+def transactions_item(transaction_id):
+    try:
+        wait_seconds = max(0.0, float(request.args.get("wait", 0)))
+    except ValueError:
+        wait_seconds = 0.0
+    # Read timeout harus lebih panjang dari waktu tunggu long-poll di upstream
+    return forward("transaction", f"transactions/{transaction_id}", "GET",
+                   timeout=wait_seconds + CLIENTS["transaction"].read_timeout if wait_seconds else None)
+
+
+# TRANSFER MASSAL (payroll / disbursement)
+@app.route("/api/transactions/batch", methods=["POST"])
+@require_jwt(optional=False)
+@idempotent(IDEMPOTENCY, scope=current_user_scope)
+@invalidates("wallets_me")
+def transactions_batch():
+    return forward("transaction", "transactions/batch", "POST", request.get_json())
+
+
+# EXPORT RIWAYAT (streaming NDJSON / CSV)
+@app.route("/api/transactions/export", methods=["GET"])
+@require_jwt(optional=False)
+def transactions_export():
+    return forward_stream("transaction", "transactions/export")
+
+
+# DASHBOARD (profil + dompet + transaksi terakhir + payee dalam satu round trip)
+DASHBOARD_POOL = ThreadPoolExecutor(max_workers=DASHBOARD_WORKERS, thread_name_prefix="dashboard")
+
+
+def fetch_section(name, user_id, headers):
+    """Ambil satu bagian dashboard. Dijalankan di DASHBOARD_POOL (tanpa request context Flask)."""
+    service_name, path, params, cache_route = DASHBOARD_SECTIONS[name]
+    if cache_route:
+        entry = RESPONSE_CACHE.get(cache_route, user_id)
+        if entry is not None:
+            return json.loads(entry.body), None
+    try:
+        res = CLIENTS[service_name].get(path, headers=headers, params=params,
+                                        timeout=DASHBOARD_SECTION_TIMEOUT)
+    except UpstreamUnavailable as e:
+        return None, f"{service_name} service unavailable ({e.reason})"
+    except requests.exceptions.Timeout:
+        return None, f"{service_name} service timeout"
+    except requests.exceptions.RequestException:
+        return None, f"{service_name} service unreachable"
+    try:
+        body = res.json()
+    except ValueError:
+        body = None
+    if not res.ok:
+        return None, upstream_error(service_name, res.status_code, body)
+    if cache_route:
+        RESPONSE_CACHE.set(cache_route, user_id, res.content, res.headers.get("Content-Type"))
+    return body, None
+
+
+@app.route("/api/dashboard", methods=["GET"])
+@require_jwt(optional=False)
+def dashboard():
+    user_id = g.user_claims.get('user_id')
+    headers = {"X-User-Id": str(user_id), **internal_headers()}
+    if request.headers.get("Authorization"):
+        headers["Authorization"] = request.headers["Authorization"]
+
+    # copy_context: span request ikut ke thread pool, jadi panggilan upstream tetap satu trace
+    futures = {DASHBOARD_POOL.submit(contextvars.copy_context().run, fetch_section, name, user_id, headers): name
+               for name in DASHBOARD_SECTIONS}
+    # Batas keseluruhan = batas per bagian (+ sedikit untuk connect), karena semua berjalan paralel
+    done, _ = wait(futures, timeout=DASHBOARD_SECTION_TIMEOUT + CLIENTS["user"].connect_timeout)
+    results = {}
+    for future, name in futures.items():
+        if future in done:
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                results[name] = (None, str(e))
+        else:
+            results[name] = (None, "Batas waktu terlampaui")
+    document, status = build_document(results)
+    return jsonify(document), status
+
+
 # --- TAMBAHAN BARU: RUTE PAYEE ---
 # Rute ini menangani /api/payees (GET list, POST baru)
 @app.route("/api/payees", methods=["GET", "POST"])
 @require_jwt(optional=False)
+@invalidates("payees")
+@cached_response("payees")
 def payees_collection():
     body = request.get_json() if request.method == "POST" else None
     # Forward ke /payees/ (dengan slash) karena service-payee menggunakan @payee_ns.route('/')
@@ -174,6 +487,7 @@ def payees_collection():
 # Rute ini menangani /api/payees/<id> (GET, PUT, DELETE spesifik)
 @app.route("/api/payees/<int:id>", methods=["GET", "PUT", "DELETE"])
 @require_jwt(optional=False)
+@invalidates("payees")
 def payees_item(id):
     body = request.get_json() if request.method == "PUT" else None
     # Forward ke /payees/<id>
@@ -206,23 +520,75 @@ def internal_wallet_balance(wallet_id):
 
 
 # HEALTH CHECK
+# Diturunkan dari state circuit breaker (trafik nyata), tanpa probe langsung ke upstream
+BREAKER_HEALTH = {CLOSED: "healthy", HALF_OPEN: "recovering", OPEN: "offline"}
+
+
 @app.route("/health")
 def health():
-    statuses = {}
-    for name, srv in SERVICES.items():
-        try:
-            r = requests.get(f"{srv}/health", timeout=2)
-            statuses[name] = "healthy" if r.status_code == 200 else "error"
-        except:
-            statuses[name] = "offline"
+    statuses = {name: BREAKER_HEALTH[client.guard.breaker.state] for name, client in CLIENTS.items()}
     return jsonify({"gateway": "healthy", "services": statuses})
 
 
+# Endpoint /admin/* butuh X-Admin-Token (ADMIN_TOKEN, lihat common/internal_auth.py)
+
+# STATE PENGAMAN UPSTREAM (breaker, retry budget, batas konkurensi)
+@app.route("/admin/upstreams")
+@require_admin
+def admin_upstreams():
+    return jsonify({name: client.guard.stats() for name, client in CLIENTS.items()})
+
+
+# INVALIDASI CACHE (fallback HTTP service-wallet saat dompet ditutup dan event bus gagal).
+# Port gateway publik, jadi hanya untuk service internal (X-Internal-Secret / loopback)
+@app.route("/internal/cache/wallets/<int:user_id>", methods=["DELETE"])
+def internal_wallet_cache_invalidate(user_id):
+    if not is_internal(request.headers, request.remote_addr):
+        return jsonify({"error": "Forbidden"}), 403
+    WALLET_CACHE.invalidate(user_id)
+    RESPONSE_CACHE.invalidate(user_id, "wallets_me")
+    return jsonify({"message": "Cache dompet dihapus."})
+
+
+# STATISTIK CONNECTION POOL
+@app.route("/admin/pools")
+@require_admin
+def admin_pools():
+    return jsonify(pool_stats())
+
+
+# STATISTIK CACHE
+@app.route("/admin/caches")
+@require_admin
+def admin_caches():
+    return jsonify({
+        "wallets": WALLET_CACHE.stats(),
+        "idempotency": IDEMPOTENCY.stats(),
+        "jwt_claims": claims_cache.stats() if claims_cache else None,
+        "responses": RESPONSE_CACHE.stats(),
+    })
+
+
+# STATISTIK EVENT BUS (offset & ketertinggalan tiap consumer)
+@app.route("/admin/events")
+@require_admin
+def admin_events():
+    if not EVENT_BUS_ENABLED:
+        return jsonify({"enabled": False})
+    return jsonify(EVENTS.stats())
+
+
 @app.route("/")
 def index():
     return jsonify({"message": "E-Wallet API Gateway with JWT", "services": SERVICES})
 
 
+def start_background():
+    if EVENT_BUS_ENABLED:
+        EVENTS.start()
+
+
 if __name__ == "__main__":
     port = int(os.getenv("PORT", 3000))
-    app.run(host="0.0.0.0", port=port, debug=True)
\ No newline at end of file
+    # WEB_SERVER=gunicorn (default) / dev, lihat common/server.py
+    server.run(app, "gateway", port, host="0.0.0.0", background=start_background)
\ No newline at end of file
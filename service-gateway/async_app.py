@@ -0,0 +1,666 @@
+# async_app.py
+# Gateway versi asyncio (aiohttp). Tabel rute dan aturan JWT SAMA dengan app.py,
+# tetapi pemanggilan ke upstream tidak memblokir thread, sehingga ribuan klien
+# bisa dilayani oleh satu proses.
+#
+# Jalankan:  python async_app.py   (port dari ASYNC_GATEWAY_PORT, default 3100)
+import asyncio
+import json
+import os
+import sys
+import time
+from functools import wraps
+
+import aiohttp
+from aiohttp import web
+from dotenv import load_dotenv
+
+# Modul bersama (common/) berada di root repo
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from jwt_utils import authenticate  # inti require_jwt (tanpa Flask)
+from dashboard import SECTIONS as DASHBOARD_SECTIONS, DASHBOARD_SECTION_TIMEOUT, build_document, upstream_error
+from common import http_client
+from common.events import EventBus, EVENT_BUS_ENABLED
+from common.idempotency import HEADER as IDEMPOTENCY_HEADER, TRANSIENT_STATUS, create_store, request_fingerprint
+from common.wallet_cache import WalletLookupCache
+from common.internal_auth import internal_headers, is_admin, is_internal
+from common.response_cache import ResponseCache, INVALIDATE_TOPIC, etag_matches, publish_invalidation
+from common.resilience import UpstreamGuard, UpstreamUnavailable, CLOSED, HALF_OPEN, OPEN
+from common.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, aiohttp_middleware, metrics_text, observe_upstream
+from common import tracing
+
+load_dotenv()
+
+# =============================
+# SERVICE ENDPOINTS
+# =============================
+SERVICES = {
+    "user": os.getenv("USER_SERVICE_URL", "http://localhost:3001"),
+    "wallet": os.getenv("WALLET_SERVICE_URL", "http://localhost:3002"),
+    "transaction": os.getenv("TRANSACTION_SERVICE_URL", "http://localhost:3003"),
+    "payee": os.getenv("PAYEE_SERVICE_URL", "http://localhost:3004")
+}
+
+# Circuit breaker, retry budget (GET) dan batas konkurensi per upstream (lihat common/resilience.py)
+GUARDS = {name: UpstreamGuard(name) for name in SERVICES}
+UPSTREAM_ERRORS = (aiohttp.ClientConnectionError, asyncio.TimeoutError)
+
+
+def unavailable_response(service_name, error):
+    return web.json_response({"error": f"{service_name} service unavailable", "reason": error.reason},
+                             status=503, headers={"Retry-After": str(error.retry_after)})
+
+
+# =============================
+# JWT MIDDLEWARE (versi aiohttp dari jwt_utils.require_jwt)
+# =============================
+def require_jwt(optional=False):
+    def decorator(handler):
+        @wraps(handler)
+        async def wrapper(request):
+            claims, error = authenticate(request.headers.get("Authorization"), optional)
+            if error:
+                body, status = error
+                return web.json_response(body, status=status)
+            request["user_claims"] = claims
+            return await handler(request)
+        return wrapper
+    return decorator
+
+
+def require_admin(handler):
+    """Versi aiohttp dari common.internal_auth.require_admin (X-Admin-Token / loopback)."""
+    @wraps(handler)
+    async def wrapper(request):
+        if not is_admin(request.headers, request.remote):
+            return web.json_response({"message": "Endpoint admin butuh header X-Admin-Token yang valid."},
+                                     status=403)
+        return await handler(request)
+    return wrapper
+
+
+# =============================
+# CORS (izinkan SEMUA origin, sama seperti flask_cors di app.py)
+# =============================
+CORS_HEADERS = {
+    "Access-Control-Allow-Origin": "*",
+    "Access-Control-Allow-Headers": "Authorization, Content-Type, Idempotency-Key, Prefer",
+    "Access-Control-Allow-Methods": "GET, POST, PUT, DELETE, OPTIONS",
+    "Access-Control-Expose-Headers": "X-Next-Cursor, Location, Preference-Applied, ETag, X-Cache",
+}
+
+# Header respon upstream yang diteruskan ke klien
+PASSTHROUGH_HEADERS = ("X-Next-Cursor", "Location", "Preference-Applied")
+# Header request klien yang diteruskan ke upstream
+FORWARDED_REQUEST_HEADERS = (IDEMPOTENCY_HEADER, "Prefer")
+
+
+@web.middleware
+async def cors_middleware(request, handler):
+    if request.method == "OPTIONS":
+        return web.Response(status=200, headers=CORS_HEADERS)
+    response = await handler(request)
+    if not response.prepared:
+        response.headers.update(CORS_HEADERS)
+    return response
+
+
+# =============================
+# CACHE RESPON (sama dengan cached_response / invalidates di app.py)
+# =============================
+RESPONSE_CACHE = ResponseCache()
+
+# Cache user_id -> dompet (id/status) untuk top up; service-wallet dipanggil lewat GUARDS
+WALLET_CACHE = WalletLookupCache(client=None)
+
+# Consumer terpisah dari gateway Flask: keduanya harus menerima setiap event
+EVENTS = EventBus()
+
+
+def on_cache_events(batch):
+    for event in batch:
+        routes = event.payload["routes"] if event.topic == INVALIDATE_TOPIC else ["wallets_me"]
+        if event.topic == "wallet.closed":
+            WALLET_CACHE.invalidate(event.payload["user_id"])
+        RESPONSE_CACHE.invalidate(event.payload["user_id"], *routes)
+
+
+EVENTS.subscribe("gateway-async", ["wallet.closed", "wallet.balance_changed", INVALIDATE_TOPIC], on_cache_events,
+                 per_process=True)
+
+
+# =============================
+# IDEMPOTENCY (versi aiohttp dari common.idempotency.idempotent, store yang sama)
+# =============================
+# Hasil top up / transfer per Idempotency-Key (retry dijawab dari sini). Dengan
+# IDEMPOTENCY_BACKEND=sqlite key-nya juga terlihat oleh gateway Flask di host yang sama
+IDEMPOTENCY = create_store()
+
+
+def current_user_scope(request):
+    claims = request.get("user_claims")
+    return str(claims.get("user_id")) if claims else ""
+
+
+def idempotent(scope=None):
+    def decorator(handler):
+        @wraps(handler)
+        async def wrapper(request):
+            key = request.headers.get(IDEMPOTENCY_HEADER)
+            if not key or request.method in ("GET", "HEAD", "OPTIONS"):
+                return await handler(request)
+
+            loop = asyncio.get_running_loop()
+            scoped_key = f"{scope(request) if scope else ''}|{request.path}|{key}"
+            digest = request_fingerprint(request.method, request.path, await request.read())
+            # Store SQLite di thread pool, jangan blokir event loop
+            state, record = await loop.run_in_executor(None, IDEMPOTENCY.begin, scoped_key, digest)
+
+            if state == "replay":
+                status, body, content_type = record
+                return web.Response(body=body, status=status,
+                                    headers={"Content-Type": content_type, "Idempotent-Replayed": "true"})
+            if state == "in_progress":
+                return web.json_response({"message": "Request dengan Idempotency-Key ini masih diproses."},
+                                         status=409)
+            if state == "mismatch":
+                return web.json_response({"message": "Idempotency-Key sudah dipakai untuk payload yang berbeda."},
+                                         status=422)
+
+            try:
+                response = await handler(request)
+            except BaseException:
+                await loop.run_in_executor(None, IDEMPOTENCY.release, scoped_key)
+                raise
+
+            # Error sementara (5xx, 409, 429) tidak disimpan supaya klien bisa retry
+            if response.status >= 500 or response.status in TRANSIENT_STATUS:
+                await loop.run_in_executor(None, IDEMPOTENCY.release, scoped_key)
+            else:
+                await loop.run_in_executor(None, IDEMPOTENCY.complete, scoped_key, digest, response.status,
+                                           response.body, response.headers.get("Content-Type"))
+            return response
+        return wrapper
+    return decorator
+
+
+def cached_response(route):
+    def decorator(handler):
+        @wraps(handler)
+        async def wrapper(request):
+            if request.method != "GET" or request.query:
+                return await handler(request)
+            user_id = request["user_claims"].get("user_id")
+            entry = RESPONSE_CACHE.get(route, user_id)
+            cache_status = "HIT"
+            if entry is None:
+                response = await handler(request)
+                if response.status != 200:
+                    return response
+                entry = RESPONSE_CACHE.set(route, user_id, response.body, response.headers.get("Content-Type"))
+                cache_status = "MISS"
+
+            # no-cache: browser menyimpan respon tetapi selalu revalidasi dengan If-None-Match
+            headers = {"ETag": entry.etag, "Cache-Control": "private, no-cache", "X-Cache": cache_status}
+            if etag_matches(request.headers.get("If-None-Match"), entry.etag):
+                return web.Response(status=304, headers=headers)
+            return web.Response(body=entry.body, status=200, headers={"Content-Type": entry.content_type, **headers})
+        return wrapper
+    return decorator
+
+
+def invalidates(*routes):
+    def decorator(handler):
+        @wraps(handler)
+        async def wrapper(request):
+            response = await handler(request)
+            if request.method != "GET" and response.status < 400:
+                user_id = request["user_claims"].get("user_id")
+                RESPONSE_CACHE.invalidate(user_id, *routes)
+                if EVENT_BUS_ENABLED:
+                    # Tulis SQLite di thread pool, jangan blokir event loop
+                    await asyncio.get_running_loop().run_in_executor(
+                        None, publish_invalidation, EVENTS, user_id, routes)
+            return response
+        return wrapper
+    return decorator
+
+
+# =============================
+# FORWARD FUNCTION
+# =============================
+def upstream_url(service_name, path):
+    return f"{SERVICES[service_name].rstrip('/')}/{path.lstrip('/')}"
+
+
+async def read_json(request):
+    if not request.body_exists:
+        return None
+    try:
+        return await request.json()
+    except ValueError:
+        return None
+
+
+async def upstream_response(res):
+    """Salin respon upstream (body + header yang diteruskan) menjadi web.Response."""
+    payload = await res.read()
+    response = web.Response(body=payload, status=res.status,
+                            content_type=res.content_type, charset=res.charset)
+    for name in PASSTHROUGH_HEADERS:
+        if name in res.headers:
+            response.headers[name] = res.headers[name]
+    # Location dari service (/transactions/5) dipetakan ke rute gateway (/api/transactions/5)
+    if response.headers.get("Location", "").startswith("/"):
+        response.headers["Location"] = "/api" + response.headers["Location"]
+    return response
+
+
+async def forward(request, service_name, path, method, data=None, timeout=None):
+    if service_name not in SERVICES:
+        return web.json_response({"error": f"Service '{service_name}' not found"}, status=404)
+    if method not in ("GET", "POST", "PUT", "DELETE"):
+        return web.json_response({"error": "Method Not Allowed"}, status=405)
+
+    url = upstream_url(service_name, path)
+    headers = {}
+    incoming_auth = request.headers.get("Authorization")
+    if incoming_auth:
+        headers["Authorization"] = incoming_auth
+    # Idempotency-Key (deduplikasi) dan Prefer (mode async) diteruskan ke service tujuan
+    for name in FORWARDED_REQUEST_HEADERS:
+        if request.headers.get(name):
+            headers[name] = request.headers[name]
+
+    # --- INJEKSI X-User-Id ---
+    claims = request.get("user_claims")
+    if claims and claims.get("user_id"):
+        headers["X-User-Id"] = str(claims["user_id"])
+        headers.update(internal_headers())  # bukti X-User-Id berasal dari gateway
+
+    session = request.app["http"]
+    body = data if method in ("POST", "PUT") else None
+    kwargs = {"timeout": aiohttp.ClientTimeout(sock_connect=http_client.CONNECT_TIMEOUT,
+                                               sock_read=timeout)} if timeout else {}
+
+    async def send():
+        span = tracing.begin_span(f"{method} {service_name}", tracing.CLIENT,
+                                  {"peer.service": service_name, "http.method": method, "http.url": url})
+        start = time.perf_counter()
+        status = "error"
+        try:
+            async with session.request(method, url, json=body, headers=tracing.inject(dict(headers)),
+                                       params=request.query, **kwargs) as res:
+                status = res.status
+                return await upstream_response(res)
+        except asyncio.TimeoutError:
+            status = "timeout"
+            raise
+        finally:
+            observe_upstream(service_name, method, status, time.perf_counter() - start)
+            span.set_attribute("http.status_code", status)
+            tracing.end_span(span, error=not isinstance(status, int) or status >= 500)
+
+    try:
+        return await GUARDS[service_name].execute_async(method, send, UPSTREAM_ERRORS)
+    except UpstreamUnavailable as e:
+        return unavailable_response(service_name, e)
+    except asyncio.TimeoutError:
+        # Sebelum UPSTREAM_ERRORS: timeout = 504 seperti forward() di app.py
+        return web.json_response({
+            "error": f"{service_name} service timeout",
+            "url": url
+        }, status=504)
+    except UPSTREAM_ERRORS:
+        return web.json_response({
+            "error": f"{service_name} service unreachable",
+            "url": url
+        }, status=503)
+
+
+# =============================
+# ROUTES
+# =============================
+routes = web.RouteTableDef()
+
+
+# PUBLIC USER ROUTES
+@routes.post("/api/users/login")
+@routes.post("/api/users/register")
+async def users_public(request):
+    body = await read_json(request)
+    path = request.path.replace("/api/", "")
+    return await forward(request, "user", path, request.method, body)
+
+
+# PROTECTED USER ROUTES
+@routes.route("*", "/api/users/me")
+@require_jwt(optional=False)
+@invalidates("users_me", "wallets_me", "payees")
+@cached_response("users_me")
+async def users_me(request):
+    if request.method not in ("GET", "PUT", "DELETE"):
+        return web.json_response({"error": "Method Not Allowed"}, status=405)
+    body = await read_json(request) if request.method in ("PUT", "DELETE") else None
+    return await forward(request, "user", "users/me", request.method, body)
+
+
+# WALLET ROUTES (Publik)
+@routes.get("/api/wallets/me")
+@require_jwt(optional=False)
+@cached_response("wallets_me")
+async def wallets_me(request):
+    return await forward(request, "wallet", "wallets/me", "GET")
+
+
+async def call_wallet(request, method, path, headers=None, **kwargs):
+    """Satu panggilan ke service-wallet lewat GUARDS["wallet"]; body dibaca penuh (web.Response)."""
+    session = request.app["http"]
+
+    async def send():
+        async with session.request(method, upstream_url("wallet", path),
+                                   headers=tracing.inject(dict(headers or {})), **kwargs) as res:
+            return await upstream_response(res)
+
+    return await GUARDS["wallet"].execute_async(method, send, UPSTREAM_ERRORS)
+
+
+# RUTE TOP UP
+@routes.post("/api/topup")
+@require_jwt(optional=False)
+@idempotent(scope=current_user_scope)
+@invalidates("wallets_me")
+async def topup_saldo(request):
+    user_id = request["user_claims"].get("user_id")
+    data = await read_json(request) or {}
+    amount = data.get("amount")
+
+    if not amount or float(amount) <= 0:
+        return web.json_response({"message": "Jumlah Top Up tidak valid"}, status=400)
+
+    timeout = aiohttp.ClientTimeout(total=5)
+    wallet = WALLET_CACHE.cached(user_id)
+    if wallet is None:
+        try:
+            wallet_res = await call_wallet(request, "GET", f"internal/wallets/by-user/{user_id}", timeout=timeout)
+        except UpstreamUnavailable as e:
+            return unavailable_response("wallet", e)
+        except UPSTREAM_ERRORS:
+            return web.json_response({"message": "Wallet Service tidak terjangkau (saat GET)"}, status=503)
+        if wallet_res.status == 404:
+            return web.json_response({"message": "Wallet aktif tidak ditemukan untuk user ini"}, status=404)
+        if wallet_res.status >= 400:
+            return web.json_response({"message": f"Error di Wallet Service: {wallet_res.status}"}, status=500)
+        wallet = WALLET_CACHE.remember(user_id, json.loads(wallet_res.body))
+    wallet_id = wallet.get("id")
+
+    if not wallet_id:
+        return web.json_response({"message": "ID Wallet tidak ditemukan di respon internal"}, status=404)
+
+    balance_payload = {"type": "credit", "amount": amount, "source": "topup"}
+    balance_headers = {}
+    if request.headers.get(IDEMPOTENCY_HEADER):
+        balance_headers[IDEMPOTENCY_HEADER] = f"topup:{user_id}:{request.headers[IDEMPOTENCY_HEADER]}"
+    try:
+        response = await call_wallet(request, "PUT", f"internal/wallets/{wallet_id}/balance",
+                                     json=balance_payload, headers=balance_headers, timeout=timeout)
+    except UpstreamUnavailable as e:
+        return unavailable_response("wallet", e)
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        return web.json_response({"message": f"Gagal Top Up di Wallet Service. Error: {str(e)}"}, status=500)
+    if response.status in (403, 404):
+        # Dompet ditutup/hilang: mapping di cache sudah basi
+        WALLET_CACHE.invalidate(user_id)
+    return response
+
+
+# TRANSACTIONS (Publik: GET Riwayat, POST Transfer)
+@routes.get("/api/transactions")
+@routes.post("/api/transactions")
+@require_jwt(optional=False)
+@idempotent(scope=current_user_scope)
+@invalidates("wallets_me")
+async def transactions_collection(request):
+    body = await read_json(request) if request.method == "POST" else None
+    return await forward(request, "transaction", "transactions/", request.method, body)
+
+
+# STATUS SATU TRANSAKSI (polling / long-poll ?wait= untuk transfer async)
+@routes.get("/api/transactions/{transaction_id:\\d+}")
+@require_jwt(optional=False)
+async def transactions_item(request):
+    try:
+        wait_seconds = max(0.0, float(request.query.get("wait", 0)))
+    except ValueError:
+        wait_seconds = 0.0
+    path = f"transactions/{request.match_info['transaction_id']}"
+    # Read timeout harus lebih panjang dari waktu tunggu long-poll di upstream
+    return await forward(request, "transaction", path, "GET",
+                         timeout=wait_seconds + http_client.READ_TIMEOUT if wait_seconds else None)
+
+
+# TRANSFER MASSAL (payroll / disbursement)
+@routes.post("/api/transactions/batch")
+@require_jwt(optional=False)
+@idempotent(scope=current_user_scope)
+@invalidates("wallets_me")
+async def transactions_batch(request):
+    return await forward(request, "transaction", "transactions/batch", "POST", await read_json(request))
+
+
+# EXPORT RIWAYAT (streaming NDJSON / CSV, tanpa buffer)
+@routes.get("/api/transactions/export")
+@require_jwt(optional=False)
+async def transactions_export(request):
+    headers = {"X-User-Id": str(request["user_claims"]["user_id"]), **internal_headers()}
+    if request.headers.get("Authorization"):
+        headers["Authorization"] = request.headers["Authorization"]
+    url = upstream_url("transaction", "transactions/export")
+
+    async def send():
+        res = await request.app["http"].get(url, headers=tracing.inject(dict(headers)), params=request.query)
+        if res.status >= 500:
+            # Dibaca penuh supaya koneksinya kembali ke pool kalau guard mencoba ulang
+            try:
+                return await upstream_response(res)
+            finally:
+                res.release()
+        return res
+
+    # Lewat GUARDS seperti forward(): breaker, retry budget & bulkhead ikut berlaku
+    try:
+        res = await GUARDS["transaction"].execute_async("GET", send, UPSTREAM_ERRORS)
+    except UpstreamUnavailable as e:
+        return unavailable_response("transaction", e)
+    except asyncio.TimeoutError:
+        return web.json_response({"error": "transaction service timeout", "url": url}, status=504)
+    except UPSTREAM_ERRORS:
+        return web.json_response({"error": "transaction service unreachable", "url": url}, status=503)
+    if isinstance(res, web.Response):
+        return res
+
+    try:
+        response = web.StreamResponse(status=res.status)
+        for name in ("Content-Type", "Content-Disposition"):
+            if name in res.headers:
+                response.headers[name] = res.headers[name]
+        response.headers.update(CORS_HEADERS)
+        await response.prepare(request)
+        async for chunk in res.content.iter_chunked(64 * 1024):
+            await response.write(chunk)
+        await response.write_eof()
+        return response
+    finally:
+        res.release()
+
+
+# DASHBOARD (profil + dompet + transaksi terakhir + payee dalam satu round trip)
+async def fetch_section(request, name):
+    service_name, path, params, cache_route = DASHBOARD_SECTIONS[name]
+    user_id = request["user_claims"].get("user_id")
+    if cache_route:
+        entry = RESPONSE_CACHE.get(cache_route, user_id)
+        if entry is not None:
+            return json.loads(entry.body), None
+
+    headers = tracing.inject({"X-User-Id": str(user_id), **internal_headers()})
+    if request.headers.get("Authorization"):
+        headers["Authorization"] = request.headers["Authorization"]
+    timeout = aiohttp.ClientTimeout(total=DASHBOARD_SECTION_TIMEOUT)
+
+    async def send():
+        async with request.app["http"].get(upstream_url(service_name, path), headers=headers,
+                                           params=params, timeout=timeout) as res:
+            return web.Response(body=await res.read(), status=res.status,
+                                headers={"Content-Type": res.headers.get("Content-Type", "application/json")})
+
+    try:
+        res = await GUARDS[service_name].execute_async("GET", send, UPSTREAM_ERRORS)
+        try:
+            body = json.loads(res.body)
+        except ValueError:
+            body = None
+        if res.status >= 400:
+            return None, upstream_error(service_name, res.status, body)
+        if cache_route:
+            RESPONSE_CACHE.set(cache_route, user_id, res.body, res.headers.get("Content-Type"))
+        return body, None
+    except UpstreamUnavailable as e:
+        return None, f"{service_name} service unavailable ({e.reason})"
+    except asyncio.TimeoutError:
+        return None, f"{service_name} service timeout"
+    except aiohttp.ClientError:
+        return None, f"{service_name} service unreachable"
+
+
+@routes.get("/api/dashboard")
+@require_jwt(optional=False)
+async def dashboard(request):
+    names = list(DASHBOARD_SECTIONS)
+    results = await asyncio.gather(*(fetch_section(request, name) for name in names))
+    document, status = build_document(dict(zip(names, results)))
+    return web.json_response(document, status=status)
+
+
+# PAYEE ROUTES
+@routes.get("/api/payees")
+@routes.post("/api/payees")
+@require_jwt(optional=False)
+@invalidates("payees")
+@cached_response("payees")
+async def payees_collection(request):
+    body = await read_json(request) if request.method == "POST" else None
+    return await forward(request, "payee", "payees/", request.method, body)
+
+
+@routes.route("*", r"/api/payees/{id:\d+}")
+@require_jwt(optional=False)
+@invalidates("payees")
+async def payees_item(request):
+    if request.method not in ("GET", "PUT", "DELETE"):
+        return web.json_response({"error": "Method Not Allowed"}, status=405)
+    body = await read_json(request) if request.method == "PUT" else None
+    return await forward(request, "payee", f"payees/{request.match_info['id']}", request.method, body)
+
+
+# ROUTE INTERNAL (Diakses HANYA oleh service lain)
+@routes.post("/api/internal/wallets")
+@require_jwt(optional=True)
+async def internal_wallets_create(request):
+    body = await read_json(request)
+    return await forward(request, "wallet", "internal/wallets", "POST", body)
+
+
+@routes.get("/api/internal/wallets/by-user/{user_id}")
+@routes.delete("/api/internal/wallets/by-user/{user_id}")
+@require_jwt(optional=True)
+async def internal_wallets_by_user(request):
+    user_id = request.match_info["user_id"]
+    return await forward(request, "wallet", f"internal/wallets/by-user/{user_id}", request.method)
+
+
+@routes.put("/api/internal/wallets/{wallet_id}/balance")
+@require_jwt(optional=True)
+async def internal_wallet_balance(request):
+    body = await read_json(request)
+    wallet_id = request.match_info["wallet_id"]
+    return await forward(request, "wallet", f"internal/wallets/{wallet_id}/balance", "PUT", body)
+
+
+# HEALTH CHECK (dari state circuit breaker, tanpa probe langsung ke upstream)
+BREAKER_HEALTH = {CLOSED: "healthy", HALF_OPEN: "recovering", OPEN: "offline"}
+
+
+# INVALIDASI CACHE (fallback HTTP service-wallet saat dompet ditutup dan event bus gagal / mati).
+# Port gateway publik, jadi hanya untuk service internal (X-Internal-Secret / loopback)
+@routes.delete(r"/internal/cache/wallets/{user_id:\d+}")
+async def internal_wallet_cache_invalidate(request):
+    if not is_internal(request.headers, request.remote):
+        return web.json_response({"error": "Forbidden"}, status=403)
+    user_id = int(request.match_info["user_id"])
+    WALLET_CACHE.invalidate(user_id)
+    RESPONSE_CACHE.invalidate(user_id, "wallets_me")
+    return web.json_response({"message": "Cache dompet dihapus."})
+
+
+@routes.get("/health")
+async def health(request):
+    statuses = {name: BREAKER_HEALTH[guard.breaker.state] for name, guard in GUARDS.items()}
+    return web.json_response({"gateway": "healthy", "services": statuses})
+
+
+@routes.get("/metrics")
+async def metrics(request):
+    return web.Response(text=metrics_text(), headers={"Content-Type": METRICS_CONTENT_TYPE})
+
+
+@routes.get("/admin/upstreams")
+@require_admin
+async def admin_upstreams(request):
+    return web.json_response({name: guard.stats() for name, guard in GUARDS.items()})
+
+
+@routes.get("/")
+async def index(request):
+    return web.json_response({"message": "E-Wallet API Gateway with JWT (asyncio)", "services": SERVICES})
+
+
+# =============================
+# APP FACTORY
+# =============================
+async def open_http_session(app):
+    # Satu ClientSession (pool koneksi keep-alive) untuk seluruh proses,
+    # memakai konfigurasi HTTP_* yang sama dengan common/http_client.py
+    connector = aiohttp.TCPConnector(
+        limit=0,
+        limit_per_host=http_client.POOL_SIZE,
+        force_close=not http_client.KEEPALIVE,
+    )
+    timeout = aiohttp.ClientTimeout(sock_connect=http_client.CONNECT_TIMEOUT,
+                                    sock_read=http_client.READ_TIMEOUT)
+    app["http"] = aiohttp.ClientSession(connector=connector, timeout=timeout)
+
+
+async def start_event_consumers(app):
+    if EVENT_BUS_ENABLED:
+        EVENTS.start()
+
+
+async def close_http_session(app):
+    await app["http"].close()
+
+
+def create_app():
+    app = web.Application(middlewares=[tracing.aiohttp_middleware("gateway-async"),
+                                       aiohttp_middleware("gateway-async"), cors_middleware])
+    app.add_routes(routes)
+    app.on_startup.append(open_http_session)
+    app.on_startup.append(start_event_consumers)
+    app.on_cleanup.append(close_http_session)
+    return app
+
+
+if __name__ == "__main__":
+    port = int(os.getenv("ASYNC_GATEWAY_PORT", 3100))
+    web.run_app(create_app(), host="0.0.0.0", port=port, backlog=2048)
@@ -0,0 +1,50 @@
+# dashboard.py
+"""
+Definisi GET /api/dashboard: satu request dari frontend, empat panggilan
+upstream paralel (profil, dompet, transaksi terakhir, payee) yang digabung
+menjadi satu dokumen. Dipakai oleh app.py (thread pool) dan async_app.py
+(asyncio.gather).
+
+Setiap bagian punya batas waktu sendiri (DASHBOARD_SECTION_TIMEOUT). Bagian
+yang gagal atau lewat batas diisi null dan dicatat di "errors", bagian lain
+tetap dikirim.
+"""
+import os
+
+# Batas waktu per bagian (detik); latensi dashboard = bagian paling lambat, maks nilai ini
+DASHBOARD_SECTION_TIMEOUT = float(os.getenv("DASHBOARD_SECTION_TIMEOUT", 2))
+# Jumlah transaksi terakhir yang ditampilkan
+DASHBOARD_TRANSACTIONS_LIMIT = int(os.getenv("DASHBOARD_TRANSACTIONS_LIMIT", 5))
+# Thread untuk fan-out di gateway Flask (4 bagian per request dashboard)
+DASHBOARD_WORKERS = int(os.getenv("DASHBOARD_WORKERS", 32))
+
+# nama bagian -> (service, path, query string, rute cache respon atau None)
+SECTIONS = {
+    "profile": ("user", "users/me", None, "users_me"),
+    "wallet": ("wallet", "wallets/me", None, "wallets_me"),
+    "transactions": ("transaction", "transactions/", {"limit": DASHBOARD_TRANSACTIONS_LIMIT}, None),
+    "payees": ("payee", "payees/", None, "payees"),
+}
+
+
+def build_document(results):
+    """
+    Gabungkan hasil per bagian ({nama: (data, error)}) menjadi dokumen dashboard.
+    Status 200 jika minimal satu bagian berhasil, 503 jika semuanya gagal.
+    """
+    document = {"errors": {}}
+    for name in SECTIONS:
+        data, error = results.get(name, (None, "Tidak dijalankan"))
+        document[name] = data
+        if error:
+            document["errors"][name] = error
+    status = 503 if len(document["errors"]) == len(SECTIONS) else 200
+    return document, status
+
+
+def upstream_error(service_name, status, body):
+    """Pesan error satu bagian dari respon upstream non-2xx."""
+    message = None
+    if isinstance(body, dict):
+        message = body.get("message") or body.get("error")
+    return message or f"{service_name} service error ({status})"
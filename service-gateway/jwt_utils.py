@@ -1,35 +1,126 @@
 # jwt_utils.py
+import hashlib
 import os
+import time
 import jwt
 from jwt import ExpiredSignatureError, InvalidTokenError, DecodeError
 from functools import wraps
 from flask import request, jsonify, g
 from dotenv import load_dotenv
 
+from common.ttl_cache import TTLCache
+
 load_dotenv()
 # --- PERBAIKAN DI SINI ---
 # Gunakan nama variabel yang konsisten (JWT_SECRET_KEY)
 # Jangan gunakan default "changeme" yang berbahaya. Beri error jika tidak ada.
 JWT_SECRET = os.getenv("JWT_SECRET_KEY")
-if not JWT_SECRET:
-    raise ValueError("JWT_SECRET_KEY tidak ditemukan di file .env")
 
-# Algoritma biasanya tetap. Hardcode saja agar konsisten.
-JWT_ALGORITHM = "HS256" 
+# Algoritma yang diterima (dipisah koma). HS256 memakai JWT_SECRET_KEY;
+# RS256 / EdDSA memakai public key dari JWKS lokal (JWT_JWKS_PATH), jadi
+# service bisa verifikasi token tanpa memegang shared secret.
+JWT_ALGORITHMS = [a.strip() for a in os.getenv("JWT_ALGORITHMS", "HS256").split(",") if a.strip()]
+JWT_JWKS_PATH = os.getenv("JWT_JWKS_PATH")
 # -------------------------
 
+def load_jwks(path):
+    """Load local JSON Web Key Set -> {kid: PyJWK}. Requires 'cryptography' for RSA/EdDSA keys."""
+    with open(path) as f:
+        jwk_set = jwt.PyJWKSet.from_json(f.read())
+    return {key.key_id: key for key in jwk_set.keys}
+
+JWKS = load_jwks(JWT_JWKS_PATH) if JWT_JWKS_PATH else {}
+
+if not JWT_SECRET and not JWKS:
+    raise ValueError("JWT_SECRET_KEY (atau JWT_JWKS_PATH) tidak ditemukan di file .env")
+
+# --- CACHE KLAIM TERVERIFIKASI ---
+# Key = sha256(token), value = claims. Entry tidak pernah hidup melewati 'exp' token.
+JWT_CACHE_SIZE = int(os.getenv("JWT_CACHE_SIZE", 10000))
+JWT_CACHE_MAX_TTL = float(os.getenv("JWT_CACHE_MAX_TTL", 300))
+claims_cache = TTLCache(maxsize=JWT_CACHE_SIZE, ttl=JWT_CACHE_MAX_TTL) if JWT_CACHE_SIZE > 0 else None
+
+def verification_key(token):
+    """
+    Pick the key for this token from its (unverified) header. HMAC algorithms
+    only ever use the shared secret and asymmetric ones only the JWKS, so a
+    token cannot switch algorithm families to confuse verification.
+    """
+    header = jwt.get_unverified_header(token)
+    algorithm = header.get("alg")
+    if algorithm not in JWT_ALGORITHMS:
+        raise InvalidTokenError(f"Algoritma '{algorithm}' tidak diizinkan")
+
+    if algorithm.startswith("HS"):
+        if not JWT_SECRET:
+            raise InvalidTokenError("JWT_SECRET_KEY tidak dikonfigurasi")
+        return JWT_SECRET, algorithm
+
+    kid = header.get("kid")
+    if kid is None and len(JWKS) == 1:
+        return next(iter(JWKS.values())).key, algorithm
+    if kid not in JWKS:
+        raise InvalidTokenError(f"Key id '{kid}' tidak dikenal")
+    return JWKS[kid].key, algorithm
+
+def decode_jwt_token(token):
+    """Full signature + claims verification (no cache)."""
+    key, algorithm = verification_key(token)
+    # decode akan raise exceptions kita bisa catch upstream
+    # PERBAIKAN: Pastikan 'algorithms' adalah LIST
+    return jwt.decode(token, key, algorithms=[algorithm])
+
 def verify_jwt_token(token):
     """
     Verify JWT token and return payload (claims).
     Raises ExpiredSignatureError, InvalidTokenError on failure.
+    Successful verifications are cached by token digest until min(exp, JWT_CACHE_MAX_TTL).
     """
     if token.startswith("Bearer "):
         token = token.split(" ", 1)[1]
 
-    # decode akan raise exceptions kita bisa catch upstream
-    # PERBAIKAN: Pastikan 'algorithms' adalah LIST
-    payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
-    return payload
+    if claims_cache is None:
+        return decode_jwt_token(token)
+
+    digest = hashlib.sha256(token.encode()).digest()
+    claims = claims_cache.get(digest)
+    if claims is not None:
+        if "exp" in claims and claims["exp"] <= time.time():
+            claims_cache.pop(digest)
+            raise ExpiredSignatureError("Signature has expired")
+        return claims
+
+    claims = decode_jwt_token(token)
+    ttl = JWT_CACHE_MAX_TTL
+    if "exp" in claims:
+        ttl = min(ttl, claims["exp"] - time.time())
+    if ttl > 0:
+        claims_cache.set(digest, claims, ttl=ttl)
+    return claims
+
+def authenticate(auth, optional=False):
+    """
+    Framework-independent core of require_jwt (dipakai gateway Flask & asyncio).
+    Returns (claims, None) when the request may continue (claims is None if
+    optional=True and token absent/invalid), or (None, (body, status)) when
+    the request must be rejected.
+    """
+    if not auth:
+        if optional:
+            return None, None
+        return None, ({"error": "Authorization header required"}, 401)
+
+    try:
+        return verify_jwt_token(auth), None
+    except ExpiredSignatureError:
+        return None, ({"error": "Token expired"}, 401)
+    except (InvalidTokenError, DecodeError) as e:
+        if optional:
+            return None, None
+        return None, ({"error": "Invalid token", "details": str(e)}, 401)
+    except Exception as e:
+        # unexpected error
+        return None, ({"error": "Token validation error", "details": str(e)}, 401)
 
 def require_jwt(optional=False):
     """
@@ -40,28 +131,14 @@ def require_jwt(optional=False):
     def decorator(f):
         @wraps(f)
         def wrapper(*args, **kwargs):
-            auth = request.headers.get("Authorization", None)
-            if not auth:
-                if optional:
-                    g.user_claims = None
-                    return f(*args, **kwargs)
-                return jsonify({"error": "Authorization header required"}), 401
-
-            try:
-                claims = verify_jwt_token(auth)
-                # attach claims to request context for downstream use
-                g.user_claims = claims
-                return f(*args, **kwargs)
-            except ExpiredSignatureError:
-                return jsonify({"error": "Token expired"}), 401
-            except (InvalidTokenError, DecodeError) as e:
-                if optional:
-                    g.user_claims = None
-                    return f(*args, **kwargs)
-                return jsonify({"error": "Invalid token", "details": str(e)}), 401
-            except Exception as e:
-                # unexpected error
-                return jsonify({"error": "Token validation error", "details": str(e)}), 401
+            claims, error = authenticate(request.headers.get("Authorization", None), optional)
+            if error:
+                body, status = error
+                return jsonify(body), status
+
+            # attach claims to request context for downstream use
+            g.user_claims = claims
+            return f(*args, **kwargs)
 
         return wrapper
     return decorator
@@ -2,14 +2,24 @@
 
 from flask import Flask, request
 from flask_restx import Api, Resource, fields
+import os
+import sys
 
 # Import dari file kita sendiri
 from config import Config
 from models import db, Payee
 
+# Modul bersama (common/) berada di root repo
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from common.metrics import instrument_flask
+from common import tracing, profiling, server
+
 # --- 1. INISIALISASI APLIKASI ---
 app = Flask(__name__)
 app.config.from_object(Config)
+instrument_flask(app, 'payee')  # GET /metrics
+tracing.instrument_flask(app, 'payee')  # span per request + propagasi traceparent
+profiling.instrument_flask(app, 'payee')  # opt-in: PROFILING_ENABLED=1, lihat /admin/profile
 
 db.init_app(app)
 api = Api(app, 
@@ -124,10 +134,8 @@ class PayeeResource(Resource):
         db.session.commit()
         return {'message': 'Penerima berhasil dihapus.'}, 200
 
-# --- 5. BUAT TABEL & JALANKAN SERVER ---
-with app.app_context():
-    db.create_all()
-
+# --- 5. JALANKAN SERVER ---
+# Skema dikelola migrations.py (python migrations.py), tidak dibuat saat import
 if __name__ == '__main__':
-    # Port 3004 untuk service-payee
-    app.run(port=3004, debug=True)
\ No newline at end of file
+    # Port 3004 untuk service-payee (WEB_SERVER=gunicorn / dev, lihat common/server.py)
+    server.run(app, 'payee', 3004, db=db)
\ No newline at end of file
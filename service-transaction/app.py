@@ -1,19 +1,44 @@
 # service-transaction/app.py
 
-from flask import Flask, request
+from flask import Flask, Response, request, stream_with_context
 from flask_cors import CORS
 from flask_restx import Api, Resource, fields
 from decimal import Decimal
-import requests # Untuk memanggil API lain
+from datetime import datetime, timedelta
+import base64
+import csv
+import io
+import json
+import os
+import sys
+import requests # Untuk exception dari pemanggilan API lain
+from werkzeug.exceptions import HTTPException
 
 # Import dari file kita sendiri
 from config import Config
-from models import db, Transaction
+from models import db, Transaction, TransferOutbox
+from outbox import OutboxWorker, wait_for_transaction
+from consumers import register_consumers
+from sqlalchemy import func
+from sqlalchemy.exc import SQLAlchemyError
+
+# Modul bersama (common/) berada di root repo
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from common.http_client import get_client
+from common.idempotency import create_store, idempotent, HEADER as IDEMPOTENCY_HEADER
+from common.wallet_cache import WalletLookupCache
+from common.phone_cache import PhoneLookupCache
+from common.events import EventBus, EVENT_BUS_ENABLED
+from common.metrics import instrument_flask
+from common import tracing, profiling, server
 
 # --- 1. INISIALISASI APLIKASI ---
 app = Flask(__name__)
 app.config.from_object(Config)
 CORS(app)
+instrument_flask(app, 'transaction')  # GET /metrics
+tracing.instrument_flask(app, 'transaction')  # span per request + propagasi traceparent
+profiling.instrument_flask(app, 'transaction')  # opt-in: PROFILING_ENABLED=1, lihat /admin/profile
 
 db.init_app(app)
 api = Api(app, 
@@ -22,8 +47,42 @@ api = Api(app,
           description='Layanan untuk membuat dan melihat Transaksi (Transfer).',
           security='apiKey')
 
+# Klien HTTP (connection pool keep-alive) ke service lain
+wallet_client = get_client('wallet', app.config['WALLET_SERVICE_URL'])
+user_client = get_client('user', app.config['USER_SERVICE_URL'])
+
+# Cache user_id -> dompet (id/status) supaya riwayat & export tidak selalu memanggil service-wallet
+wallet_cache = WalletLookupCache(wallet_client)
+# Cache nomor HP -> user_id penerima
+phone_cache = PhoneLookupCache(user_client)
+
+# Hasil transfer per Idempotency-Key (retry dijawab tanpa transfer ulang)
+IDEMPOTENCY = create_store()
+
+# Event bus: transaction.created untuk consumer notifikasi, dan consumer
+# invalidasi cache dari event service-user / service-wallet (lihat consumers.py)
+events = EventBus()
+
+def publish_transactions_created(transactions):
+    if not EVENT_BUS_ENABLED:
+        return
+    try:
+        events.publish_many([('transaction.created', t) for t in transactions])
+    except Exception as e:
+        print(f"[events] Gagal publish transaction.created: {e}")
+
+# Worker yang menguras outbox transfer async (dijalankan saat server start, lihat bawah)
+outbox_worker = OutboxWorker(app, wallet_client,
+                             on_success=publish_transactions_created,
+                             workers=app.config['TRANSFER_OUTBOX_WORKERS'],
+                             batch_size=app.config['TRANSFER_OUTBOX_BATCH_SIZE'],
+                             poll_interval=app.config['TRANSFER_OUTBOX_POLL_INTERVAL'],
+                             max_attempts=app.config['TRANSFER_OUTBOX_MAX_ATTEMPTS'],
+                             claim_timeout=app.config['TRANSFER_OUTBOX_CLAIM_TIMEOUT'])
+
 # --- 2. MODEL API (Flask-RESTX) ---
 trans_ns = api.namespace('transactions', description='Operasi Transaksi (Butuh Token)')
+internal_ns = api.namespace('internal', description='Operasi Internal (Antar Service)')
 
 transaction_model = api.model('Transaction', {
     'id': fields.Integer,
@@ -42,6 +101,11 @@ transfer_input_model = api.model('TransferInput', {
     'description': fields.String(description='Catatan untuk penerima')
 })
 
+batch_transfer_input_model = api.model('BatchTransferInput', {
+    'items': fields.List(fields.Nested(transfer_input_model), required=True,
+                         description='Daftar transfer (receiver_phone, amount, description)')
+})
+
 # --- 3. HELPER (Ambil User ID dari Header) ---
 def get_user_id_from_header():
     user_id = request.headers.get('X-User-Id')
@@ -49,32 +113,153 @@ def get_user_id_from_header():
         api.abort(401, 'Header X-User-Id tidak ada. Request harus melalui API Gateway.')
     return int(user_id)
 
+# --- HELPER PAGINATION (keyset pada (created_at, id)) ---
+def wants_async():
+    """Klien meminta mode async dengan header 'Prefer: respond-async' (RFC 7240)."""
+    prefer = request.headers.get('Prefer', '')
+    return 'respond-async' in [p.strip().lower() for p in prefer.split(',')]
+
+def encode_cursor(transaction):
+    raw = json.dumps([transaction.created_at.isoformat(), transaction.id])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_cursor(cursor):
+    try:
+        created_at, tx_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(created_at), int(tx_id)
+    except (ValueError, TypeError):
+        api.abort(400, 'Parameter cursor tidak valid.')
+
+def parse_time_param(name, end_of_day=False):
+    """Parse ?from= / ?to= (ISO 8601). Tanggal saja untuk 'to' berarti sampai akhir hari itu."""
+    value = request.args.get(name)
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        api.abort(400, f'Parameter {name} harus format ISO 8601 (cth: 2024-01-31 atau 2024-01-31T10:00:00).')
+    if end_of_day and len(value) == 10:
+        parsed += timedelta(days=1)
+    return parsed
+
+def history_page(wallet_id, limit, cursor=None, time_from=None, time_to=None, tx_type=None):
+    """
+    Satu halaman riwayat (terbaru dulu). Sisi pengirim dan penerima di-query
+    terpisah supaya masing-masing memakai index komposit (wallet, created_at, id),
+    lalu digabung. Biaya query bergantung pada `limit`, bukan panjang riwayat.
+    """
+    def side(column):
+        query = Transaction.query.filter(column == wallet_id)
+        if time_from:
+            query = query.filter(Transaction.created_at >= time_from)
+        if time_to:
+            query = query.filter(Transaction.created_at < time_to)
+        if tx_type:
+            query = query.filter(Transaction.type == tx_type)
+        if cursor:
+            created_at, tx_id = cursor
+            query = query.filter(db.or_(
+                Transaction.created_at < created_at,
+                db.and_(Transaction.created_at == created_at, Transaction.id < tx_id)
+            ))
+        return query.order_by(Transaction.created_at.desc(), Transaction.id.desc()).limit(limit + 1).all()
+
+    merged = {t.id: t for t in side(Transaction.sender_wallet_id) + side(Transaction.receiver_wallet_id)}
+    rows = sorted(merged.values(), key=lambda t: (t.created_at, t.id), reverse=True)
+    next_cursor = encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+# --- HELPER EXPORT (streaming, memori tetap datar) ---
+EXPORT_COLUMNS = ['id', 'sender_wallet_id', 'receiver_wallet_id', 'type', 'amount',
+                  'description', 'status', 'created_at']
+
+def export_batches(wallet_id, time_from=None, time_to=None, tx_type=None):
+    """
+    Ambil riwayat per batch lewat server-side cursor (yield_per), tanpa membuat
+    object ORM. Hanya satu batch yang ada di memori pada satu waktu.
+    """
+    table = Transaction.__table__
+    stmt = db.select(*[table.c[name] for name in EXPORT_COLUMNS]).where(
+        db.or_(table.c.sender_wallet_id == wallet_id, table.c.receiver_wallet_id == wallet_id)
+    )
+    if time_from:
+        stmt = stmt.where(table.c.created_at >= time_from)
+    if time_to:
+        stmt = stmt.where(table.c.created_at < time_to)
+    if tx_type:
+        stmt = stmt.where(table.c.type == tx_type)
+    stmt = stmt.order_by(table.c.created_at.desc(), table.c.id.desc()) \
+        .execution_options(yield_per=app.config['EXPORT_BATCH_SIZE'])
+
+    for batch in db.session.execute(stmt).partitions():
+        yield [
+            {**row._asdict(),
+             'amount': str(row.amount),
+             'created_at': row.created_at.isoformat() if row.created_at else None}
+            for row in batch
+        ]
+
+def ndjson_stream(batches):
+    for batch in batches:
+        yield ''.join(json.dumps(item) + '\n' for item in batch)
+
+def csv_stream(batches):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS)
+    writer.writeheader()
+    for batch in batches:
+        writer.writerows(batch)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+EXPORT_FORMATS = {
+    'ndjson': (ndjson_stream, 'application/x-ndjson'),
+    'csv': (csv_stream, 'text/csv'),
+}
+
 # --- 4. ENDPOINTS (Logika Inti Transfer) ---
 
 @trans_ns.route('/')
 class TransactionList(Resource):
     
-    @trans_ns.doc('get_my_transactions', security='apiKey')
+    @trans_ns.doc('get_my_transactions', security='apiKey', params={
+        'limit': 'Jumlah item per halaman',
+        'cursor': 'Cursor dari header X-Next-Cursor halaman sebelumnya',
+        'from': 'Mulai tanggal/waktu (ISO 8601, inklusif)',
+        'to': 'Sampai tanggal/waktu (ISO 8601, eksklusif; tanggal saja = sampai akhir hari)',
+        'type': 'Filter jenis transaksi (transfer, topup, payment)'
+    })
     @trans_ns.marshal_list_with(transaction_model)
     def get(self):
-        """(R)EAD: Mendapatkan riwayat transaksi saya"""
+        """(R)EAD: Mendapatkan riwayat transaksi saya (per halaman, terbaru dulu)"""
         user_id = get_user_id_from_header()
+
+        try:
+            limit = int(request.args.get('limit', app.config['TRANSACTIONS_PAGE_SIZE']))
+        except ValueError:
+            api.abort(400, 'Parameter limit harus angka.')
+        limit = max(1, min(limit, app.config['TRANSACTIONS_MAX_PAGE_SIZE']))
+        cursor = decode_cursor(request.args['cursor']) if request.args.get('cursor') else None
+        time_from = parse_time_param('from')
+        time_to = parse_time_param('to', end_of_day=True)
         
         try:
-            # Panggilan ini sudah benar (menggunakan /internal/)
-            wallet_resp = requests.get(f"{app.config['WALLET_SERVICE_URL']}/internal/wallets/by-user/{user_id}")
-            wallet_resp.raise_for_status()
-            my_wallet_id = wallet_resp.json()['id']
+            my_wallet_id = wallet_cache.get(user_id)['id']
         except requests.exceptions.RequestException as e:
             return api.abort(503, f'Tidak bisa mengambil data dompet: {e}')
-            
-        transactions = Transaction.query.filter(
-            (Transaction.sender_wallet_id == my_wallet_id) | 
-            (Transaction.receiver_wallet_id == my_wallet_id)
-        ).order_by(Transaction.created_at.desc()).all()
-        
-        return [t.to_dict() for t in transactions]
 
+        transactions, next_cursor = history_page(my_wallet_id, limit, cursor, time_from, time_to,
+                                                 request.args.get('type'))
+
+        # Body tetap berupa list; cursor halaman berikutnya dikirim lewat header
+        headers = {'X-Next-Cursor': next_cursor} if next_cursor else {}
+        return [t.to_dict() for t in transactions], 200, headers
+
+    @idempotent(IDEMPOTENCY, scope=lambda: request.headers.get('X-User-Id', ''))
     @trans_ns.doc('create_transfer', security='apiKey')
     @trans_ns.expect(transfer_input_model)
     @trans_ns.marshal_with(transaction_model, code=201)
@@ -89,45 +274,37 @@ class TransactionList(Resource):
             api.abort(400, 'Jumlah transfer harus positif.')
             
         try:
-            # 1. Dapatkan info dompet SAYA (PENGIRIM)
-            wallet_sender_resp = requests.get(f"{app.config['WALLET_SERVICE_URL']}/internal/wallets/by-user/{sender_user_id}")
-            wallet_sender_resp.raise_for_status() 
-            sender_wallet = wallet_sender_resp.json()
-            sender_wallet_id = sender_wallet['id']
-            sender_balance = Decimal(sender_wallet['balance'])
-            
-            # 2. Cek Saldo Pengirim
-            if sender_balance < amount_to_transfer:
-                api.abort(400, 'Saldo tidak mencukupi.')
-
-            # --- PERBAIKAN DI BARIS BERIKUTNYA ---
-            # 3. Dapatkan info user PENERIMA (Panggil service-user)
-            # Tambahkan prefix /users/
-            user_receiver_resp = requests.get(f"{app.config['USER_SERVICE_URL']}/users/internal/by-phone/{receiver_phone}")
-            user_receiver_resp.raise_for_status()
-            receiver_user_id = user_receiver_resp.json()['id']
+            # 1. Dapatkan info user PENERIMA (Panggil service-user)
+            receiver_user_id = phone_cache.get(receiver_phone)
             
             if sender_user_id == receiver_user_id:
                 api.abort(400, 'Tidak bisa transfer ke diri sendiri.')
 
-            # 4. Dapatkan info dompet PENERIMA
-            wallet_receiver_resp = requests.get(f"{app.config['WALLET_SERVICE_URL']}/internal/wallets/by-user/{receiver_user_id}")
-            wallet_receiver_resp.raise_for_status()
-            receiver_wallet_id = wallet_receiver_resp.json()['id']
+            if wants_async():
+                return self.accept_async(sender_user_id, receiver_user_id, amount_to_transfer, data)
 
             # --- EKSEKUSI ---
+
+            # 2. DEBIT pengirim + CREDIT penerima dalam SATU panggilan ke service-wallet.
+            #    Service-wallet mengunci kedua dompet dan cek saldo di satu transaksi DB,
+            #    jadi tidak ada lagi kondisi "sudah didebit tapi belum dikredit".
+            transfer_payload = {
+                'sender_user_id': sender_user_id,
+                'receiver_user_id': receiver_user_id,
+                'amount': data['amount']
+            }
+            transfer_headers = {}
+            idempotency_key = request.headers.get(IDEMPOTENCY_HEADER)
+            if idempotency_key:
+                transfer_headers[IDEMPOTENCY_HEADER] = f"transfer:{sender_user_id}:{idempotency_key}"
+            transfer_resp = wallet_client.post("internal/wallets/transfer", json=transfer_payload,
+                                               headers=transfer_headers)
+            transfer_resp.raise_for_status()
+            wallets = transfer_resp.json()
+            sender_wallet_id = wallets['sender']['id']
+            receiver_wallet_id = wallets['receiver']['id']
             
-            # 5. DEBIT Saldo Pengirim
-            debit_payload = {'type': 'debit', 'amount': data['amount']}
-            debit_resp = requests.put(f"{app.config['WALLET_SERVICE_URL']}/internal/wallets/{sender_wallet_id}/balance", json=debit_payload)
-            debit_resp.raise_for_status()
-
-            # 6. CREDIT Saldo Penerima
-            credit_payload = {'type': 'credit', 'amount': data['amount']}
-            credit_resp = requests.put(f"{app.config['WALLET_SERVICE_URL']}/internal/wallets/{receiver_wallet_id}/balance", json=credit_payload)
-            credit_resp.raise_for_status()
-            
-            # 7. CATAT Transaksi
+            # 3. CATAT Transaksi
             new_transaction = Transaction(
                 sender_wallet_id=sender_wallet_id,
                 receiver_wallet_id=receiver_wallet_id,
@@ -138,9 +315,14 @@ class TransactionList(Resource):
             )
             db.session.add(new_transaction)
             db.session.commit()
+            publish_transactions_created([new_transaction.to_dict()])
             
             return new_transaction.to_dict(), 201
 
+        except HTTPException:
+            # api.abort() di atas harus diteruskan apa adanya (bukan jadi 500)
+            raise
+
         # Error Handler yang sudah Robust (Bagus!)
         except requests.exceptions.HTTPError as e:
             status_code = e.response.status_code if e.response is not None else 500
@@ -159,11 +341,278 @@ class TransactionList(Resource):
             db.session.rollback()
             return api.abort(500, f'Terjadi error internal: {e}')
 
+    def accept_async(self, sender_user_id, receiver_user_id, amount, data):
+        """
+        Mode async: catat Transaction 'pending' + baris outbox dalam satu commit,
+        lalu jawab 202. Debit/kredit dikerjakan outbox_worker.
+        """
+        # Id dompet dari cache (tanpa menyentuh saldo); dikoreksi worker dari respon service-wallet
+        sender_wallet_id = wallet_cache.get(sender_user_id)['id']
+        receiver_wallet_id = wallet_cache.get(receiver_user_id)['id']
+
+        new_transaction = Transaction(
+            sender_wallet_id=sender_wallet_id,
+            receiver_wallet_id=receiver_wallet_id,
+            type='transfer',
+            amount=amount,
+            description=data.get('description'),
+            status='pending'
+        )
+        db.session.add(new_transaction)
+        db.session.flush()  # butuh id untuk baris outbox
+        db.session.add(TransferOutbox(
+            transaction_id=new_transaction.id,
+            sender_user_id=sender_user_id,
+            receiver_user_id=receiver_user_id,
+            amount=amount
+        ))
+        db.session.commit()
+        outbox_worker.wake()
+
+        return new_transaction.to_dict(), 202, {
+            'Location': f'/transactions/{new_transaction.id}',
+            'Preference-Applied': 'respond-async'
+        }
+
+
+@trans_ns.route('/<int:transaction_id>')
+class TransactionItem(Resource):
+
+    @trans_ns.doc('get_transaction_status', security='apiKey', params={
+        'wait': 'Long-poll: tunggu maksimal N detik selama status masih pending'
+    })
+    def get(self, transaction_id):
+        """(R)EAD: Status satu transaksi saya (dengan long-poll untuk transfer async)"""
+        user_id = get_user_id_from_header()
+        try:
+            wait = float(request.args.get('wait', 0))
+        except ValueError:
+            api.abort(400, 'Parameter wait harus angka.')
+        wait = max(0.0, min(wait, app.config['TRANSFER_MAX_WAIT']))
+
+        try:
+            my_wallet_id = wallet_cache.get(user_id)['id']
+        except requests.exceptions.RequestException as e:
+            return api.abort(503, f'Tidak bisa mengambil data dompet: {e}')
+
+        transaction = wait_for_transaction(outbox_worker if outbox_worker.workers else None,
+                                           transaction_id, wait)
+        if not transaction or my_wallet_id not in (transaction.sender_wallet_id, transaction.receiver_wallet_id):
+            api.abort(404, 'Transaksi tidak ditemukan.')
+
+        result = transaction.to_dict()
+        if transaction.status == 'failed':
+            job = TransferOutbox.query.filter_by(transaction_id=transaction.id).first()
+            result['error'] = job.last_error if job else None
+        return result, 200
+
+
+@trans_ns.route('/export')
+class TransactionExport(Resource):
+
+    @trans_ns.doc('export_my_transactions', security='apiKey', params={
+        'format': 'ndjson (default) atau csv',
+        'from': 'Mulai tanggal/waktu (ISO 8601, inklusif)',
+        'to': 'Sampai tanggal/waktu (ISO 8601, eksklusif; tanggal saja = sampai akhir hari)',
+        'type': 'Filter jenis transaksi (transfer, topup, payment)'
+    })
+    def get(self):
+        """(R)EAD: Export seluruh riwayat transaksi saya (streaming NDJSON/CSV)"""
+        user_id = get_user_id_from_header()
+        export_format = request.args.get('format', 'ndjson')
+        if export_format not in EXPORT_FORMATS:
+            api.abort(400, 'Format harus "ndjson" atau "csv".')
+        time_from = parse_time_param('from')
+        time_to = parse_time_param('to', end_of_day=True)
+
+        try:
+            my_wallet_id = wallet_cache.get(user_id)['id']
+        except requests.exceptions.RequestException as e:
+            return api.abort(503, f'Tidak bisa mengambil data dompet: {e}')
+
+        stream, mimetype = EXPORT_FORMATS[export_format]
+        batches = export_batches(my_wallet_id, time_from, time_to, request.args.get('type'))
+        return Response(
+            stream_with_context(stream(batches)),
+            mimetype=mimetype,
+            headers={'Content-Disposition': f'attachment; filename=transactions.{export_format}'}
+        )
+
+
+@trans_ns.route('/batch')
+class TransactionBatch(Resource):
+
+    @idempotent(IDEMPOTENCY, scope=lambda: request.headers.get('X-User-Id', ''))
+    @trans_ns.doc('create_batch_transfer', security='apiKey')
+    @trans_ns.expect(batch_transfer_input_model)
+    def post(self):
+        """(C)REATE: Transfer massal (payroll) dari saya ke banyak penerima"""
+        sender_user_id = get_user_id_from_header()
+        items = api.payload.get('items') or []
+        if not items:
+            api.abort(400, 'Daftar transfer kosong.')
+        if len(items) > app.config['BATCH_TRANSFER_MAX_ITEMS']:
+            api.abort(400, f"Maksimal {app.config['BATCH_TRANSFER_MAX_ITEMS']} transfer per batch.")
+
+        results = [None] * len(items)
+        try:
+            # 1. Resolve semua penerima sekaligus (cache + batch lookup ke service-user)
+            receivers = phone_cache.get_many([item['receiver_phone'] for item in items])
+
+            credits = []
+            credit_index = []  # posisi item asli untuk setiap credit
+            for index, item in enumerate(items):
+                receiver_user_id = receivers.get(item['receiver_phone'])
+                if receiver_user_id is None:
+                    results[index] = {'index': index, 'status': 'failed',
+                                      'message': 'User tidak ditemukan atau akun tidak aktif'}
+                    continue
+                credits.append({'receiver_user_id': receiver_user_id, 'amount': item['amount']})
+                credit_index.append(index)
+
+            # 2. Debit sekali untuk total + kredit semua penerima: SATU panggilan ke service-wallet
+            wallet_results = []
+            if credits:
+                batch_headers = {}
+                idempotency_key = request.headers.get(IDEMPOTENCY_HEADER)
+                if idempotency_key:
+                    batch_headers[IDEMPOTENCY_HEADER] = f"batch:{sender_user_id}:{idempotency_key}"
+                batch_resp = wallet_client.post("internal/wallets/transfer/batch", headers=batch_headers,
+                                                json={'sender_user_id': sender_user_id, 'credits': credits})
+                batch_resp.raise_for_status()
+                batch = batch_resp.json()
+                sender_wallet_id = batch['sender']['id']
+                wallet_results = batch['results']
+
+            # 3. CATAT semua transaksi sukses dengan satu bulk insert
+            created_at = datetime.utcnow()
+            rows = []
+            for wallet_result in wallet_results:
+                index = credit_index[wallet_result['index']]
+                if wallet_result['status'] != 'success':
+                    results[index] = {'index': index, 'status': 'failed', 'message': wallet_result['message']}
+                    continue
+                item = items[index]
+                rows.append({
+                    'sender_wallet_id': sender_wallet_id,
+                    'receiver_wallet_id': wallet_result['receiver_wallet_id'],
+                    'type': 'transfer',
+                    'amount': Decimal(str(item['amount'])),
+                    'description': item.get('description'),
+                    'status': 'success',
+                    'created_at': created_at
+                })
+                results[index] = {'index': index, 'status': 'success',
+                                  'receiver_phone': item['receiver_phone'],
+                                  'receiver_wallet_id': wallet_result['receiver_wallet_id']}
+            succeeded = len(rows)
+            summary = {
+                'total_amount': str(sum((row['amount'] for row in rows), Decimal('0'))),
+                'succeeded': succeeded,
+                'failed': len(items) - succeeded,
+                'results': results
+            }
+            if rows:
+                try:
+                    db.session.execute(db.insert(Transaction), rows)
+                    db.session.commit()
+                except SQLAlchemyError as e:
+                    # Saldo SUDAH dipindah service-wallet tetapi riwayatnya tidak tercatat.
+                    # Jawaban 5xx tidak disimpan Idempotency-Key, jadi retry dengan key yang sama
+                    # mendapat hasil batch yang sama dari service-wallet (tanpa debit ulang) dan
+                    # mencoba mencatat lagi; tanpa key, baris di log ini bahan rekonsiliasi manual.
+                    db.session.rollback()
+                    print(f"[batch] Gagal mencatat {succeeded} transaksi setelah saldo dipindah: {e} | "
+                          f"{json.dumps(rows, default=str)}")
+                    message = ('Saldo sudah dipindah tetapi transaksi gagal dicatat. '
+                               + ('Ulangi dengan Idempotency-Key yang sama untuk mencatat ulang.'
+                                  if request.headers.get(IDEMPOTENCY_HEADER)
+                                  else 'Jangan ulangi; hubungi admin untuk rekonsiliasi.'))
+                    return {'message': message, 'recorded': False, **summary}, 500
+                publish_transactions_created(rows)
+
+            return summary, 201 if succeeded else 400
+
+        except requests.exceptions.HTTPError as e:
+            status_code = e.response.status_code if e.response is not None else 500
+            try:
+                error_message = e.response.json().get('message', 'Error internal di service lain.')
+            except requests.exceptions.JSONDecodeError:
+                error_message = f"Error saat memanggil service lain (Status {status_code})."
+            return api.abort(status_code, error_message)
+        except requests.exceptions.RequestException as e:
+            return api.abort(503, f'Layanan eksternal tidak tersedia: {e}')
+
+
+# --- 5. ENDPOINTS INTERNAL (Cache & Rekonsiliasi) ---
+
+# Dipanggil service-wallet saat dompet ditutup
+@internal_ns.route('/cache/wallets/<int:user_id>')
+class InternalWalletCacheEntry(Resource):
+    @internal_ns.doc('internal_invalidate_wallet_cache')
+    def delete(self, user_id):
+        """(D)ELETE: (INTERNAL) Hapus cache dompet milik user"""
+        wallet_cache.invalidate(user_id)
+        return {'message': 'Cache dompet dihapus.'}, 200
+
+# Dipanggil service-user saat nomor HP berubah / akun ditutup
+@internal_ns.route('/cache/phones/<string:phone>')
+class InternalPhoneCacheEntry(Resource):
+    @internal_ns.doc('internal_invalidate_phone_cache')
+    def delete(self, phone):
+        """(D)ELETE: (INTERNAL) Hapus cache nomor HP"""
+        phone_cache.invalidate(phone)
+        return {'message': 'Cache nomor HP dihapus.'}, 200
+
+@internal_ns.route('/outbox/stats')
+class InternalOutboxStats(Resource):
+    @internal_ns.doc('internal_outbox_stats')
+    def get(self):
+        """(R)EAD: (INTERNAL) Statistik worker outbox dan jumlah transfer yang masih antri"""
+        pending = TransferOutbox.query.filter(TransferOutbox.processed_at.is_(None)).count()
+        return {'pending': pending, **outbox_worker.stats()}, 200
+
+@internal_ns.route('/cache/stats')
+class InternalCacheStats(Resource):
+    @internal_ns.doc('internal_cache_stats')
+    def get(self):
+        """(R)EAD: (INTERNAL) Statistik hit/miss cache"""
+        return {'wallets': wallet_cache.stats(), 'phones': phone_cache.stats()}, 200
+
+# Dipakai untuk rekonsiliasi dengan ledger service-wallet (GET /internal/ledger/summary)
+@internal_ns.route('/transactions/summary')
+class InternalTransactionSummary(Resource):
+    @internal_ns.doc('internal_transaction_summary', params={'from': 'Waktu awal ISO 8601', 'to': 'Waktu akhir ISO 8601'})
+    def get(self):
+        """(R)EAD: (INTERNAL) Total transfer sukses per dompet (debit = dikirim, credit = diterima)"""
+        time_from = parse_time_param('from')
+        time_to = parse_time_param('to', end_of_day=True)
+
+        summary = {}
+        for column, side in ((Transaction.sender_wallet_id, 'debit'), (Transaction.receiver_wallet_id, 'credit')):
+            query = (
+                db.session.query(column, func.sum(Transaction.amount))
+                .filter(Transaction.type == 'transfer', Transaction.status == 'success')
+            )
+            if time_from:
+                query = query.filter(Transaction.created_at >= time_from)
+            if time_to:
+                query = query.filter(Transaction.created_at < time_to)
+            for wallet_id, amount in query.group_by(column):
+                totals = summary.setdefault(str(wallet_id), {'debit': '0.00', 'credit': '0.00'})
+                totals[side] = str(amount)
+        return {'wallets': summary}, 200
+
 
-# --- 5. BUAT TABEL & JALANKAN SERVER ---
-with app.app_context():
-    db.create_all()
+# --- 6. JALANKAN SERVER ---
+# Skema dikelola migrations.py (python migrations.py), tidak dibuat saat import
+def start_background():
+    """Thread latar; dipanggil sekali di setiap proses yang melayani request (lihat common/server.py)."""
+    outbox_worker.start()
+    if EVENT_BUS_ENABLED:
+        register_consumers(events, wallet_cache, phone_cache)
+        events.start()
 
 if __name__ == '__main__':
-    # Port 3003 untuk service-transaction
-    app.run(port=3003, debug=True)
\ No newline at end of file
+    # Port 3003 untuk service-transaction (WEB_SERVER=gunicorn / dev)
+    server.run(app, 'transaction', 3003, db=db, background=start_background)
\ No newline at end of file
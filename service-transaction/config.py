@@ -13,4 +13,30 @@ class Config:
     # --- URL LAYANAN LAIN ---
     # URL ini digunakan untuk memanggil service user dan wallet
     USER_SERVICE_URL = os.getenv('USER_SERVICE_URL', 'http://localhost:3001')
-    WALLET_SERVICE_URL = os.getenv('WALLET_SERVICE_URL', 'http://localhost:3002')
\ No newline at end of file
+    WALLET_SERVICE_URL = os.getenv('WALLET_SERVICE_URL', 'http://localhost:3002')
+
+    # --- PAGINATION RIWAYAT ---
+    TRANSACTIONS_PAGE_SIZE = int(os.getenv('TRANSACTIONS_PAGE_SIZE', 50))
+    TRANSACTIONS_MAX_PAGE_SIZE = int(os.getenv('TRANSACTIONS_MAX_PAGE_SIZE', 200))
+
+    # --- EXPORT RIWAYAT (streaming) ---
+    # Jumlah baris yang diambil dari DB per batch (server-side cursor)
+    EXPORT_BATCH_SIZE = int(os.getenv('EXPORT_BATCH_SIZE', 1000))
+
+    # --- TRANSFER MASSAL ---
+    BATCH_TRANSFER_MAX_ITEMS = int(os.getenv('BATCH_TRANSFER_MAX_ITEMS', 5000))
+
+    # --- TRANSFER ASYNC (Prefer: respond-async) ---
+    # Jumlah thread worker yang menguras outbox (0 = worker tidak dijalankan di proses ini)
+    TRANSFER_OUTBOX_WORKERS = int(os.getenv('TRANSFER_OUTBOX_WORKERS', 2))
+    # Baris outbox yang diklaim per putaran worker
+    TRANSFER_OUTBOX_BATCH_SIZE = int(os.getenv('TRANSFER_OUTBOX_BATCH_SIZE', 50))
+    # Jeda polling saat outbox kosong (detik)
+    TRANSFER_OUTBOX_POLL_INTERVAL = float(os.getenv('TRANSFER_OUTBOX_POLL_INTERVAL', 1.0))
+    # Percobaan maksimum untuk error sementara (5xx / timeout) sebelum transfer ditandai gagal
+    TRANSFER_OUTBOX_MAX_ATTEMPTS = int(os.getenv('TRANSFER_OUTBOX_MAX_ATTEMPTS', 10))
+    # Baris yang diklaim worker tidak diambil worker lain selama ini (detik); jika worker
+    # mati di tengah batch, barisnya otomatis tersedia lagi setelahnya
+    TRANSFER_OUTBOX_CLAIM_TIMEOUT = float(os.getenv('TRANSFER_OUTBOX_CLAIM_TIMEOUT', 300))
+    # Batas ?wait= (detik) untuk long-poll status transaksi
+    TRANSFER_MAX_WAIT = float(os.getenv('TRANSFER_MAX_WAIT', 30))
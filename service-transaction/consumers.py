@@ -0,0 +1,27 @@
+# service-transaction/consumers.py
+# Consumer event bus untuk service-transaction: invalidasi cache dari event
+# service-user / service-wallet, dan notifikasi transaksi (per batch).
+# Event bisa datang lebih dari sekali, jadi semua handler idempoten.
+
+
+def register_consumers(events, wallet_cache, phone_cache):
+    def on_cache_events(batch):
+        for event in batch:
+            if event.topic == 'user.closed':
+                phone_cache.invalidate(event.payload['phone_number'])
+            elif event.topic == 'user.phone_changed':
+                phone_cache.invalidate(event.payload['old_phone'])
+            elif event.topic == 'wallet.closed':
+                wallet_cache.invalidate(event.payload['user_id'])
+
+    def on_transactions_created(batch):
+        # Pengganti sementara kanal notifikasi (push/email) ke pengirim & penerima
+        for event in batch:
+            t = event.payload
+            print(f"[notifikasi] Transfer {t['amount']} dari dompet {t['sender_wallet_id']} "
+                  f"ke dompet {t['receiver_wallet_id']} berhasil")
+
+    # Cache in-memory per worker: setiap proses menerima semua event invalidasi
+    events.subscribe('transaction-cache', ['user.closed', 'user.phone_changed', 'wallet.closed'], on_cache_events,
+                     per_process=True)
+    events.subscribe('notifications', ['transaction.created'], on_transactions_created)
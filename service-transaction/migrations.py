@@ -0,0 +1,70 @@
+# service-transaction/migrations.py
+# Migrasi skema db_transactions. Jalankan sebelum start service (app.py tidak lagi membuat tabel):
+#   python migrations.py [--status] [--to VERSI]
+# Tambah perubahan skema sebagai Migration baru di akhir daftar, jangan ubah yang lama.
+
+import os
+import sys
+
+import sqlalchemy as sa
+from flask import Flask
+
+from config import Config
+from models import db
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from common.migrations import Migration, create_index, create_table, drop_index, main
+
+
+def baseline(conn):
+    create_table(conn, sa.Table(
+        'transaction', sa.MetaData(),
+        sa.Column('id', sa.Integer, primary_key=True),
+        sa.Column('sender_wallet_id', sa.Integer, nullable=False, index=True),
+        sa.Column('receiver_wallet_id', sa.Integer, nullable=False, index=True),
+        sa.Column('type', sa.String(20), nullable=False),
+        sa.Column('amount', sa.Numeric(15, 2), nullable=False),
+        sa.Column('description', sa.String(255), nullable=True),
+        sa.Column('status', sa.String(20), nullable=False),
+        sa.Column('created_at', sa.DateTime),
+    ))
+
+
+def history_indexes(conn):
+    # Keyset pagination riwayat: (dompet, created_at, id). Index tunggal lama
+    # adalah prefiks index komposit ini, jadi dihapus (menghemat biaya INSERT)
+    create_index(conn, 'transaction', 'ix_transaction_sender_created', 'sender_wallet_id', 'created_at', 'id')
+    create_index(conn, 'transaction', 'ix_transaction_receiver_created', 'receiver_wallet_id', 'created_at', 'id')
+    drop_index(conn, 'transaction', 'ix_transaction_sender_wallet_id')
+    drop_index(conn, 'transaction', 'ix_transaction_receiver_wallet_id')
+
+
+def transfer_outbox(conn):
+    create_table(conn, sa.Table(
+        'transfer_outbox', sa.MetaData(),
+        sa.Column('id', sa.Integer, primary_key=True),
+        sa.Column('transaction_id', sa.Integer, unique=True, nullable=False),
+        sa.Column('sender_user_id', sa.Integer, nullable=False),
+        sa.Column('receiver_user_id', sa.Integer, nullable=False),
+        sa.Column('amount', sa.Numeric(15, 2), nullable=False),
+        sa.Column('attempts', sa.Integer, nullable=False),
+        sa.Column('next_attempt_at', sa.DateTime, nullable=False),
+        sa.Column('last_error', sa.String(255), nullable=True),
+        sa.Column('processed_at', sa.DateTime, nullable=True),
+        sa.Column('created_at', sa.DateTime),
+        sa.Index('ix_outbox_pending', 'processed_at', 'next_attempt_at'),
+    ))
+
+
+MIGRATIONS = [
+    Migration(1, 'Tabel transaction', baseline),
+    Migration(2, 'Index komposit riwayat transaksi (dompet, created_at, id)', history_indexes),
+    Migration(3, 'Tabel transfer_outbox (transfer async)', transfer_outbox),
+]
+
+
+if __name__ == '__main__':
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    db.init_app(app)
+    main(app, db, MIGRATIONS)
@@ -6,11 +6,18 @@ from datetime import datetime
 db = SQLAlchemy()
 
 class Transaction(db.Model):
+    # Index komposit (dompet, created_at, id) untuk keyset pagination riwayat,
+    # sekaligus menggantikan index tunggal di sender/receiver_wallet_id
+    __table_args__ = (
+        db.Index('ix_transaction_sender_created', 'sender_wallet_id', 'created_at', 'id'),
+        db.Index('ix_transaction_receiver_created', 'receiver_wallet_id', 'created_at', 'id'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     # ID dompet PENGIRIM (dari service-wallet)
-    sender_wallet_id = db.Column(db.Integer, nullable=False, index=True)
+    sender_wallet_id = db.Column(db.Integer, nullable=False)
     # ID dompet PENERIMA (dari service-wallet)
-    receiver_wallet_id = db.Column(db.Integer, nullable=False, index=True)
+    receiver_wallet_id = db.Column(db.Integer, nullable=False)
     
     # Jenis transaksi
     type = db.Column(db.String(20), nullable=False, default='transfer') # 'transfer', 'topup', 'payment'
@@ -31,4 +38,29 @@ class Transaction(db.Model):
             'description': self.description,
             'status': self.status,
             'created_at': self.created_at.isoformat()
-        }
\ No newline at end of file
+        }
+
+
+class TransferOutbox(db.Model):
+    """
+    Pekerjaan transfer yang belum dieksekusi ke service-wallet (mode async).
+    Ditulis di transaksi DB yang sama dengan Transaction 'pending', lalu
+    dikuras oleh worker (lihat outbox.py).
+    """
+    __table_args__ = (
+        # Worker mencari: processed_at IS NULL AND next_attempt_at <= sekarang
+        db.Index('ix_outbox_pending', 'processed_at', 'next_attempt_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    transaction_id = db.Column(db.Integer, unique=True, nullable=False)
+    sender_user_id = db.Column(db.Integer, nullable=False)
+    receiver_user_id = db.Column(db.Integer, nullable=False)
+    amount = db.Column(db.Numeric(15, 2), nullable=False)
+
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    last_error = db.Column(db.String(255), nullable=True)
+    processed_at = db.Column(db.DateTime, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
@@ -0,0 +1,228 @@
+# service-transaction/outbox.py
+# Worker transfer async: request hanya menulis Transaction 'pending' + baris
+# TransferOutbox lalu menjawab 202; thread di sini yang memanggil service-wallet
+# dan menandai transaksi 'success' / 'failed'. Latensi request jadi tidak
+# bergantung pada latensi service lain.
+
+import threading
+import time
+from datetime import datetime, timedelta
+
+import requests
+
+from models import db, Transaction, TransferOutbox
+
+# Status HTTP dari service-wallet yang layak dicoba ulang (bukan kesalahan permintaan).
+# Aman karena common/idempotency.py tidak menyimpan jawaban 409/429 untuk Idempotency-Key
+RETRYABLE_STATUS = (409, 429)
+
+
+class OutboxWorker:
+    def __init__(self, app, wallet_client, workers, batch_size, poll_interval, max_attempts, on_success=None,
+                 claim_timeout=300):
+        self.app = app
+        self.wallet_client = wallet_client
+        # Dipanggil setelah commit dengan list to_dict() transaksi yang berhasil
+        self.on_success = on_success
+        self.workers = workers
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.claim_timeout = claim_timeout
+
+        self._wake = threading.Event()
+        # Dibangunkan setiap ada transaksi selesai (untuk long-poll di proses yang sama)
+        self._done = threading.Condition()
+        self._lock = threading.Lock()
+        self._counters = {'processed': 0, 'succeeded': 0, 'failed': 0, 'retried': 0}
+        self._threads = []
+
+    # =============================
+    # API UNTUK REQUEST HANDLER
+    # =============================
+    def wake(self):
+        """Dipanggil setelah baris outbox baru di-commit supaya tidak menunggu poll_interval."""
+        self._wake.set()
+
+    def wait_done(self, timeout):
+        """Tunggu sampai ada transaksi yang selesai diproses (atau timeout)."""
+        with self._done:
+            self._done.wait(timeout)
+
+    def stats(self):
+        with self._lock:
+            data = dict(self._counters)
+        data.update({'workers': len(self._threads), 'batch_size': self.batch_size})
+        return data
+
+    # =============================
+    # LOOP WORKER
+    # =============================
+    def start(self):
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f'transfer-outbox-{index}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _run(self):
+        while True:
+            with self.app.app_context():
+                try:
+                    claimed = self.drain_once()
+                except Exception as e:
+                    db.session.rollback()
+                    print(f"[outbox] Error saat memproses outbox: {e}")
+                    claimed = 0
+                finally:
+                    db.session.remove()
+            if claimed < self.batch_size:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+
+    def drain_once(self):
+        """
+        Proses satu batch outbox tanpa menahan lock DB selama panggilan HTTP:
+        1. klaim (FOR UPDATE SKIP LOCKED), geser next_attempt_at sejauh claim_timeout,
+           commit: worker lain melewati baris ini, dan jika proses ini mati barisnya
+           tersedia lagi setelah claim_timeout;
+        2. panggil service-wallet per baris tanpa transaksi DB terbuka;
+        3. kunci ulang baris & Transaction-nya, terapkan hasil, commit sekali.
+        Mengembalikan jumlah baris yang diklaim.
+        """
+        now = datetime.utcnow()
+        rows = (
+            TransferOutbox.query
+            .filter(TransferOutbox.processed_at.is_(None), TransferOutbox.next_attempt_at <= now)
+            .order_by(TransferOutbox.id)
+            .limit(self.batch_size)
+            .with_for_update(skip_locked=True)
+            .all()
+        )
+        if not rows:
+            db.session.rollback()
+            return 0
+
+        pending = {
+            transaction_id for (transaction_id,) in db.session.query(Transaction.id)
+            .filter(Transaction.id.in_([row.transaction_id for row in rows]), Transaction.status == 'pending')
+        }
+        claims = []
+        for row in rows:
+            row.attempts += 1
+            row.next_attempt_at = now + timedelta(seconds=self.claim_timeout)
+            claims.append((row.id, row.transaction_id, {
+                'sender_user_id': row.sender_user_id,
+                'receiver_user_id': row.receiver_user_id,
+                'amount': str(row.amount),
+            }))
+        db.session.commit()
+
+        outcomes = {
+            row_id: self._call_wallet(transaction_id, payload) if transaction_id in pending else ('done', None)
+            for row_id, transaction_id, payload in claims
+        }
+
+        rows = (
+            TransferOutbox.query
+            .filter(TransferOutbox.id.in_(list(outcomes)))
+            .with_for_update()
+            .all()
+        )
+        transactions = {
+            t.id: t for t in Transaction.query
+            .filter(Transaction.id.in_([row.transaction_id for row in rows]))
+            .with_for_update()
+            .all()
+        }
+        succeeded = []
+        for row in rows:
+            transaction = transactions.get(row.transaction_id)
+            # Sudah diselesaikan worker lain (klaim kedaluwarsa lalu diklaim ulang)
+            if row.processed_at is None and self._apply(row, transaction, *outcomes[row.id]):
+                succeeded.append(transaction)
+        db.session.commit()
+
+        if succeeded and self.on_success:
+            self.on_success([t.to_dict() for t in succeeded])
+
+        with self._done:
+            self._done.notify_all()
+        return len(claims)
+
+    def _call_wallet(self, transaction_id, payload):
+        """Satu transfer ke service-wallet. Mengembalikan (hasil, data): success / retry / fail."""
+        # Key tetap per transaksi: kalau baris dikerjakan ulang (commit gagal, klaim
+        # kedaluwarsa), service-wallet menjawab dari cache idempotency, bukan transfer dua kali
+        headers = {'Idempotency-Key': f'outbox:{transaction_id}'}
+        try:
+            res = self.wallet_client.post('internal/wallets/transfer', json=payload, headers=headers)
+        except requests.exceptions.RequestException as e:
+            return 'retry', f'Layanan wallet tidak tersedia: {e}'
+
+        if res.ok:
+            return 'success', res.json()
+        try:
+            message = res.json().get('message') or f'Status {res.status_code}'
+        except ValueError:
+            message = f'Status {res.status_code}'
+        if res.status_code >= 500 or res.status_code in RETRYABLE_STATUS:
+            return 'retry', message
+        return 'fail', message
+
+    def _apply(self, row, transaction, outcome, data):
+        """Terapkan hasil panggilan wallet ke baris outbox & transaksinya. True jika transfer berhasil."""
+        if outcome == 'done' or transaction is None or transaction.status != 'pending':
+            row.processed_at = datetime.utcnow()
+        elif outcome == 'success':
+            transaction.sender_wallet_id = data['sender']['id']
+            transaction.receiver_wallet_id = data['receiver']['id']
+            transaction.status = 'success'
+            row.processed_at = datetime.utcnow()
+            row.last_error = None
+            self._count(processed=1, succeeded=1)
+            return True
+        elif outcome == 'retry':
+            self._retry_or_fail(row, transaction, data)
+        else:
+            self._fail(row, transaction, data)
+        return False
+
+    def _retry_or_fail(self, row, transaction, message):
+        if row.attempts >= self.max_attempts:
+            self._fail(row, transaction, message)
+            return
+        # Backoff eksponensial: 1, 2, 4, ... detik (maks 60)
+        row.next_attempt_at = datetime.utcnow() + timedelta(seconds=min(2 ** (row.attempts - 1), 60))
+        row.last_error = message[:255]
+        self._count(retried=1)
+
+    def _fail(self, row, transaction, message):
+        transaction.status = 'failed'
+        row.processed_at = datetime.utcnow()
+        row.last_error = message[:255]
+        self._count(processed=1, failed=1)
+
+    def _count(self, **deltas):
+        with self._lock:
+            for key, value in deltas.items():
+                self._counters[key] += value
+
+
+def wait_for_transaction(worker, transaction_id, timeout, poll_interval=0.5):
+    """
+    Long-poll: tunggu sampai transaksi tidak lagi 'pending' atau timeout.
+    Worker di proses yang sama membangunkan lebih cepat; kalau worker berjalan
+    di proses lain, status tetap dibaca ulang dari DB setiap poll_interval.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        transaction = Transaction.query.get(transaction_id)
+        remaining = deadline - time.monotonic()
+        if transaction is None or transaction.status != 'pending' or remaining <= 0:
+            return transaction
+        # Akhiri read view supaya pembacaan berikutnya melihat commit terbaru
+        db.session.rollback()
+        if worker is not None:
+            worker.wait_done(min(remaining, poll_interval))
+        else:
+            time.sleep(min(remaining, poll_interval))
@@ -1,14 +1,25 @@
 import os
+import sys
 import datetime
 from flask import Flask, request
 from flask_restx import Api, Resource, fields
 import jwt # PyJWT
 import requests # Pastikan ini ada di requirements.txt
 from flask_cors import CORS
+from werkzeug.exceptions import HTTPException
 
 # Import dari file kita sendiri
 from config import Config
 from models import db, bcrypt, User
+from passwords import PasswordHasher, HasherBusy
+
+# Modul bersama (common/) berada di root repo
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from common.http_client import get_client, notify
+from common.events import EventBus, EVENT_BUS_ENABLED
+from common.internal_auth import is_internal
+from common.metrics import instrument_flask
+from common import tracing, profiling, server
 
 # Hapus variabel global di sini, kita akan pakai app.config
 # JWT_SECRET = os.getenv("JWT_SECRET_KEY") 
@@ -18,6 +29,9 @@ from models import db, bcrypt, User
 app = Flask(__name__)
 app.config.from_object(Config) # Muat konfigurasi dari config.py
 CORS(app)
+instrument_flask(app, 'user')  # GET /metrics
+tracing.instrument_flask(app, 'user')  # span per request + propagasi traceparent
+profiling.instrument_flask(app, 'user')  # opt-in: PROFILING_ENABLED=1, lihat /admin/profile
 
 # Inisialisasi ekstensi DENGAN aplikasi
 db.init_app(app)
@@ -27,8 +41,53 @@ api = Api(app,
           title='User Service API', 
           description='Layanan untuk mengelola User, Registrasi, dan Login.')
 
+# Kunci JWT: HS256 memakai JWT_SECRET_KEY; RS256/EdDSA memakai pasangan
+# private key (untuk sign di sini) dan public key (untuk verifikasi)
+def read_key_file(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+JWT_ALGORITHM = app.config['JWT_SIGNING_ALGORITHM']
+if JWT_ALGORITHM.startswith('HS'):
+    JWT_SIGNING_KEY = JWT_VERIFY_KEY = app.config['JWT_SECRET_KEY']
+    JWT_HEADERS = None
+else:
+    JWT_SIGNING_KEY = read_key_file(app.config['JWT_PRIVATE_KEY_PATH'])
+    JWT_VERIFY_KEY = read_key_file(app.config['JWT_PUBLIC_KEY_PATH'])
+    # 'kid' dipakai gateway untuk memilih public key dari JWKS
+    JWT_HEADERS = {'kid': app.config['JWT_KEY_ID']} if app.config['JWT_KEY_ID'] else None
+
+# Hashing password (bcrypt) di process pool terpisah dengan antrian terbatas
+hasher = PasswordHasher(workers=app.config['PASSWORD_HASH_WORKERS'],
+                        queue_size=app.config['PASSWORD_HASH_QUEUE'],
+                        rounds=app.config['BCRYPT_LOG_ROUNDS'],
+                        timeout=app.config['PASSWORD_HASH_TIMEOUT'])
+
+# Jawaban saat antrian hashing penuh: klien diminta mencoba lagi sebentar lagi
+HASHER_BUSY_RESPONSE = ({'message': 'Server sedang sibuk memproses login, silakan coba lagi.'}, 503, {'Retry-After': '1'})
+
+# Event bus: pembuatan/penutupan dompet & invalidasi cache dikerjakan consumer di service lain
+events = EventBus()
+
+def publish_best_effort(topic, payload):
+    try:
+        events.publish(topic, payload)
+    except Exception as e:
+        print(f"[events] Gagal publish {topic}: {e}")
+
+# Klien HTTP (connection pool keep-alive) ke service-wallet
+wallet_client = get_client('wallet', app.config['WALLET_SERVICE_URL'])
+
 # Fungsi ini untuk mengambil user_id dari token yang dikirim di header
 def get_user_id_from_token():
+    # Token sudah diverifikasi gateway (dan hasilnya di-cache di sana); X-User-Id yang
+    # disuntikkan gateway dipakai tanpa decode ulang, tapi HANYA jika request terbukti dari
+    # gateway (INTERNAL_SECRET, lihat common/internal_auth.py). Klien yang langsung menembak
+    # port 3001 tetap harus membawa JWT yang valid.
+    gateway_user_id = request.headers.get('X-User-Id')
+    if gateway_user_id and is_internal(request.headers, request.remote_addr):
+        return int(gateway_user_id)
+
     auth_header = request.headers.get('Authorization')
     if not auth_header:
         api.abort(401, 'Token otentikasi tidak ada (missing).')
@@ -37,8 +96,8 @@ def get_user_id_from_token():
         token = auth_header.split(" ")[1] # Ambil token dari "Bearer <token>"
         
         # --- PERBAIKAN MASALAH #2 ---
-        # Gunakan 'JWT_SECRET_KEY' agar SAMA dengan fungsi Login
-        data = jwt.decode(token, app.config['JWT_SECRET_KEY'], algorithms=["HS256"])
+        # Gunakan kunci & algoritma yang SAMA dengan fungsi Login
+        data = jwt.decode(token, JWT_VERIFY_KEY, algorithms=[JWT_ALGORITHM])
         # -----------------------------
         
         return data['user_id']
@@ -71,6 +130,10 @@ user_update_model = api.model('UserUpdateInput', {
     'phone_number': fields.String(description='Nomor HP baru')
 })
 
+phone_batch_input = api.model('PhoneBatchInput', {
+    'phone_numbers': fields.List(fields.String, required=True, description='Daftar nomor HP')
+})
+
 # --- 3. ENDPOINTS API (Logika Bisnis) ---
 
 @user_ns.route('/register')
@@ -79,7 +142,10 @@ class UserRegister(Resource):
     def post(self):
         """Membuat user baru (Registrasi)"""
         data = api.payload
-        hashed_password = bcrypt.generate_password_hash(data['password']).decode('utf-8')
+        try:
+            hashed_password = hasher.hash(data['password'])
+        except HasherBusy:
+            return HASHER_BUSY_RESPONSE
         
         new_user = User(
             name=data['name'],
@@ -92,11 +158,21 @@ class UserRegister(Resource):
             db.session.add(new_user)
             db.session.commit()
             
+            if EVENT_BUS_ENABLED:
+                # Dompet dibuat oleh consumer di service-wallet (tidak menahan request ini)
+                try:
+                    events.publish('user.registered', {'user_id': new_user.id})
+                except Exception as e:
+                    db.session.delete(new_user)
+                    db.session.commit()
+                    print(f"Gagal publish user.registered: {e}")
+                    api.abort(503, 'Event bus tidak tersedia. Registrasi dibatalkan.')
+                return {'message': 'User berhasil dibuat', 'user': new_user.to_dict()}, 201
+
             # --- Memanggil Service-Wallet (Logika ini sudah SANGAT BAGUS!) ---
             try:
-                wallet_url = f"{app.config['WALLET_SERVICE_URL']}/internal/wallets"
                 wallet_payload = {'user_id': new_user.id}
-                response = requests.post(wallet_url, json=wallet_payload, timeout=5)
+                response = wallet_client.post("internal/wallets", json=wallet_payload, timeout=5)
                 response.raise_for_status() # Error jika status code bukan 2xx
                 print(f"Wallet berhasil dibuat untuk user {new_user.id}")
             except requests.exceptions.RequestException as e:
@@ -108,6 +184,9 @@ class UserRegister(Resource):
             # ---------------------------------
             
             return {'message': 'User berhasil dibuat', 'user': new_user.to_dict()}, 201
+        except HTTPException:
+            # api.abort() di atas harus diteruskan apa adanya (bukan jadi 400)
+            raise
         except Exception as e:
             db.session.rollback()
             if 'Duplicate entry' in str(e):
@@ -127,14 +206,32 @@ class UserLogin(Resource):
         user = User.query.filter_by(phone_number=data['phone']).first()
         # -----------------------------------
         
-        if user and user.status == 'active' and bcrypt.check_password_hash(user.password_hash, data['password']):
+        password_ok = False
+        if user and user.status == 'active':
+            try:
+                password_ok = hasher.check(data['password'], user.password_hash)
+            except HasherBusy:
+                return HASHER_BUSY_RESPONSE
+            except ValueError:
+                password_ok = False  # hash tersimpan rusak / bukan bcrypt
+
+        if password_ok and hasher.needs_rehash(user.password_hash):
+            # Cost (BCRYPT_LOG_ROUNDS) berubah: hash ulang selagi password asli ada di tangan
+            try:
+                user.password_hash = hasher.hash(data['password'])
+                db.session.commit()
+            except HasherBusy:
+                pass  # dicoba lagi di login berikutnya
+
+        if password_ok:
             token = jwt.encode(
                 {
                     'user_id': user.id,
                     'exp': datetime.datetime.utcnow() + datetime.timedelta(hours=24)
                 },
-                app.config['JWT_SECRET_KEY'], # <-- Kunci A (Benar)
-                algorithm='HS256'
+                JWT_SIGNING_KEY, # <-- Kunci A (Benar)
+                algorithm=JWT_ALGORITHM,
+                headers=JWT_HEADERS
             )
             return {'message': 'Login berhasil', 'token': token}, 200
         else:
@@ -169,6 +266,7 @@ class MyProfile(Resource):
             
             data = api.payload
             
+            old_phone = user.phone_number
             if 'phone_number' in data:
                 existing = User.query.filter(User.phone_number == data['phone_number'], User.id != user_id).first()
                 if existing:
@@ -179,6 +277,13 @@ class MyProfile(Resource):
                 user.name = data['name']
             
             db.session.commit()
+
+            # Nomor lama tidak boleh lagi ter-resolve ke user ini dari cache service lain
+            if user.phone_number != old_phone:
+                if EVENT_BUS_ENABLED:
+                    publish_best_effort('user.phone_changed', {'user_id': user.id, 'old_phone': old_phone})
+                else:
+                    notify(app.config['USER_CACHE_SUBSCRIBERS'], 'DELETE', f'internal/cache/phones/{old_phone}')
             return {'message': 'Profil berhasil diperbarui', 'user': user.to_dict()}, 200
         except Exception as e:
             db.session.rollback()
@@ -193,10 +298,16 @@ class MyProfile(Resource):
             if not user or user.status == 'closed':
                 return {'message': 'User tidak ditemukan atau sudah ditutup'}, 404
             
+            if EVENT_BUS_ENABLED:
+                user.status = 'closed'
+                db.session.commit()
+                # Dompet ditutup & cache nomor HP dihapus oleh consumer di service lain
+                publish_best_effort('user.closed', {'user_id': user.id, 'phone_number': user.phone_number})
+                return {'message': f'User {user.name} berhasil ditutup (soft delete).'}, 200
+
             # --- Memanggil Service-Wallet untuk menutup wallet (Logika ini sudah SANGAT BAGUS!) ---
             try:
-                wallet_url = f"{app.config['WALLET_SERVICE_URL']}/internal/by-user/{user_id}/close"
-                response = requests.delete(wallet_url, timeout=5)
+                response = wallet_client.delete(f"internal/wallets/by-user/{user_id}/close", timeout=5)
                 print(f"Response dari wallet-service: {response.status_code}")
             except requests.exceptions.RequestException as e:
                 print(f"Gagal memanggil wallet-service saat tutup akun: {e}")
@@ -204,6 +315,7 @@ class MyProfile(Resource):
 
             user.status = 'closed'
             db.session.commit()
+            notify(app.config['USER_CACHE_SUBSCRIBERS'], 'DELETE', f'internal/cache/phones/{user.phone_number}')
             return {'message': f'User {user.name} berhasil ditutup (soft delete).'}, 200
         except Exception as e:
             db.session.rollback()
@@ -222,9 +334,31 @@ class UserInternalByPhone(Resource):
         else:
             return {'message': 'User tidak ditemukan atau akun tidak aktif'}, 404
             
-# --- 4. BUAT TABEL & JALANKAN SERVER ---
-with app.app_context():
-    db.create_all()
+@user_ns.route('/internal/by-phones')
+class UserInternalByPhones(Resource):
+    @user_ns.expect(phone_batch_input)
+    def post(self):
+        """(INTERNAL) Mendapatkan banyak user aktif sekaligus berdasarkan daftar nomor HP"""
+        phones = list(dict.fromkeys(api.payload.get('phone_numbers') or []))
+        if len(phones) > app.config['PHONE_LOOKUP_MAX_BATCH']:
+            return {'message': f"Maksimal {app.config['PHONE_LOOKUP_MAX_BATCH']} nomor per request."}, 400
+
+        # Satu query IN (...) untuk semua nomor
+        users = User.query.filter(User.phone_number.in_(phones), User.status == 'active').all() if phones else []
+        found = {u.phone_number for u in users}
+        return {
+            'users': [u.to_dict() for u in users],
+            'missing': [p for p in phones if p not in found]
+        }, 200
+
+@user_ns.route('/internal/hasher-stats')
+class UserInternalHasherStats(Resource):
+    def get(self):
+        """(INTERNAL) Statistik antrian hashing password"""
+        return hasher.stats(), 200
 
+# --- 4. JALANKAN SERVER ---
+# Skema dikelola migrations.py (python migrations.py), tidak dibuat saat import
 if __name__ == '__main__':
-    app.run(port=3001, debug=True)
\ No newline at end of file
+    # WEB_SERVER=gunicorn (default) / dev, lihat common/server.py
+    server.run(app, 'user', 3001, db=db)
\ No newline at end of file
@@ -9,8 +9,36 @@ class Config:
     SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL_USERS', 'mysql+pymysql://root:@localhost:3306/db_users')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'default-secret-key-ganti-ini')
+
+    # Penandatanganan token: HS256 (shared secret) atau RS256 / EdDSA (private key),
+    # supaya service lain cukup memegang public key (JWKS) untuk verifikasi
+    JWT_SIGNING_ALGORITHM = os.getenv('JWT_SIGNING_ALGORITHM', 'HS256')
+    JWT_PRIVATE_KEY_PATH = os.getenv('JWT_PRIVATE_KEY_PATH')
+    JWT_PUBLIC_KEY_PATH = os.getenv('JWT_PUBLIC_KEY_PATH')
+    JWT_KEY_ID = os.getenv('JWT_KEY_ID')
     
     # --- TAMBAHKAN INI ---
     # Kita asumsikan service-wallet akan berjalan di port 3002
     WALLET_SERVICE_URL = os.getenv('WALLET_SERVICE_URL', 'http://localhost:3002')
-    # -----------------------
\ No newline at end of file
+    # -----------------------
+
+    # Service yang menyimpan cache nomor HP -> user dan harus diberi tahu saat
+    # nomor HP berubah / akun ditutup (dipisah koma; default: service-transaction)
+    USER_CACHE_SUBSCRIBERS = [
+        url.strip() for url in
+        os.getenv('USER_CACHE_SUBSCRIBERS', 'http://localhost:3003').split(',')
+        if url.strip()
+    ]
+
+    # Jumlah nomor HP maksimum per request batch lookup
+    PHONE_LOOKUP_MAX_BATCH = int(os.getenv('PHONE_LOOKUP_MAX_BATCH', 1000))
+
+    # --- HASHING PASSWORD (bcrypt) ---
+    # Work factor bcrypt (juga dibaca Flask-Bcrypt). Hash dengan cost lain di-hash ulang saat login.
+    BCRYPT_LOG_ROUNDS = int(os.getenv('BCRYPT_LOG_ROUNDS', 12))
+    # Jumlah proses hashing terpisah; 0 = hashing inline di thread request
+    PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', os.cpu_count() or 2))
+    # Pekerjaan hashing (berjalan + mengantri) maksimum sebelum login ditolak 503
+    PASSWORD_HASH_QUEUE = int(os.getenv('PASSWORD_HASH_QUEUE', max(PASSWORD_HASH_WORKERS, 1) * 4))
+    # Batas waktu menunggu hasil hashing (detik)
+    PASSWORD_HASH_TIMEOUT = float(os.getenv('PASSWORD_HASH_TIMEOUT', 5))
@@ -0,0 +1,40 @@
+# service-user/migrations.py
+# Migrasi skema db_users. Jalankan sebelum start service (app.py tidak lagi membuat tabel):
+#   python migrations.py [--status] [--to VERSI]
+# Tambah perubahan skema sebagai Migration baru di akhir daftar, jangan ubah yang lama.
+
+import os
+import sys
+
+import sqlalchemy as sa
+from flask import Flask
+
+from config import Config
+from models import db
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from common.migrations import Migration, create_table, main
+
+
+def baseline(conn):
+    create_table(conn, sa.Table(
+        'user', sa.MetaData(),
+        sa.Column('id', sa.Integer, primary_key=True),
+        sa.Column('name', sa.String(100), nullable=False),
+        sa.Column('email', sa.String(120), unique=True, nullable=False),
+        sa.Column('password_hash', sa.String(128), nullable=False),
+        sa.Column('phone_number', sa.String(20), unique=True, nullable=False),
+        sa.Column('status', sa.String(20), nullable=False),
+    ))
+
+
+MIGRATIONS = [
+    Migration(1, 'Tabel user', baseline),
+]
+
+
+if __name__ == '__main__':
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    db.init_app(app)
+    main(app, db, MIGRATIONS)
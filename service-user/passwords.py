@@ -0,0 +1,125 @@
+# service-user/passwords.py
+# Hash & verifikasi password (bcrypt) di process pool terpisah.
+# bcrypt sengaja lambat dan memegang CPU; kalau dijalankan di thread request,
+# badai login ikut menahan request lain (profil, lookup nomor HP) di worker yang sama.
+# Antrian dibatasi: kalau penuh, request login langsung ditolak (503) daripada menumpuk.
+
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+import bcrypt as bcrypt_lib
+
+
+class HasherBusy(Exception):
+    """Antrian hashing penuh / timeout; app.py menjawab 503 + Retry-After."""
+
+
+# Fungsi di bawah dijalankan di proses worker (harus top-level agar bisa di-pickle)
+def _hash(password, rounds):
+    return bcrypt_lib.hashpw(password.encode('utf-8'), bcrypt_lib.gensalt(rounds)).decode('utf-8')
+
+
+def _check(password, password_hash):
+    # Format sama dengan Flask-Bcrypt, jadi hash yang sudah ada tetap valid
+    return bcrypt_lib.checkpw(password.encode('utf-8'), password_hash.encode('utf-8'))
+
+
+def hash_rounds(password_hash):
+    """Cost yang tertanam di hash bcrypt ('$2b$12$...' -> 12)."""
+    try:
+        return int(password_hash.split('$')[2])
+    except (IndexError, ValueError):
+        return None
+
+
+class PasswordHasher:
+    def __init__(self, workers, queue_size, rounds, timeout):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.rounds = rounds
+        self.timeout = timeout
+        self._executor = None
+        self._slots = threading.BoundedSemaphore(max(queue_size, 1))
+        self._lock = threading.Lock()
+        self._counters = {'submitted': 0, 'rejected': 0, 'timeouts': 0, 'in_flight': 0, 'broken': 0,
+                          'total_ms': 0.0}
+
+    def _get_executor(self):
+        # Dibuat saat pertama dipakai, supaya tidak ikut ter-fork dari proses induk
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            return self._executor
+
+    def _discard_executor(self, executor):
+        # Pool rusak (proses worker mati: OOM, segfault) tidak bisa dipakai lagi;
+        # panggilan berikutnya membuat pool baru lewat _get_executor()
+        with self._lock:
+            if self._executor is not executor:
+                return  # sudah diganti oleh thread lain
+            self._executor = None
+            self._counters['broken'] += 1
+        executor.shutdown(wait=False)
+
+    def _count(self, **deltas):
+        with self._lock:
+            for key, value in deltas.items():
+                self._counters[key] += value
+
+    def _run(self, fn, *args):
+        if self.workers <= 0:
+            return fn(*args)
+
+        if not self._slots.acquire(blocking=False):
+            self._count(rejected=1)
+            raise HasherBusy('Antrian hashing password penuh')
+        start = time.perf_counter()
+        self._count(submitted=1, in_flight=1)
+        executor = self._get_executor()
+        try:
+            future = executor.submit(fn, *args)
+        except Exception as e:
+            self._slots.release()
+            self._count(in_flight=-1)
+            if isinstance(e, BrokenProcessPool):
+                self._discard_executor(executor)
+                raise HasherBusy('Process pool hashing rusak, dibuat ulang')
+            raise
+        # Slot dilepas saat pekerjaan benar-benar selesai, bukan saat kita berhenti menunggu
+        future.add_done_callback(lambda _: (self._slots.release(), self._count(in_flight=-1)))
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            self._count(timeouts=1)
+            raise HasherBusy('Hashing password melewati batas waktu')
+        except BrokenProcessPool:
+            self._discard_executor(executor)
+            raise HasherBusy('Process pool hashing rusak, dibuat ulang')
+        finally:
+            self._count(total_ms=(time.perf_counter() - start) * 1000)
+
+    def hash(self, password):
+        return self._run(_hash, password, self.rounds)
+
+    def check(self, password, password_hash):
+        return self._run(_check, password, password_hash)
+
+    def needs_rehash(self, password_hash):
+        return hash_rounds(password_hash) != self.rounds
+
+    def stats(self):
+        with self._lock:
+            data = dict(self._counters)
+        submitted = data['submitted']
+        data['avg_ms'] = round(data.pop('total_ms') / submitted, 2) if submitted else 0.0
+        data.update({'workers': self.workers, 'queue_size': self.queue_size, 'rounds': self.rounds})
+        return data
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
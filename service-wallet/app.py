@@ -3,16 +3,34 @@
 from flask import Flask, request
 from flask_restx import Api, Resource, fields
 from decimal import Decimal
+from datetime import datetime
 from flask_cors import CORS
+import os
+import sys
 
 # Import dari file kita sendiri
 from config import Config
-from models import db, Wallet
+from models import db, Wallet, LedgerEntry
+from balance import (BalanceError, update_balance, credit_many, credit_shard_locked, lock_wallets, collapse_shards,
+                     collapse, set_shard_count, close_wallet, wallet_dict, stats as balance_stats)
+import ledger
+from consumers import register_consumers
+
+# Modul bersama (common/) berada di root repo
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from common.idempotency import create_store, idempotent
+from common.http_client import notify
+from common.events import EventBus, EVENT_BUS_ENABLED
+from common.metrics import instrument_flask
+from common import tracing, profiling, server
 
 # --- 1. INISIALISASI APLIKASI ---
 app = Flask(__name__)
 app.config.from_object(Config)
 CORS(app)
+instrument_flask(app, 'wallet')  # GET /metrics
+tracing.instrument_flask(app, 'wallet')  # span per request + propagasi traceparent
+profiling.instrument_flask(app, 'wallet')  # opt-in: PROFILING_ENABLED=1, lihat /admin/profile
 
 db.init_app(app)
 api = Api(app, 
@@ -20,6 +38,34 @@ api = Api(app,
           title='Wallet Service API', 
           description='Layanan untuk mengelola Dompet dan Saldo.')
 
+# Hasil update saldo per Idempotency-Key (retry tidak mengubah saldo dua kali)
+IDEMPOTENCY = create_store()
+
+# Event bus: wallet.balance_changed / wallet.closed untuk service lain, dan
+# consumer user.registered / user.closed (lihat consumers.py)
+events = EventBus()
+
+def publish_balance_changed(wallets):
+    """wallets: iterable (wallet_id, user_id) yang saldonya baru berubah."""
+    if not EVENT_BUS_ENABLED:
+        return
+    try:
+        events.publish_many([('wallet.balance_changed', {'wallet_id': wallet_id, 'user_id': user_id})
+                             for wallet_id, user_id in wallets])
+    except Exception as e:
+        print(f"[events] Gagal publish wallet.balance_changed: {e}")
+
+def announce_wallet_closed(wallet):
+    """Hapus mapping user -> dompet dari cache di gateway & service-transaction."""
+    if EVENT_BUS_ENABLED:
+        try:
+            events.publish('wallet.closed', {'wallet_id': wallet.id, 'user_id': wallet.user_id})
+            return
+        except Exception as e:
+            print(f"[events] Gagal publish wallet.closed, pakai HTTP: {e}")
+    # Hanya sampai ke satu worker per subscriber: cukup jika subscriber berjalan dengan WEB_WORKERS=1
+    notify(app.config['WALLET_CACHE_SUBSCRIBERS'], 'DELETE', f'internal/cache/wallets/{wallet.user_id}')
+
 # --- 2. MODEL API (Flask-RESTX) ---
 # Namespace dipisah antara Publik (Frontend) dan Internal (Antar Service)
 wallets_ns = api.namespace('wallets', description='Operasi Dompet Publik (Butuh Token)')
@@ -42,8 +88,37 @@ internal_wallet_input = api.model('InternalWalletInput', {
 # Model untuk input (debit/kredit, internal)
 balance_update_input = api.model('BalanceUpdateInput', {
     'type': fields.String(required=True, enum=['debit', 'credit']),
+    'amount': fields.Float(required=True, description='Jumlah uang'),
+    'source': fields.String(enum=['balance', 'topup'], default='balance', description='Asal mutasi (dicatat di ledger)')
+})
+
+# Model untuk input (transfer antar dompet dalam satu transaksi DB, internal)
+internal_transfer_input = api.model('InternalTransferInput', {
+    'sender_user_id': fields.Integer(required=True, description='ID User pengirim'),
+    'receiver_user_id': fields.Integer(required=True, description='ID User penerima'),
+    'amount': fields.Float(required=True, description='Jumlah uang')
+})
+
+# Model untuk output transfer (kondisi kedua dompet setelah transfer)
+internal_transfer_result = api.model('InternalTransferResult', {
+    'sender': fields.Nested(wallet_model),
+    'receiver': fields.Nested(wallet_model)
+})
+
+# Model untuk input transfer massal (1 pengirim -> banyak penerima, internal)
+internal_batch_credit = api.model('InternalBatchCredit', {
+    'receiver_user_id': fields.Integer(required=True, description='ID User penerima'),
     'amount': fields.Float(required=True, description='Jumlah uang')
 })
+internal_batch_transfer_input = api.model('InternalBatchTransferInput', {
+    'sender_user_id': fields.Integer(required=True, description='ID User pengirim'),
+    'credits': fields.List(fields.Nested(internal_batch_credit), required=True)
+})
+
+# Model untuk input jumlah sub-saldo dompet panas (internal)
+wallet_shards_input = api.model('WalletShardsInput', {
+    'count': fields.Integer(required=True, description='Jumlah sub-saldo (0 = matikan sharding)')
+})
 
 # --- 3. HELPER (Ambil User ID dari Header) ---
 # API Gateway akan meneruskan JWT yang sudah divalidasi
@@ -54,6 +129,16 @@ def get_user_id_from_header():
         api.abort(401, 'Header X-User-Id tidak ada. Request harus melalui API Gateway.')
     return int(user_id)
 
+def parse_time_param(name):
+    """Query param waktu ISO 8601 (cth: 2025-01-31T23:59:59) -> datetime, atau None."""
+    value = request.args.get(name)
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        api.abort(400, f"Format '{name}' tidak valid (gunakan ISO 8601).")
+
 # --- 4. ENDPOINTS PUBLIK (Butuh Token, via API Gateway) ---
 @wallets_ns.route('/me')
 class MyWallet(Resource):
@@ -65,7 +150,7 @@ class MyWallet(Resource):
         wallet = Wallet.query.filter_by(user_id=user_id, status='active').first()
         if not wallet:
             api.abort(404, 'Dompet aktif tidak ditemukan untuk user ini.')
-        return wallet.to_dict()
+        return wallet_dict(wallet)
 
 # --- 5. ENDPOINTS INTERNAL (Hanya untuk Service Lain) ---
 
@@ -98,36 +183,215 @@ class InternalWalletByUser(Resource):
         wallet = Wallet.query.filter_by(user_id=user_id, status='active').first()
         if not wallet:
             api.abort(404, 'Dompet aktif tidak ditemukan.')
-        return wallet.to_dict()
+        return wallet_dict(wallet)
 
 # Endpoint ini akan dipanggil oleh service-transaction (nanti)
 @internal_ns.route('/wallets/<int:wallet_id>/balance')
 class InternalWalletBalance(Resource):
+    @idempotent(IDEMPOTENCY)
     @internal_ns.doc('internal_update_balance')
     @internal_ns.expect(balance_update_input)
     @internal_ns.marshal_with(wallet_model)
     def put(self, wallet_id):
         """(U)PDATE: (INTERNAL) Mengubah saldo (debit/kredit)"""
-        wallet = Wallet.query.get(wallet_id)
-        if not wallet:
-            api.abort(404, 'Dompet tidak ditemukan.')
-        if wallet.status == 'closed':
-            api.abort(403, 'Dompet sudah ditutup.')
-            
         data = api.payload
         amount = Decimal(str(data['amount'])) 
 
-        if data['type'] == 'debit':
-            if wallet.balance < amount:
-                api.abort(400, 'Saldo tidak mencukupi.')
-            wallet.balance -= amount
-        elif data['type'] == 'credit':
-            wallet.balance += amount
+        # Read-modify-write dilindungi row lock / compare-and-swap (lihat balance.py)
+        try:
+            wallet = update_balance(wallet_id, data['type'], amount,
+                                    mode=app.config['WALLET_LOCK_MODE'],
+                                    max_retries=app.config['WALLET_CAS_MAX_RETRIES'],
+                                    source=data.get('source') or 'balance')
+        except BalanceError as e:
+            api.abort(e.status_code, e.message)
+        result = wallet_dict(wallet)
+        publish_balance_changed([(wallet.id, wallet.user_id)])
+        return result
+
+# Statistik kontensi update saldo (untuk stress test & monitoring)
+@internal_ns.route('/wallets/balance-stats')
+class InternalBalanceStats(Resource):
+    @internal_ns.doc('internal_balance_stats')
+    def get(self):
+        """(R)EAD: (INTERNAL) Counter update saldo, konflik, retry, dan lock wait"""
+        return {'mode': app.config['WALLET_LOCK_MODE'], **balance_stats.snapshot()}, 200
+
+    @internal_ns.doc('internal_reset_balance_stats')
+    def delete(self):
+        """(D)ELETE: (INTERNAL) Reset counter statistik"""
+        balance_stats.reset()
+        return {'message': 'Statistik direset.'}, 200
+
+# Endpoint ini dipanggil oleh service-transaction: debit + kredit dalam SATU transaksi DB
+@internal_ns.route('/wallets/transfer')
+class InternalWalletTransfer(Resource):
+    @idempotent(IDEMPOTENCY)
+    @internal_ns.doc('internal_transfer')
+    @internal_ns.expect(internal_transfer_input)
+    @internal_ns.marshal_with(internal_transfer_result)
+    def post(self):
+        """(U)PDATE: (INTERNAL) Transfer saldo antar dompet secara atomik"""
+        data = api.payload
+        amount = Decimal(str(data['amount']))
+        sender_user_id = data['sender_user_id']
+        receiver_user_id = data['receiver_user_id']
+
+        if amount <= 0:
+            api.abort(400, 'Jumlah transfer harus positif.')
+        if sender_user_id == receiver_user_id:
+            api.abort(400, 'Tidak bisa transfer ke diri sendiri.')
+
+        # 1. Cari id dompet kedua user (tanpa lock)
+        found = (
+            db.session.query(Wallet.user_id, Wallet.id, Wallet.shard_count)
+            .filter(Wallet.user_id.in_([sender_user_id, receiver_user_id]), Wallet.status == 'active')
+            .all()
+        )
+        ids = {user_id: wallet_id for user_id, wallet_id, _ in found}
+        if sender_user_id not in ids:
+            api.abort(404, 'Dompet aktif pengirim tidak ditemukan.')
+        if receiver_user_id not in ids:
+            api.abort(404, 'Dompet aktif penerima tidak ditemukan.')
+
+        # 2. Kunci kedua baris selalu dalam urutan id, supaya dua transfer berlawanan
+        #    arah tidak saling deadlock. Penerima ber-shard (dompet panas) hanya dikunci
+        #    shared: kreditnya masuk ke sub-saldo, jadi transfer paralel tidak antre
+        shared = {wallet_id for user_id, wallet_id, shard_count in found
+                  if user_id == receiver_user_id and shard_count}
+        locked = {}
+        for wallet_id in sorted(ids.values()):
+            locked[wallet_id] = Wallet.query.filter_by(id=wallet_id).with_for_update(read=wallet_id in shared).first()
+        sender = locked.get(ids[sender_user_id])
+        receiver = locked.get(ids[receiver_user_id])
+
+        # Status / jumlah shard bisa berubah di antara langkah 1 dan 2
+        if (not sender or sender.status != 'active' or not receiver or receiver.status != 'active'
+                or (receiver.id in shared) != bool(receiver.shard_count)):
+            db.session.rollback()
+            api.abort(409, 'Status dompet berubah, silakan ulangi transfer.')
+        if sender.shard_count and sender.balance < amount:
+            collapse_shards(sender)
+        if sender.balance < amount:
+            db.session.rollback()
+            api.abort(400, 'Saldo tidak mencukupi.')
+
+        # 3. Debit + kredit + entry ledger, lalu commit sekali (semua atau tidak sama sekali)
+        sender.balance -= amount
+        sender.version += 1
+        if receiver.id in shared:
+            if not credit_shard_locked(receiver.id, receiver.shard_count, amount):
+                db.session.rollback()
+                api.abort(409, 'Sub-saldo dompet berubah, silakan ulangi transfer.')
         else:
-            api.abort(400, 'Tipe harus "debit" atau "credit".')
-            
+            receiver.balance += amount
+            receiver.version += 1
+        ledger.append([
+            ledger.entry(sender.id, 'debit', amount, 'transfer', counterparty_wallet_id=receiver.id),
+            ledger.entry(receiver.id, 'credit', amount, 'transfer', counterparty_wallet_id=sender.id),
+        ])
         db.session.commit()
-        return wallet.to_dict()
+        publish_balance_changed([(sender.id, sender.user_id), (receiver.id, receiver.user_id)])
+        return {'sender': wallet_dict(sender), 'receiver': wallet_dict(receiver)}
+
+# Endpoint ini dipanggil oleh service-transaction untuk transfer massal (payroll / disbursement)
+@internal_ns.route('/wallets/transfer/batch')
+class InternalWalletBatchTransfer(Resource):
+    @idempotent(IDEMPOTENCY)
+    @internal_ns.doc('internal_batch_transfer')
+    @internal_ns.expect(internal_batch_transfer_input)
+    def post(self):
+        """(U)PDATE: (INTERNAL) Debit pengirim sekali untuk total, kredit semua penerima dalam satu transaksi DB"""
+        data = api.payload
+        sender_user_id = data['sender_user_id']
+        credits = data.get('credits') or []
+
+        # 1. Resolve semua dompet aktif dengan satu query
+        user_ids = {sender_user_id} | {c['receiver_user_id'] for c in credits}
+        found = (
+            db.session.query(Wallet.user_id, Wallet.id, Wallet.shard_count)
+            .filter(Wallet.user_id.in_(user_ids), Wallet.status == 'active')
+            .all()
+        )
+        wallet_ids = {user_id: wallet_id for user_id, wallet_id, _ in found}
+        if sender_user_id not in wallet_ids:
+            api.abort(404, 'Dompet aktif pengirim tidak ditemukan.')
+
+        # 2. Validasi per item; item gagal dilaporkan, item valid diproses bersama
+        results = [None] * len(credits)
+        valid = []  # (index, receiver_wallet_id, amount)
+        for index, credit in enumerate(credits):
+            amount = Decimal(str(credit['amount']))
+            receiver_wallet_id = wallet_ids.get(credit['receiver_user_id'])
+            if amount <= 0:
+                results[index] = {'index': index, 'status': 'failed', 'message': 'Jumlah transfer harus positif.'}
+            elif credit['receiver_user_id'] == sender_user_id:
+                results[index] = {'index': index, 'status': 'failed', 'message': 'Tidak bisa transfer ke diri sendiri.'}
+            elif receiver_wallet_id is None:
+                results[index] = {'index': index, 'status': 'failed', 'message': 'Dompet aktif penerima tidak ditemukan.'}
+            else:
+                valid.append((index, receiver_wallet_id, amount))
+
+        # 3. Kunci pengirim + semua penerima dalam urutan id (sama seperti transfer tunggal),
+        #    tanpa object ORM supaya ribuan penerima tidak dimuat. Penerima ber-shard
+        #    hanya dikunci shared; kreditnya masuk ke sub-saldo (lihat credit_many)
+        sender_wallet_id = wallet_ids[sender_user_id]
+        lock_ids = {sender_wallet_id} | {wallet_id for _, wallet_id, _ in valid}
+        shared = {wallet_id for _, wallet_id, shard_count in found
+                  if shard_count and wallet_id in lock_ids and wallet_id != sender_wallet_id}
+        locked = lock_wallets(lock_ids, shared=shared)
+        statuses = {wallet_id: status for wallet_id, (status, _) in locked.items()}
+        if statuses.get(sender_wallet_id) != 'active':
+            db.session.rollback()
+            api.abort(409, 'Status dompet pengirim berubah, silakan ulangi transfer.')
+        # Jumlah shard bisa berubah di antara langkah 1 dan 3
+        sharded = {wallet_id: locked[wallet_id][1] for wallet_id in shared if wallet_id in locked}
+        if not all(sharded.values()):
+            db.session.rollback()
+            api.abort(409, 'Status dompet berubah, silakan ulangi transfer.')
+
+        per_wallet = {}
+        entries = []
+        total = Decimal('0')
+        for index, receiver_wallet_id, amount in valid:
+            if statuses.get(receiver_wallet_id) != 'active':
+                results[index] = {'index': index, 'status': 'failed', 'message': 'Dompet aktif penerima tidak ditemukan.'}
+                continue
+            per_wallet[receiver_wallet_id] = per_wallet.get(receiver_wallet_id, Decimal('0')) + amount
+            entries.append(ledger.entry(receiver_wallet_id, 'credit', amount, 'batch',
+                                        counterparty_wallet_id=sender_wallet_id))
+            total += amount
+            results[index] = {'index': index, 'status': 'success', 'receiver_wallet_id': receiver_wallet_id}
+
+        # 4. Debit pengirim SEKALI untuk total (dibaca ulang dengan locking read supaya
+        #    yang dipakai saldo terbaru, bukan snapshot dari langkah 1)
+        sender = Wallet.query.filter_by(id=sender_wallet_id).with_for_update().first()
+        if sender.shard_count and sender.balance < total:
+            collapse_shards(sender)
+        if sender.balance < total:
+            db.session.rollback()
+            api.abort(400, f'Saldo tidak mencukupi untuk total transfer {total}.')
+        sender.balance -= total
+        sender.version += 1
+
+        # 5. Kredit semua penerima dengan satu statement executemany, catat semua entry
+        #    ledger dengan satu INSERT executemany, lalu commit sekali
+        try:
+            credit_many(per_wallet, sharded=sharded)
+        except BalanceError as e:
+            api.abort(e.status_code, e.message)
+        if total > 0:
+            ledger.append([ledger.entry(sender_wallet_id, 'debit', total, 'batch')] + entries)
+        db.session.commit()
+
+        user_ids = {wallet_id: user_id for user_id, wallet_id in wallet_ids.items()}
+        publish_balance_changed([(sender_wallet_id, sender_user_id)] +
+                                [(wallet_id, user_ids[wallet_id]) for wallet_id in per_wallet])
+        return {
+            'sender': wallet_dict(sender),
+            'total_amount': str(total),
+            'results': results
+        }, 200
 
 # Endpoint ini akan dipanggil oleh service-user saat tutup akun
 @internal_ns.route('/wallets/by-user/<int:user_id>/close')
@@ -135,22 +399,109 @@ class InternalWalletClose(Resource):
     @internal_ns.doc('internal_close_wallet')
     def delete(self, user_id):
         """(D)ELETE: (INTERNAL) Menutup dompet (Soft Delete)"""
-        wallet = Wallet.query.filter_by(user_id=user_id).first()
-        if not wallet:
-            api.abort(404, 'Dompet tidak ditemukan.')
-        
-        # Logika Bisnis: Hanya boleh tutup akun jika saldo 0
-        if wallet.balance > 0:
-            api.abort(400, f'Dompet tidak bisa ditutup, sisa saldo: {wallet.balance}. Tarik saldo dulu.')
-            
-        wallet.status = 'closed'
-        db.session.commit()
+        try:
+            wallet = close_wallet(user_id)
+        except BalanceError as e:
+            api.abort(e.status_code, e.message)
+        announce_wallet_closed(wallet)
         return {'message': 'Dompet berhasil ditutup.'}, 200
 
-# --- 6. BUAT TABEL & JALANKAN SERVER ---
-with app.app_context():
-    db.create_all()
+# Dompet panas (merchant): kredit disebar ke beberapa sub-saldo
+@internal_ns.route('/wallets/<int:wallet_id>/shards')
+class InternalWalletShards(Resource):
+    @internal_ns.doc('internal_set_wallet_shards')
+    @internal_ns.expect(wallet_shards_input)
+    def put(self, wallet_id):
+        """(U)PDATE: (INTERNAL) Aktifkan/ubah jumlah sub-saldo dompet (0 = matikan)"""
+        count = api.payload['count']
+        if count < 0 or count > app.config['WALLET_SHARD_MAX']:
+            api.abort(400, f"Jumlah shard harus 0..{app.config['WALLET_SHARD_MAX']}.")
+        try:
+            wallet = set_shard_count(wallet_id, count)
+        except BalanceError as e:
+            api.abort(e.status_code, e.message)
+        return {'wallet_id': wallet.id, 'shard_count': wallet.shard_count, 'balance': str(wallet.balance)}, 200
+
+@internal_ns.route('/wallets/<int:wallet_id>/shards/collapse')
+class InternalWalletShardsCollapse(Resource):
+    @internal_ns.doc('internal_collapse_wallet_shards')
+    def post(self, wallet_id):
+        """(U)PDATE: (INTERNAL) Gabungkan semua sub-saldo ke saldo utama dompet"""
+        try:
+            wallet, moved = collapse(wallet_id)
+        except BalanceError as e:
+            api.abort(e.status_code, e.message)
+        return {'wallet_id': wallet.id, 'moved': str(moved), 'balance': str(wallet.balance)}, 200
+
+# --- 6. ENDPOINTS LEDGER (Internal) ---
+
+@internal_ns.route('/wallets/<int:wallet_id>/ledger')
+class InternalWalletLedger(Resource):
+    @internal_ns.doc('internal_wallet_ledger', params={
+        'limit': 'Jumlah entry (maks 500)', 'after_id': 'Lanjutkan setelah entry id ini'})
+    def get(self, wallet_id):
+        """(R)EAD: (INTERNAL) Daftar mutasi saldo dompet (urut id, keyset pagination)"""
+        limit = min(request.args.get('limit', 100, type=int), 500)
+        query = LedgerEntry.query.filter(LedgerEntry.wallet_id == wallet_id)
+        after_id = request.args.get('after_id', type=int)
+        if after_id:
+            query = query.filter(LedgerEntry.id > after_id)
+        entries = query.order_by(LedgerEntry.id).limit(limit).all()
+        return {'entries': [e.to_dict() for e in entries]}, 200
+
+@internal_ns.route('/wallets/<int:wallet_id>/balance-at')
+class InternalWalletBalanceAt(Resource):
+    @internal_ns.doc('internal_wallet_balance_at', params={'at': 'Waktu ISO 8601 (kosong = sekarang)'})
+    def get(self, wallet_id):
+        """(R)EAD: (INTERNAL) Saldo dompet menurut ledger pada titik waktu tertentu"""
+        if not Wallet.query.get(wallet_id):
+            api.abort(404, 'Dompet tidak ditemukan.')
+        return ledger.balance_at(wallet_id, parse_time_param('at')), 200
+
+@internal_ns.route('/wallets/<int:wallet_id>/snapshot')
+class InternalWalletSnapshot(Resource):
+    @internal_ns.doc('internal_wallet_snapshot')
+    def post(self, wallet_id):
+        """(C)REATE: (INTERNAL) Simpan snapshot saldo satu dompet sekarang"""
+        snapshot = ledger.take_snapshot(wallet_id)
+        if snapshot is None:
+            api.abort(404, 'Dompet tidak ditemukan.')
+        return snapshot.to_dict(), 201
+
+@internal_ns.route('/ledger/snapshots')
+class LedgerSnapshots(Resource):
+    @internal_ns.doc('ledger_snapshot_due', params={'min_entries': 'Ambang entry sejak snapshot terakhir'})
+    def post(self):
+        """(C)REATE: (INTERNAL) Snapshot semua dompet yang jatuh tempo (untuk cron)"""
+        min_entries = request.args.get('min_entries', app.config['LEDGER_SNAPSHOT_MIN_ENTRIES'], type=int)
+        return {'snapshots': ledger.snapshot_due(min_entries)}, 200
+
+@internal_ns.route('/ledger/reconcile')
+class LedgerReconcile(Resource):
+    @internal_ns.doc('ledger_reconcile', params={'limit': 'Jumlah selisih maksimum yang dilaporkan'})
+    def get(self):
+        """(R)EAD: (INTERNAL) Dompet yang saldonya tidak sama dengan saldo ledger"""
+        mismatches = ledger.reconcile(limit=min(request.args.get('limit', 100, type=int), 1000))
+        return {'ok': not mismatches, 'mismatches': mismatches}, 200
+
+@internal_ns.route('/ledger/summary')
+class LedgerSummary(Resource):
+    @internal_ns.doc('ledger_summary', params={'from': 'Waktu awal ISO 8601', 'to': 'Waktu akhir ISO 8601'})
+    def get(self):
+        """(R)EAD: (INTERNAL) Total debit/kredit transfer per dompet (dicocokkan dengan service-transaction)"""
+        return {'wallets': ledger.transfer_summary(parse_time_param('from'), parse_time_param('to'))}, 200
+
+# --- 7. JALANKAN SERVER ---
+# Skema dikelola migrations.py (python migrations.py), tidak dibuat saat import
+def start_background():
+    """Thread snapshot & consumer event; dipanggil sekali di setiap proses yang melayani request."""
+    if app.config['LEDGER_SNAPSHOT_INTERVAL'] > 0:
+        ledger.start_snapshot_worker(app, app.config['LEDGER_SNAPSHOT_INTERVAL'],
+                                     app.config['LEDGER_SNAPSHOT_MIN_ENTRIES'])
+    if EVENT_BUS_ENABLED:
+        register_consumers(events, app)
+        events.start()
 
 if __name__ == '__main__':
-    # Port 3002 untuk service-wallet
-    app.run(port=3002, debug=True)
\ No newline at end of file
+    # Port 3002 untuk service-wallet (WEB_SERVER=gunicorn / dev, lihat common/server.py)
+    server.run(app, 'wallet', 3002, db=db, background=start_background)
\ No newline at end of file
@@ -0,0 +1,362 @@
+# service-wallet/balance.py
+# Update saldo yang aman terhadap request paralel.
+# Tanpa ini, dua debit bersamaan bisa sama-sama lolos cek "saldo cukup"
+# lalu menimpa hasil satu sama lain (lost update / saldo minus).
+
+import random
+import threading
+import time
+from decimal import Decimal
+from itertools import groupby
+
+from sqlalchemy import bindparam, func, update
+
+from models import db, Wallet, WalletShard
+import ledger
+
+
+class BalanceError(Exception):
+    """Error bisnis saat update saldo (diteruskan ke api.abort oleh app.py)."""
+
+    def __init__(self, status_code, message):
+        super().__init__(message)
+        self.status_code = status_code
+        self.message = message
+
+
+# =============================
+# STATISTIK KONTENSI
+# =============================
+class BalanceStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._data = {
+                'updates': 0,        # update saldo yang berhasil di-commit
+                'conflicts': 0,      # CAS gagal karena version sudah berubah (optimistic)
+                'retries': 0,        # percobaan ulang setelah konflik (optimistic)
+                'exhausted': 0,      # menyerah setelah WALLET_CAS_MAX_RETRIES (optimistic)
+                'shard_credits': 0,  # kredit yang masuk ke sub-saldo tanpa mengunci baris dompet
+                'collapses': 0,      # penggabungan sub-saldo ke Wallet.balance
+                'lock_wait_ms_total': 0.0,  # total waktu menunggu row lock (pessimistic)
+                'lock_wait_ms_max': 0.0,
+            }
+
+    def incr(self, **deltas):
+        with self._lock:
+            for key, value in deltas.items():
+                self._data[key] += value
+
+    def record_lock_wait(self, waited_ms):
+        with self._lock:
+            self._data['lock_wait_ms_total'] += waited_ms
+            self._data['lock_wait_ms_max'] = max(self._data['lock_wait_ms_max'], waited_ms)
+
+    def snapshot(self):
+        with self._lock:
+            data = dict(self._data)
+        data['lock_wait_ms_total'] = round(data['lock_wait_ms_total'], 2)
+        data['lock_wait_ms_max'] = round(data['lock_wait_ms_max'], 2)
+        return data
+
+
+stats = BalanceStats()
+
+
+# =============================
+# LOGIKA UPDATE SALDO
+# =============================
+def new_balance(wallet, change_type, amount):
+    """Hitung saldo baru setelah debit/kredit, atau raise BalanceError."""
+    if wallet.status == 'closed':
+        raise BalanceError(403, 'Dompet sudah ditutup.')
+    if change_type == 'debit':
+        if wallet.balance < amount:
+            raise BalanceError(400, 'Saldo tidak mencukupi.')
+        return wallet.balance - amount
+    if change_type == 'credit':
+        return wallet.balance + amount
+    raise BalanceError(400, 'Tipe harus "debit" atau "credit".')
+
+
+def update_balance(wallet_id, change_type, amount, mode='pessimistic', max_retries=10, source='balance'):
+    """
+    Debit/kredit satu dompet lalu commit (bersama entry ledger-nya).
+    Mengembalikan object Wallet terbaru.
+    """
+    amount = Decimal(amount)
+    if change_type == 'credit':
+        # Dompet panas: kredit cukup menambah satu sub-saldo acak
+        shard_count = db.session.query(Wallet.shard_count).filter(Wallet.id == wallet_id).scalar()
+        if shard_count and _credit_shard(wallet_id, shard_count, amount, source):
+            return Wallet.query.get(wallet_id)
+    if mode == 'optimistic':
+        return _update_optimistic(wallet_id, change_type, amount, max_retries, source)
+    return _update_pessimistic(wallet_id, change_type, amount, source)
+
+
+def _update_pessimistic(wallet_id, change_type, amount, source):
+    # SELECT ... FOR UPDATE: request lain untuk dompet yang sama menunggu di sini
+    start = time.perf_counter()
+    wallet = Wallet.query.filter_by(id=wallet_id).with_for_update().first()
+    stats.record_lock_wait((time.perf_counter() - start) * 1000)
+
+    if not wallet:
+        db.session.rollback()
+        raise BalanceError(404, 'Dompet tidak ditemukan.')
+    if change_type == 'debit' and wallet.shard_count and wallet.balance < amount:
+        collapse_shards(wallet)
+    try:
+        wallet.balance = new_balance(wallet, change_type, amount)
+    except BalanceError:
+        db.session.rollback()
+        raise
+    wallet.version += 1
+    ledger.append([ledger.entry(wallet_id, change_type, amount, source)])
+    db.session.commit()
+    stats.incr(updates=1)
+    return wallet
+
+
+def _update_optimistic(wallet_id, change_type, amount, max_retries, source):
+    for attempt in range(max_retries + 1):
+        wallet = Wallet.query.get(wallet_id)
+        if not wallet:
+            db.session.rollback()
+            raise BalanceError(404, 'Dompet tidak ditemukan.')
+        if wallet.shard_count:
+            # Debit dompet ber-shard butuh lock untuk menggabungkan sub-saldo
+            db.session.rollback()
+            return _update_pessimistic(wallet_id, change_type, amount, source)
+        try:
+            balance = new_balance(wallet, change_type, amount)
+        except BalanceError:
+            db.session.rollback()
+            raise
+
+        # Compare-and-swap: hanya berhasil jika version belum diubah request lain
+        # dan dompet belum ditutup sejak dibaca
+        result = db.session.execute(
+            update(Wallet)
+            .where(Wallet.id == wallet_id, Wallet.version == wallet.version, Wallet.status == 'active')
+            .values(balance=balance, version=Wallet.version + 1)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount == 1:
+            # Baris dompet terkunci oleh UPDATE sampai commit, jadi entry ikut atomik
+            ledger.append([ledger.entry(wallet_id, change_type, amount, source)])
+            db.session.commit()  # commit meng-expire `wallet`, jadi dibaca ulang saat dipakai
+            stats.incr(updates=1)
+            return wallet
+
+        # Konflik: rollback supaya percobaan berikutnya membaca snapshot terbaru
+        db.session.rollback()
+        status = db.session.query(Wallet.status).filter(Wallet.id == wallet_id).scalar()
+        if status != 'active':
+            # Ditutup (atau dihapus) di antara baca & CAS: bukan konflik yang bisa diulang
+            db.session.rollback()
+            raise BalanceError(403 if status else 404, 'Dompet sudah ditutup.' if status else 'Dompet tidak ditemukan.')
+        stats.incr(conflicts=1)
+        if attempt < max_retries:
+            stats.incr(retries=1)
+            time.sleep(random.uniform(0, 0.002 * (2 ** min(attempt, 6))))
+
+    stats.incr(exhausted=1)
+    raise BalanceError(409, 'Saldo sedang diubah oleh transaksi lain, silakan ulangi.')
+
+
+def lock_wallets(wallet_ids, shared=()):
+    """
+    Kunci baris dompet dalam urutan id supaya transaksi yang tumpang tindih tidak
+    deadlock; hanya kolom id, status & shard_count (tanpa object ORM). Id di `shared`
+    (penerima ber-shard) dikunci LOCK IN SHARE MODE seperti _credit_shard, id lain
+    FOR UPDATE; satu query per rentang id dengan mode lock yang sama.
+    Mengembalikan {wallet_id: (status, shard_count)}.
+    """
+    locked = {}
+    for read, group in groupby(sorted(set(wallet_ids)), key=lambda wallet_id: wallet_id in shared):
+        rows = (
+            db.session.query(Wallet.id, Wallet.status, Wallet.shard_count)
+            .filter(Wallet.id.in_(list(group)))
+            .order_by(Wallet.id)
+            .with_for_update(read=read)
+            .all()
+        )
+        locked.update({wallet_id: (status, shard_count) for wallet_id, status, shard_count in rows})
+    return locked
+
+
+def credit_many(credits, sharded=None):
+    """
+    Kredit banyak dompet dengan SATU statement executemany
+    (UPDATE ... SET balance = balance + :amount). Tidak commit; dipanggil di
+    dalam transaksi milik pemanggil. `credits` = {wallet_id: amount}.
+    Urutan id dibuat tetap supaya batch yang tumpang tindih tidak deadlock.
+    Dompet di `sharded` ({wallet_id: shard_count}, dikunci shared oleh lock_wallets)
+    dikredit ke sub-saldo, bukan ke baris Wallet.
+    """
+    sharded = sharded or {}
+    for wallet_id, amount in sorted(credits.items()):
+        if wallet_id in sharded and not credit_shard_locked(wallet_id, sharded[wallet_id], amount):
+            db.session.rollback()
+            raise BalanceError(409, 'Sub-saldo dompet berubah, silakan ulangi transfer.')
+    plain = [{'w_id': wallet_id, 'w_amount': amount}
+             for wallet_id, amount in sorted(credits.items()) if wallet_id not in sharded]
+    if plain:
+        table = Wallet.__table__
+        stmt = (
+            table.update()
+            .where(table.c.id == bindparam('w_id'))
+            .values(balance=table.c.balance + bindparam('w_amount'), version=table.c.version + 1)
+        )
+        db.session.execute(stmt, plain)
+    stats.incr(updates=len(plain))
+
+
+# =============================
+# DOMPET PANAS (SUB-SALDO / SHARD)
+# =============================
+def _credit_shard(wallet_id, shard_count, amount, source):
+    """
+    Tambah amount ke satu shard acak lalu commit. Baris Wallet hanya dikunci
+    shared (LOCK IN SHARE MODE), jadi kredit paralel tidak saling menunggu,
+    tetapi tetap menunggu debit/collapse/penutupan dompet yang memegang FOR UPDATE.
+    Urutan lock selalu dompet -> shard (sama seperti collapse), jadi tidak deadlock.
+    Mengembalikan False jika shard tidak ada (jumlah shard baru diubah).
+    """
+    status = (
+        db.session.query(Wallet.status)
+        .filter(Wallet.id == wallet_id)
+        .with_for_update(read=True)
+        .scalar()
+    )
+    if status != 'active':
+        db.session.rollback()
+        raise BalanceError(403 if status else 404, 'Dompet sudah ditutup.' if status else 'Dompet tidak ditemukan.')
+
+    if not credit_shard_locked(wallet_id, shard_count, amount):
+        db.session.rollback()
+        return False
+    ledger.append([ledger.entry(wallet_id, 'credit', amount, source)])
+    db.session.commit()
+    return True
+
+
+def credit_shard_locked(wallet_id, shard_count, amount):
+    """
+    Tambah amount ke satu shard acak tanpa commit & tanpa entry ledger. Pemanggil
+    sudah memegang lock (minimal shared) pada baris dompet, jadi shard_count tidak
+    bisa diubah set_shard_count di tengah jalan. False jika shard tidak ada.
+    """
+    shards = WalletShard.__table__
+    result = db.session.execute(
+        shards.update()
+        .where(shards.c.wallet_id == wallet_id, shards.c.shard_no == random.randrange(shard_count))
+        .values(balance=shards.c.balance + amount)
+    )
+    if result.rowcount != 1:
+        return False
+    stats.incr(updates=1, shard_credits=1)
+    return True
+
+
+def shard_total(wallet_id):
+    return db.session.query(func.coalesce(func.sum(WalletShard.balance), 0)).filter(
+        WalletShard.wallet_id == wallet_id).scalar()
+
+
+def total_balance(wallet):
+    """Saldo yang bisa dipakai: Wallet.balance + semua sub-saldo."""
+    if not wallet.shard_count:
+        return wallet.balance
+    return wallet.balance + Decimal(shard_total(wallet.id))
+
+
+def wallet_dict(wallet):
+    """Wallet.to_dict() dengan saldo yang sudah termasuk sub-saldo."""
+    data = wallet.to_dict()
+    if wallet.shard_count:
+        data['balance'] = str(total_balance(wallet))
+    return data
+
+
+def collapse_shards(wallet):
+    """
+    Pindahkan semua sub-saldo ke Wallet.balance. Pemanggil sudah memegang
+    FOR UPDATE pada baris dompet; tidak commit. Mengembalikan jumlah yang dipindah.
+    """
+    shard_rows = (
+        WalletShard.query.filter_by(wallet_id=wallet.id)
+        .order_by(WalletShard.shard_no)
+        .with_for_update()
+        .all()
+    )
+    moved = sum((shard.balance for shard in shard_rows), Decimal('0'))
+    if moved:
+        for shard in shard_rows:
+            shard.balance = Decimal('0.00')
+        wallet.balance += moved
+        wallet.version += 1
+    stats.incr(collapses=1)
+    return moved
+
+
+def set_shard_count(wallet_id, count):
+    """Aktifkan (count > 0), ubah, atau matikan (count = 0) sub-saldo sebuah dompet, lalu commit."""
+    wallet = Wallet.query.filter_by(id=wallet_id).with_for_update().first()
+    if not wallet:
+        db.session.rollback()
+        raise BalanceError(404, 'Dompet tidak ditemukan.')
+    if wallet.status == 'closed':
+        db.session.rollback()
+        raise BalanceError(403, 'Dompet sudah ditutup.')
+
+    # Semua shard dikosongkan dulu, jadi shard yang dihapus tidak membawa saldo
+    collapse_shards(wallet)
+    WalletShard.query.filter(WalletShard.wallet_id == wallet_id, WalletShard.shard_no >= count).delete(
+        synchronize_session=False)
+    existing = {no for (no,) in db.session.query(WalletShard.shard_no).filter_by(wallet_id=wallet_id)}
+    db.session.add_all([WalletShard(wallet_id=wallet_id, shard_no=no, balance=Decimal('0.00'))
+                        for no in range(count) if no not in existing])
+    wallet.shard_count = count
+    db.session.commit()
+    return wallet
+
+
+def collapse(wallet_id):
+    """Gabungkan sub-saldo sebuah dompet sekarang (endpoint collapse), lalu commit."""
+    wallet = Wallet.query.filter_by(id=wallet_id).with_for_update().first()
+    if not wallet:
+        db.session.rollback()
+        raise BalanceError(404, 'Dompet tidak ditemukan.')
+    moved = collapse_shards(wallet)
+    db.session.commit()
+    return wallet, moved
+
+
+# =============================
+# PENUTUPAN DOMPET
+# =============================
+def close_wallet(user_id):
+    """Tutup dompet milik user (saldo termasuk sub-saldo harus 0), lalu commit."""
+    wallet = Wallet.query.filter_by(user_id=user_id).with_for_update().first()
+    if not wallet:
+        db.session.rollback()
+        raise BalanceError(404, 'Dompet tidak ditemukan.')
+    if wallet.shard_count:
+        collapse_shards(wallet)
+
+    # Logika Bisnis: Hanya boleh tutup akun jika saldo 0
+    if wallet.balance > 0:
+        balance = wallet.balance
+        db.session.rollback()
+        raise BalanceError(400, f'Dompet tidak bisa ditutup, sisa saldo: {balance}. Tarik saldo dulu.')
+
+    wallet.status = 'closed'
+    wallet.version += 1  # CAS optimistic yang membaca dompet sebelum ditutup ikut gagal
+    db.session.commit()
+    return wallet
+
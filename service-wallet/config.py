@@ -11,4 +11,28 @@ class Config:
     SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL_WALLETS', 'mysql+pymysql://root:@localhost:3306/db_wallets')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     
-    # Kita tidak perlu SECRET_KEY di sini
\ No newline at end of file
+    # Kita tidak perlu SECRET_KEY di sini
+
+    # Mode update saldo yang aman terhadap konkurensi:
+    # 'pessimistic' = SELECT ... FOR UPDATE, 'optimistic' = kolom version + compare-and-swap
+    WALLET_LOCK_MODE = os.getenv('WALLET_LOCK_MODE', 'pessimistic')
+    # Batas retry untuk mode optimistic sebelum menyerah (409)
+    WALLET_CAS_MAX_RETRIES = int(os.getenv('WALLET_CAS_MAX_RETRIES', 10))
+
+    # Service yang menyimpan cache user_id -> dompet dan harus diberi tahu saat dompet ditutup
+    # (dipisah koma; default: API Gateway dan service-transaction; tambahkan gateway
+    # asyncio http://localhost:3100 jika dijalankan)
+    WALLET_CACHE_SUBSCRIBERS = [
+        url.strip() for url in
+        os.getenv('WALLET_CACHE_SUBSCRIBERS', 'http://localhost:3000,http://localhost:3003').split(',')
+        if url.strip()
+    ]
+
+    # Snapshot saldo ledger: dompet dengan >= LEDGER_SNAPSHOT_MIN_ENTRIES entry sejak
+    # snapshot terakhir di-snapshot ulang setiap LEDGER_SNAPSHOT_INTERVAL detik (0 = mati;
+    # bisa juga dipicu manual/cron lewat POST /internal/ledger/snapshots)
+    LEDGER_SNAPSHOT_INTERVAL = float(os.getenv('LEDGER_SNAPSHOT_INTERVAL', 300))
+    LEDGER_SNAPSHOT_MIN_ENTRIES = int(os.getenv('LEDGER_SNAPSHOT_MIN_ENTRIES', 1000))
+
+    # Batas jumlah sub-saldo per dompet panas (PUT /internal/wallets/<id>/shards)
+    WALLET_SHARD_MAX = int(os.getenv('WALLET_SHARD_MAX', 64))
@@ -0,0 +1,47 @@
+# service-wallet/consumers.py
+# Consumer event bus untuk service-wallet: dompet dibuat/ditutup dari event
+# service-user, bukan lewat panggilan HTTP di dalam request registrasi/tutup akun.
+# Event bisa datang lebih dari sekali, jadi semua handler idempoten.
+
+from decimal import Decimal
+
+from models import db, Wallet
+from balance import BalanceError, close_wallet
+
+
+def create_wallets(user_ids):
+    """Buat dompet untuk user yang belum punya, dengan satu INSERT executemany."""
+    user_ids = list(dict.fromkeys(user_ids))
+    existing = {user_id for (user_id,) in
+                db.session.query(Wallet.user_id).filter(Wallet.user_id.in_(user_ids))}
+    rows = [{'user_id': user_id, 'balance': Decimal('0.00'), 'status': 'active'}
+            for user_id in user_ids if user_id not in existing]
+    if rows:
+        db.session.execute(db.insert(Wallet), rows)
+    db.session.commit()
+    return len(rows)
+
+
+def register_consumers(events, app):
+    def on_user_events(batch):
+        with app.app_context():
+            try:
+                registered = [e.payload['user_id'] for e in batch if e.topic == 'user.registered']
+                if registered:
+                    print(f"[events] {create_wallets(registered)} dompet baru dibuat")
+
+                closed = []
+                for event in batch:
+                    if event.topic != 'user.closed':
+                        continue
+                    try:
+                        wallet = close_wallet(event.payload['user_id'])
+                        closed.append(('wallet.closed', {'wallet_id': wallet.id, 'user_id': wallet.user_id}))
+                    except BalanceError as e:
+                        # Sama seperti alur HTTP lama: akun tetap ditutup, dompet dibiarkan
+                        print(f"[events] Dompet user {event.payload['user_id']} tidak ditutup: {e.message}")
+                events.publish_many(closed)
+            finally:
+                db.session.remove()
+
+    events.subscribe('wallet', ['user.registered', 'user.closed'], on_user_events)
@@ -0,0 +1,235 @@
+# service-wallet/ledger.py
+# Buku besar (ledger) append-only untuk setiap mutasi saldo.
+# Wallet.balance tetap disimpan (jalur cepat untuk cek saldo), tetapi setiap
+# debit/kredit juga dicatat sebagai LedgerEntry di transaksi DB yang sama.
+# Saldo dari ledger = snapshot terakhir + jumlah entry setelahnya, sehingga
+# saldo di titik waktu mana pun dan rekonsiliasi tidak perlu menjumlah seluruh riwayat.
+
+import threading
+import time
+from decimal import Decimal
+
+from sqlalchemy import case, func, select
+
+from models import db, Wallet, WalletShard, LedgerEntry, WalletSnapshot
+
+# Entry kredit bernilai +amount, debit -amount
+SIGNED_AMOUNT = case((LedgerEntry.entry_type == 'credit', LedgerEntry.amount), else_=-LedgerEntry.amount)
+
+# Sumber mutasi yang juga tercatat sebagai baris Transaction di service-transaction
+TRANSFER_SOURCES = ('transfer', 'batch')
+
+
+# =============================
+# MENULIS ENTRY
+# =============================
+def entry(wallet_id, entry_type, amount, source, counterparty_wallet_id=None):
+    return {
+        'wallet_id': wallet_id,
+        'entry_type': entry_type,
+        'amount': amount,
+        'source': source,
+        'counterparty_wallet_id': counterparty_wallet_id,
+    }
+
+
+def append(entries):
+    """
+    Tulis banyak entry dengan satu INSERT executemany. Tidak commit; dipanggil
+    di dalam transaksi yang sama dengan perubahan Wallet.balance, jadi entry
+    dan saldo selalu konsisten (keduanya masuk atau keduanya batal).
+    """
+    if entries:
+        db.session.execute(db.insert(LedgerEntry), list(entries))
+
+
+# =============================
+# MEMBACA SALDO DARI LEDGER
+# =============================
+def latest_snapshot(wallet_id, at=None):
+    query = WalletSnapshot.query.filter_by(wallet_id=wallet_id)
+    if at is not None:
+        query = query.filter(WalletSnapshot.created_at <= at)
+    return query.order_by(WalletSnapshot.id.desc()).first()
+
+
+def balance_at(wallet_id, at=None):
+    """Saldo dompet menurut ledger pada waktu `at` (None = sekarang)."""
+    snapshot = latest_snapshot(wallet_id, at)
+    base = snapshot.balance if snapshot else Decimal('0.00')
+    after_entry_id = snapshot.last_entry_id if snapshot else 0
+
+    query = (
+        db.session.query(func.coalesce(func.sum(SIGNED_AMOUNT), 0), func.count(LedgerEntry.id))
+        .filter(LedgerEntry.wallet_id == wallet_id, LedgerEntry.id > after_entry_id)
+    )
+    if at is not None:
+        query = query.filter(LedgerEntry.created_at <= at)
+    tail, tail_entries = query.one()
+
+    return {
+        'wallet_id': wallet_id,
+        'at': at.isoformat() if at else None,
+        'balance': str(base + Decimal(tail)),
+        'snapshot': snapshot.to_dict() if snapshot else None,
+        'tail_entries': tail_entries,
+    }
+
+
+# =============================
+# SNAPSHOT
+# =============================
+def take_snapshot(wallet_id):
+    """
+    Snapshot baru = snapshot sebelumnya + jumlah entry setelahnya (murni dari ledger,
+    bukan salinan Wallet.balance), lalu commit. Dengan begitu selisih antara
+    Wallet.balance dan ledger tidak pernah "dibekukan" ke snapshot dan tetap
+    terdeteksi oleh reconcile(). Baris dompet dikunci dulu: semua mutasi saldo
+    memegang lock baris yang sama sampai commit, jadi tidak ada entry dompet ini
+    yang masih 'di tengah jalan' saat max(id) dibaca.
+    """
+    wallet = Wallet.query.filter_by(id=wallet_id).with_for_update().first()
+    if not wallet:
+        db.session.rollback()
+        return None
+    previous = latest_snapshot(wallet_id)
+    base = previous.balance if previous else Decimal('0.00')
+    after_entry_id = previous.last_entry_id if previous else 0
+
+    tail, last_entry_id = (
+        db.session.query(func.coalesce(func.sum(SIGNED_AMOUNT), 0), func.max(LedgerEntry.id))
+        .filter(LedgerEntry.wallet_id == wallet_id, LedgerEntry.id > after_entry_id)
+        .one()
+    )
+    snapshot = WalletSnapshot(wallet_id=wallet_id, balance=base + Decimal(tail),
+                              last_entry_id=last_entry_id or after_entry_id)
+    db.session.add(snapshot)
+    db.session.commit()
+    return snapshot
+
+
+def _latest_snapshots():
+    """Subquery: snapshot terakhir per dompet (wallet_id, balance, last_entry_id)."""
+    latest_ids = (
+        select(func.max(WalletSnapshot.id).label('id'))
+        .group_by(WalletSnapshot.wallet_id)
+        .subquery()
+    )
+    return (
+        select(WalletSnapshot.wallet_id, WalletSnapshot.balance, WalletSnapshot.last_entry_id)
+        .join(latest_ids, WalletSnapshot.id == latest_ids.c.id)
+        .subquery()
+    )
+
+
+def _tails(snapshots):
+    """Subquery: jumlah & banyaknya entry setelah snapshot terakhir, per dompet."""
+    return (
+        select(
+            LedgerEntry.wallet_id,
+            func.sum(SIGNED_AMOUNT).label('amount'),
+            func.count(LedgerEntry.id).label('entries'),
+        )
+        .outerjoin(snapshots, snapshots.c.wallet_id == LedgerEntry.wallet_id)
+        .where(LedgerEntry.id > func.coalesce(snapshots.c.last_entry_id, 0))
+        .group_by(LedgerEntry.wallet_id)
+        .subquery()
+    )
+
+
+def wallets_due_for_snapshot(min_entries):
+    """Dompet tanpa snapshot sama sekali, atau dengan >= min_entries entry sejak snapshot terakhir."""
+    snapshots = _latest_snapshots()
+    tails = _tails(snapshots)
+    rows = db.session.execute(
+        select(Wallet.id)
+        .outerjoin(snapshots, snapshots.c.wallet_id == Wallet.id)
+        .outerjoin(tails, tails.c.wallet_id == Wallet.id)
+        .where((snapshots.c.wallet_id.is_(None)) | (tails.c.entries >= min_entries))
+        .order_by(Wallet.id)
+    ).scalars().all()
+    db.session.rollback()  # akhiri transaksi baca sebelum mulai mengunci dompet
+    return rows
+
+
+def snapshot_due(min_entries):
+    """Snapshot semua dompet yang jatuh tempo. Mengembalikan jumlah snapshot baru."""
+    taken = 0
+    for wallet_id in wallets_due_for_snapshot(min_entries):
+        if take_snapshot(wallet_id) is not None:
+            taken += 1
+    return taken
+
+
+def start_snapshot_worker(app, interval, min_entries):
+    """Thread latar yang menjalankan snapshot_due setiap `interval` detik."""
+    def run():
+        while True:
+            time.sleep(interval)
+            with app.app_context():
+                try:
+                    taken = snapshot_due(min_entries)
+                    if taken:
+                        print(f"[ledger] {taken} snapshot saldo dibuat")
+                except Exception as e:
+                    db.session.rollback()
+                    print(f"[ledger] Gagal membuat snapshot: {e}")
+                finally:
+                    db.session.remove()
+
+    thread = threading.Thread(target=run, name='ledger-snapshot', daemon=True)
+    thread.start()
+    return thread
+
+
+# =============================
+# REKONSILIASI
+# =============================
+def reconcile(limit=100):
+    """
+    Bandingkan saldo dompet (Wallet.balance + sub-saldo) dengan saldo ledger
+    (snapshot + tail) untuk semua dompet dalam SATU query (satu read view yang konsisten).
+    """
+    snapshots = _latest_snapshots()
+    tails = _tails(snapshots)
+    shards = (
+        select(WalletShard.wallet_id, func.sum(WalletShard.balance).label('amount'))
+        .group_by(WalletShard.wallet_id)
+        .subquery()
+    )
+    balance = Wallet.balance + func.coalesce(shards.c.amount, 0)
+    ledger_balance = func.coalesce(snapshots.c.balance, 0) + func.coalesce(tails.c.amount, 0)
+    mismatches = db.session.execute(
+        select(Wallet.id, balance.label('balance'), ledger_balance.label('ledger_balance'))
+        .outerjoin(shards, shards.c.wallet_id == Wallet.id)
+        .outerjoin(snapshots, snapshots.c.wallet_id == Wallet.id)
+        .outerjoin(tails, tails.c.wallet_id == Wallet.id)
+        .where(balance != ledger_balance)
+        .order_by(Wallet.id)
+        .limit(limit)
+    ).all()
+    return [
+        {'wallet_id': wallet_id, 'balance': str(balance), 'ledger_balance': str(ledger)}
+        for wallet_id, balance, ledger in mismatches
+    ]
+
+
+def transfer_summary(time_from=None, time_to=None):
+    """
+    Total debit/kredit transfer per dompet dalam rentang waktu, untuk dicocokkan
+    dengan total Transaction di service-transaction.
+    """
+    query = (
+        db.session.query(LedgerEntry.wallet_id, LedgerEntry.entry_type, func.sum(LedgerEntry.amount))
+        .filter(LedgerEntry.source.in_(TRANSFER_SOURCES))
+    )
+    if time_from is not None:
+        query = query.filter(LedgerEntry.created_at >= time_from)
+    if time_to is not None:
+        query = query.filter(LedgerEntry.created_at < time_to)
+
+    summary = {}
+    for wallet_id, entry_type, amount in query.group_by(LedgerEntry.wallet_id, LedgerEntry.entry_type):
+        totals = summary.setdefault(str(wallet_id), {'debit': '0.00', 'credit': '0.00'})
+        totals[entry_type] = str(amount)
+    return summary
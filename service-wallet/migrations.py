@@ -0,0 +1,106 @@
+# service-wallet/migrations.py
+# Migrasi skema db_wallets. Jalankan sebelum start service (app.py tidak lagi membuat tabel):
+#   python migrations.py [--status] [--to VERSI]
+# Tambah perubahan skema sebagai Migration baru di akhir daftar, jangan ubah yang lama.
+
+import os
+import sys
+from datetime import datetime
+
+import sqlalchemy as sa
+from flask import Flask
+
+from config import Config
+from models import db
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from common.migrations import Migration, add_column, create_index, create_table, main
+
+
+def baseline(conn):
+    create_table(conn, sa.Table(
+        'wallet', sa.MetaData(),
+        sa.Column('id', sa.Integer, primary_key=True),
+        sa.Column('user_id', sa.Integer, unique=True, nullable=False),
+        sa.Column('balance', sa.Numeric(15, 2), nullable=False),
+        sa.Column('label', sa.String(100), nullable=True),
+        sa.Column('status', sa.String(20), nullable=False),
+    ))
+
+
+def wallet_version(conn):
+    # Optimistic lock (WALLET_LOCK_MODE=optimistic)
+    add_column(conn, 'wallet', sa.Column('version', sa.Integer, nullable=False, server_default=sa.text('0')))
+
+
+def ledger(conn):
+    metadata = sa.MetaData()
+    create_table(conn, sa.Table(
+        'ledger_entry', metadata,
+        sa.Column('id', sa.BigInteger, primary_key=True),
+        sa.Column('wallet_id', sa.Integer, nullable=False),
+        sa.Column('entry_type', sa.String(10), nullable=False),
+        sa.Column('amount', sa.Numeric(15, 2), nullable=False),
+        sa.Column('source', sa.String(20), nullable=False),
+        sa.Column('counterparty_wallet_id', sa.Integer, nullable=True),
+        sa.Column('created_at', sa.DateTime, nullable=False),
+        sa.Index('ix_ledger_wallet_id', 'wallet_id', 'id'),
+        sa.Index('ix_ledger_created', 'created_at'),
+    ))
+    create_table(conn, sa.Table(
+        'wallet_snapshot', metadata,
+        sa.Column('id', sa.Integer, primary_key=True),
+        sa.Column('wallet_id', sa.Integer, nullable=False),
+        sa.Column('balance', sa.Numeric(15, 2), nullable=False),
+        sa.Column('last_entry_id', sa.BigInteger, nullable=False),
+        sa.Column('created_at', sa.DateTime, nullable=False),
+        sa.Index('ix_snapshot_wallet_entry', 'wallet_id', 'last_entry_id'),
+        sa.Index('ix_snapshot_wallet_created', 'wallet_id', 'created_at'),
+    ))
+
+
+def wallet_shards(conn):
+    add_column(conn, 'wallet', sa.Column('shard_count', sa.Integer, nullable=False, server_default=sa.text('0')))
+    create_table(conn, sa.Table(
+        'wallet_shard', sa.MetaData(),
+        sa.Column('id', sa.Integer, primary_key=True),
+        sa.Column('wallet_id', sa.Integer, nullable=False),
+        sa.Column('shard_no', sa.Integer, nullable=False),
+        sa.Column('balance', sa.Numeric(15, 2), nullable=False),
+        sa.UniqueConstraint('wallet_id', 'shard_no', name='uq_wallet_shard'),
+    ))
+
+
+def wallet_status_index(conn):
+    # Filter dompet aktif/tertutup tanpa full scan
+    create_index(conn, 'wallet', 'ix_wallet_status', 'status')
+
+
+def opening_entries(conn):
+    # Snapshot kini dihitung murni dari ledger (snapshot lama + entry). Saldo dompet yang
+    # sudah ada sebelum ledger (tanpa entry & snapshot sama sekali) dicatat sebagai satu
+    # entry kredit 'opening', supaya tidak terbaca sebagai selisih oleh rekonsiliasi
+    conn.execute(sa.text(
+        "INSERT INTO ledger_entry (wallet_id, entry_type, amount, source, created_at) "
+        "SELECT w.id, 'credit', w.balance, 'opening', :now FROM wallet w "
+        "WHERE w.balance > 0 "
+        "AND NOT EXISTS (SELECT 1 FROM ledger_entry e WHERE e.wallet_id = w.id) "
+        "AND NOT EXISTS (SELECT 1 FROM wallet_snapshot s WHERE s.wallet_id = w.id)"
+    ), {'now': datetime.utcnow()})
+
+
+MIGRATIONS = [
+    Migration(1, 'Tabel wallet', baseline),
+    Migration(2, 'Kolom wallet.version (optimistic lock)', wallet_version),
+    Migration(3, 'Tabel ledger_entry & wallet_snapshot', ledger),
+    Migration(4, 'Kolom wallet.shard_count & tabel wallet_shard', wallet_shards),
+    Migration(5, 'Index wallet.status', wallet_status_index),
+    Migration(6, "Entry ledger 'opening' untuk saldo dompet sebelum ledger", opening_entries),
+]
+
+
+if __name__ == '__main__':
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    db.init_app(app)
+    main(app, db, MIGRATIONS)
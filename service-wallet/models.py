@@ -2,10 +2,15 @@
 
 from flask_sqlalchemy import SQLAlchemy
 from decimal import Decimal # Wajib untuk uang
+from datetime import datetime
 
 db = SQLAlchemy()
 
 class Wallet(db.Model):
+    __table_args__ = (
+        db.Index('ix_wallet_status', 'status'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     # Ini adalah ID user dari 'db_users'
     user_id = db.Column(db.Integer, unique=True, nullable=False) 
@@ -15,6 +20,13 @@ class Wallet(db.Model):
     
     # --- TAMBAHAN BARU (Sesuai service-user) ---
     status = db.Column(db.String(20), nullable=False, default='active') # (active, closed)
+
+    # Naik setiap kali saldo berubah; dipakai untuk compare-and-swap (optimistic lock)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+    # Jumlah sub-saldo (WalletShard) untuk dompet "panas" (merchant); 0 = tidak di-shard.
+    # Saldo sebenarnya = balance + SUM(shard.balance)
+    shard_count = db.Column(db.Integer, nullable=False, default=0)
     
     def to_dict(self):
         return {
@@ -23,4 +35,68 @@ class Wallet(db.Model):
             'balance': str(self.balance), # Selalu kirim uang sebagai string di JSON
             'label': self.label,
             'status': self.status
-        }
\ No newline at end of file
+        }
+
+
+class WalletShard(db.Model):
+    """Sub-saldo dompet panas: kredit tersebar acak ke N baris, jadi tidak antri di satu row lock."""
+    __table_args__ = (
+        db.UniqueConstraint('wallet_id', 'shard_no', name='uq_wallet_shard'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    wallet_id = db.Column(db.Integer, nullable=False)
+    shard_no = db.Column(db.Integer, nullable=False)
+    balance = db.Column(db.Numeric(15, 2), nullable=False, default=Decimal('0.00'))
+
+
+class LedgerEntry(db.Model):
+    """Mutasi saldo (append-only): satu baris per debit/kredit, tidak pernah di-update/dihapus."""
+    __table_args__ = (
+        # Saldo per dompet = snapshot + SUM(entry dengan id > last_entry_id)
+        db.Index('ix_ledger_wallet_id', 'wallet_id', 'id'),
+        db.Index('ix_ledger_created', 'created_at'),
+    )
+
+    # SQLite hanya auto-increment untuk INTEGER PRIMARY KEY (dipakai di tests/)
+    id = db.Column(db.BigInteger().with_variant(db.Integer, 'sqlite'), primary_key=True)
+    wallet_id = db.Column(db.Integer, nullable=False)
+    entry_type = db.Column(db.String(10), nullable=False) # 'debit', 'credit'
+    amount = db.Column(db.Numeric(15, 2), nullable=False) # selalu positif
+    # Asal mutasi: 'topup', 'balance', 'transfer', 'batch', 'opening' (saldo sebelum ada ledger)
+    source = db.Column(db.String(20), nullable=False, default='balance')
+    counterparty_wallet_id = db.Column(db.Integer, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'wallet_id': self.wallet_id,
+            'type': self.entry_type,
+            'amount': str(self.amount),
+            'source': self.source,
+            'counterparty_wallet_id': self.counterparty_wallet_id,
+            'created_at': self.created_at.isoformat()
+        }
+
+
+class WalletSnapshot(db.Model):
+    """Saldo dompet pada titik ledger tertentu (semua entry s/d last_entry_id sudah termasuk)."""
+    __table_args__ = (
+        db.Index('ix_snapshot_wallet_entry', 'wallet_id', 'last_entry_id'),
+        db.Index('ix_snapshot_wallet_created', 'wallet_id', 'created_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    wallet_id = db.Column(db.Integer, nullable=False)
+    balance = db.Column(db.Numeric(15, 2), nullable=False)
+    last_entry_id = db.Column(db.BigInteger, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'wallet_id': self.wallet_id,
+            'balance': str(self.balance),
+            'last_entry_id': self.last_entry_id,
+            'created_at': self.created_at.isoformat()
+        }
@@ -0,0 +1,23 @@
+# tests/conftest.py
+# Modul bersama (common/) berada di root repo
+import importlib
+import os
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+
+def load_service_modules(service, *names):
+    """
+    Import modul milik satu service (models, outbox, ...). Nama modulnya sama di setiap
+    service, jadi setelah di-import semuanya dikeluarkan lagi dari sys.modules.
+    """
+    service_dir = os.path.join(ROOT, service)
+    sys.path.insert(0, service_dir)
+    try:
+        return [importlib.import_module(name) for name in names]
+    finally:
+        sys.path.remove(service_dir)
+        for name in ("models", "config", "balance", "ledger", "outbox", "consumers", "jwt_utils", "dashboard") + names:
+            sys.modules.pop(name, None)
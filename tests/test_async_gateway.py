@@ -0,0 +1,134 @@
+# tests/test_async_gateway.py
+"""API Gateway aiohttp (service-gateway/async_app.py) dengan service-wallet tiruan."""
+import asyncio
+
+import pytest
+
+pytest.importorskip("aiohttp")
+pytest.importorskip("jwt")
+
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+
+JWT_SECRET = "test-secret-for-gateway-tests-32b"
+
+
+@pytest.fixture
+def async_gateway(monkeypatch):
+    from conftest import load_service_modules
+    from common import events, idempotency
+
+    monkeypatch.setenv("JWT_SECRET_KEY", JWT_SECRET)
+    monkeypatch.setattr(events, "EVENT_BUS_ENABLED", False)
+    monkeypatch.setattr(idempotency, "IDEMPOTENCY_BACKEND", "memory")
+    (module,) = load_service_modules("service-gateway", "async_app")
+    return module
+
+
+def run_with_wallet(module, scenario, balance_status=200, me_delay=0):
+    """Jalankan scenario(client, calls) dengan service-wallet tiruan di port lokal."""
+    calls = []
+
+    async def by_user(request):
+        calls.append("GET")
+        return web.json_response({"id": 5, "user_id": 1, "status": "active"})
+
+    async def balance(request):
+        calls.append("PUT")
+        if balance_status != 200:
+            return web.json_response({"message": "Dompet sudah ditutup."}, status=balance_status)
+        return web.json_response({"id": 5, "balance": str(10 * len([c for c in calls if c == "PUT"]))})
+
+    async def me(request):
+        calls.append("ME")
+        await asyncio.sleep(me_delay)
+        return web.json_response({"id": 5, "balance": "0.00"})
+
+    async def main():
+        upstream = web.Application()
+        upstream.router.add_get("/wallets/me", me)
+        upstream.router.add_get("/internal/wallets/by-user/1", by_user)
+        upstream.router.add_put("/internal/wallets/5/balance", balance)
+        upstream_server = TestServer(upstream)
+        await upstream_server.start_server()
+        module.SERVICES["wallet"] = str(upstream_server.make_url("/"))
+        client = TestClient(TestServer(module.create_app()))
+        await client.start_server()
+        try:
+            await scenario(client, calls)
+        finally:
+            await client.close()
+            await upstream_server.close()
+
+    asyncio.run(main())
+    return calls
+
+
+def auth_headers(**extra):
+    import jwt
+    return {"Authorization": "Bearer " + jwt.encode({"user_id": 1}, JWT_SECRET, algorithm="HS256"), **extra}
+
+
+def test_topup_retry_is_replayed_at_the_gateway(async_gateway):
+    async def scenario(client, calls):
+        headers = auth_headers(**{"Idempotency-Key": "k1"})
+        first = await client.post("/api/topup", json={"amount": 10}, headers=headers)
+        retry = await client.post("/api/topup", json={"amount": 10}, headers=headers)
+        assert retry.status == 200
+        assert retry.headers["Idempotent-Replayed"] == "true"
+        assert await retry.json() == await first.json()
+        reused = await client.post("/api/topup", json={"amount": 20}, headers=headers)
+        assert reused.status == 422
+
+    calls = run_with_wallet(async_gateway, scenario)
+    assert calls.count("PUT") == 1
+
+
+def test_topup_goes_through_guard_and_wallet_cache(async_gateway):
+    async def scenario(client, calls):
+        for _ in range(2):
+            res = await client.post("/api/topup", json={"amount": 10}, headers=auth_headers())
+            assert res.status == 200
+
+    calls = run_with_wallet(async_gateway, scenario)
+    assert calls == ["GET", "PUT", "PUT"]  # lookup dompet kedua dari cache
+    assert async_gateway.GUARDS["wallet"].bulkhead.stats()["in_flight"] == 0
+    assert async_gateway.GUARDS["wallet"].breaker.stats()["consecutive_failures"] == 0
+
+
+def test_topup_on_closed_wallet_drops_cached_lookup(async_gateway):
+    async def scenario(client, calls):
+        for _ in range(2):
+            res = await client.post("/api/topup", json={"amount": 10}, headers=auth_headers())
+            assert res.status == 403
+
+    calls = run_with_wallet(async_gateway, scenario, balance_status=403)
+    assert calls == ["GET", "PUT", "GET", "PUT"]  # mapping basi tidak dipakai lagi
+
+
+def test_internal_cache_invalidation_requires_internal_caller(async_gateway, monkeypatch):
+    from common import internal_auth
+    monkeypatch.setattr(internal_auth, "INTERNAL_SECRET", "s3cret")
+
+    async def scenario(client, calls):
+        await client.post("/api/topup", json={"amount": 10}, headers=auth_headers())
+        denied = await client.delete("/internal/cache/wallets/1")
+        assert denied.status == 403
+        allowed = await client.delete("/internal/cache/wallets/1", headers={"X-Internal-Secret": "s3cret"})
+        assert allowed.status == 200
+        await client.post("/api/topup", json={"amount": 10}, headers=auth_headers())
+
+    calls = run_with_wallet(async_gateway, scenario)
+    assert calls == ["GET", "PUT", "GET", "PUT"]
+
+
+def test_upstream_timeout_is_504_like_flask_gateway(async_gateway, monkeypatch):
+    from common import http_client
+    monkeypatch.setattr(http_client, "READ_TIMEOUT", 0.2)
+
+    async def scenario(client, calls):
+        res = await client.get("/api/wallets/me", headers=auth_headers())
+        assert res.status == 504
+        assert (await res.json())["error"] == "wallet service timeout"
+
+    run_with_wallet(async_gateway, scenario, me_delay=1)
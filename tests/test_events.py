@@ -0,0 +1,86 @@
+# tests/test_events.py
+"""Event bus (common/events.py) dengan beberapa "worker" = beberapa EventBus di file SQLite yang sama."""
+import sqlite3
+import threading
+import time
+
+from common.events import EventBus
+
+
+def make_bus(tmp_path, **options):
+    options.setdefault("poll_interval", 0.05)
+    return EventBus(path=str(tmp_path / "events.sqlite3"), **options)
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+def test_shared_consumer_processes_each_event_once(tmp_path):
+    handled = []
+    lock = threading.Lock()
+
+    def handler(batch):
+        with lock:
+            handled.extend(event.id for event in batch)
+
+    workers = [make_bus(tmp_path) for _ in range(3)]
+    for bus in workers:
+        bus.subscribe("wallet", ["user.registered"], handler)
+        bus.start()
+
+    workers[0].publish_many([("user.registered", {"user_id": i}) for i in range(50)])
+    assert wait_until(lambda: len(handled) >= 50)
+    time.sleep(0.3)  # beri kesempatan worker lain memproses ulang (seharusnya tidak)
+    assert sorted(handled) == list(range(1, 51))
+
+
+def test_lease_is_taken_over_after_expiry(tmp_path):
+    bus = make_bus(tmp_path, lease_ttl=0.2)
+    assert bus.acquire_lease("wallet", "worker-a")
+    assert not bus.acquire_lease("wallet", "worker-b")
+    assert bus.acquire_lease("wallet", "worker-a")  # perpanjang
+    time.sleep(0.3)
+    assert bus.acquire_lease("wallet", "worker-b")
+    assert not bus.acquire_lease("wallet", "worker-a")
+
+
+def test_consumer_survives_locked_database(tmp_path):
+    handled = []
+    bus = make_bus(tmp_path, busy_timeout=0.1)
+    bus.subscribe("wallet", ["user.registered"], lambda batch: handled.extend(e.id for e in batch))
+    bus.last_event_id()  # buat skema sebelum dikunci
+
+    # Penulis lain memegang kunci tulis lebih lama dari busy_timeout: acquire_lease gagal "database is locked"
+    blocker = sqlite3.connect(bus.path, isolation_level=None)
+    blocker.execute("BEGIN IMMEDIATE")
+    bus.start()
+    time.sleep(0.5)
+    blocker.execute("COMMIT")
+    blocker.close()
+
+    assert all(thread.is_alive() for thread in bus._threads)
+    bus.publish("user.registered", {"user_id": 1})
+    assert wait_until(lambda: handled == [1])
+
+
+def test_per_process_consumers_each_see_every_event(tmp_path):
+    seen = {}
+
+    workers = [make_bus(tmp_path) for _ in range(2)]
+    for index, bus in enumerate(workers):
+        seen[index] = []
+        bus.subscribe("gateway", ["wallet.closed"], lambda batch, i=index: seen[i].extend(e.id for e in batch),
+                      per_process=True)
+
+    workers[0].publish("wallet.closed", {"user_id": 1})  # sebelum start: tidak diputar ulang
+    for bus in workers:
+        bus.start()
+    workers[0].publish_many([("wallet.closed", {"user_id": i}) for i in range(2, 6)])
+    assert wait_until(lambda: all(len(ids) == 4 for ids in seen.values()))
+    assert seen[0] == seen[1] == [2, 3, 4, 5]
@@ -0,0 +1,137 @@
+# tests/test_gateway.py
+"""API Gateway Flask (service-gateway/app.py): endpoint admin & internal."""
+import pytest
+
+pytest.importorskip("flask")
+pytest.importorskip("jwt")
+
+
+def auth_headers(user_id=7):
+    import jwt
+    return {"Authorization": "Bearer " + jwt.encode({"user_id": user_id}, "test-secret-for-gateway-tests-32b", algorithm="HS256")}
+
+
+@pytest.fixture
+def gateway(monkeypatch):
+    from conftest import load_service_modules
+    from common import events, idempotency, internal_auth
+
+    monkeypatch.setenv("JWT_SECRET_KEY", "test-secret-for-gateway-tests-32b")
+    monkeypatch.setattr(events, "EVENT_BUS_ENABLED", False)
+    monkeypatch.setattr(idempotency, "IDEMPOTENCY_BACKEND", "memory")
+    monkeypatch.setattr(internal_auth, "ADMIN_TOKEN", "adm1n")
+    monkeypatch.setattr(internal_auth, "INTERNAL_SECRET", "s3cret")
+    (app_module,) = load_service_modules("service-gateway", "app")
+    return app_module
+
+
+@pytest.mark.parametrize("path", ["/admin/upstreams", "/admin/pools", "/admin/caches", "/admin/events"])
+def test_admin_endpoints_require_admin_token(gateway, path):
+    client = gateway.app.test_client()
+    assert client.get(path).status_code == 403
+    assert client.get(path, headers={"X-Admin-Token": "adm1n"}).status_code == 200
+
+
+def test_wallet_cache_invalidation_is_internal_only(gateway):
+    client = gateway.app.test_client()
+    path = "/internal/cache/wallets/7"
+    assert client.delete(path).status_code == 403
+    assert client.delete(path, headers={"X-Internal-Secret": "wrong"}).status_code == 403
+    assert client.delete(path, headers={"X-Internal-Secret": "s3cret"}).status_code == 200
+
+
+def test_profile_and_payee_invalidation_reaches_other_workers(gateway, tmp_path):
+    from common.events import EventBus
+    from common.response_cache import INVALIDATE_TOPIC, publish_invalidation
+
+    bus = EventBus(path=str(tmp_path / "events.sqlite3"))
+    # Worker lain menulis profil: wallets_me tidak ikut (sudah lewat wallet.balance_changed)
+    publish_invalidation(bus, 7, ("users_me", "wallets_me", "payees"))
+    batch = bus.fetch("gateway", [INVALIDATE_TOPIC], after=0)
+    assert [event.payload for event in batch] == [{"user_id": 7, "routes": ["users_me", "payees"]}]
+
+    cache = gateway.RESPONSE_CACHE
+    for route in ("users_me", "payees"):
+        cache.set(route, 7, b"{}", "application/json")
+    cache.set("users_me", 8, b"{}", "application/json")
+    gateway.on_cache_events(batch)
+
+    assert cache.get("users_me", 7) is None
+    assert cache.get("payees", 7) is None
+    assert cache.get("users_me", 8) is not None
+
+
+def test_export_timeout_is_504(gateway, monkeypatch):
+    import requests
+
+    def timeout(*args, **kwargs):
+        raise requests.exceptions.ReadTimeout("slow export")
+
+    monkeypatch.setattr(gateway.CLIENTS["transaction"], "get", timeout)
+    res = gateway.app.test_client().get("/api/transactions/export", headers=auth_headers())
+    assert res.status_code == 504
+
+
+class TruncatedUpstream:
+    """Upstream yang mengirim header + sebagian body lalu memutus koneksi."""
+
+    def __init__(self):
+        import socket
+        import threading
+
+        self.sock = socket.socket()
+        self.sock.bind(("127.0.0.1", 0))
+        self.sock.listen()
+        self.url = f"http://127.0.0.1:{self.sock.getsockname()[1]}"
+        threading.Thread(target=self._serve, daemon=True).start()
+
+    def _serve(self):
+        while True:
+            try:
+                conn, _ = self.sock.accept()
+            except OSError:
+                return
+            conn.recv(65536)
+            conn.sendall(b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\nContent-Length: 1000\r\n\r\n[{\"id\": 1}")
+            conn.close()
+
+    def stop(self):
+        self.sock.close()
+
+
+@pytest.fixture
+def truncated_transactions(gateway, monkeypatch):
+    from scripts.fault_injection import make_client
+
+    upstream = TruncatedUpstream()
+    client = make_client(upstream.url, threshold=2, reset_timeout=30)
+    monkeypatch.setitem(gateway.CLIENTS, "transaction", client)
+    yield client
+    upstream.stop()
+
+
+@pytest.mark.parametrize("path", ["/api/transactions", "/api/transactions/export"])
+def test_broken_stream_counts_as_failure_and_releases_slot(gateway, truncated_transactions, path):
+    guard = truncated_transactions.guard
+    # urllib3 ProtocolError (passthrough) / requests ChunkedEncodingError (export)
+    with pytest.raises(Exception, match="IncompleteRead"):
+        gateway.app.test_client().get(path, headers=auth_headers()).get_data()
+
+    assert guard.bulkhead.stats()["in_flight"] == 0
+    assert guard.breaker.stats()["consecutive_failures"] == 1
+
+
+def test_passthrough_holds_slot_until_client_is_done(gateway, monkeypatch):
+    from scripts.fault_injection import StubUpstream, make_client
+
+    upstream = StubUpstream()
+    client = make_client(upstream.url)
+    monkeypatch.setitem(gateway.CLIENTS, "transaction", client)
+    try:
+        res = gateway.app.test_client().get("/api/transactions", headers=auth_headers())
+        assert client.guard.bulkhead.stats()["in_flight"] == 1
+        assert res.get_json() == {"ok": True}
+        res.close()
+        assert client.guard.bulkhead.stats()["in_flight"] == 0
+    finally:
+        upstream.stop()
@@ -0,0 +1,74 @@
+# tests/test_idempotency.py
+"""Idempotency-Key dibagi antar worker: dua store = dua proses di file SQLite yang sama."""
+import pytest
+
+pytest.importorskip("flask")
+
+from flask import Flask
+
+from common.idempotency import SQLiteIdempotencyStore, idempotent
+
+
+def make_store(tmp_path, **options):
+    return SQLiteIdempotencyStore(path=str(tmp_path / "idempotency.sqlite3"), **options)
+
+
+def test_states_are_shared_between_workers(tmp_path):
+    worker_a, worker_b = make_store(tmp_path), make_store(tmp_path)
+    assert worker_a.begin("k", "f") == ("new", None)
+    assert worker_b.begin("k", "f") == ("in_progress", None)
+    assert worker_b.begin("k", "other") == ("mismatch", None)
+
+    worker_a.complete("k", "f", 201, b'{"ok": true}', "application/json")
+    assert worker_b.begin("k", "f") == ("replay", (201, b'{"ok": true}', "application/json"))
+
+    worker_b.release("k")
+    assert worker_a.begin("k", "f") == ("new", None)
+
+
+def test_expired_key_is_processed_again(tmp_path):
+    store = make_store(tmp_path, ttl=-1)
+    assert store.begin("k", "f")[0] == "new"
+    store.complete("k", "f", 200, b"{}", "application/json")
+    assert store.begin("k", "f")[0] == "new"
+
+
+def test_retry_on_other_worker_is_replayed(tmp_path):
+    applied = []
+
+    def make_app():
+        app = Flask(__name__)
+        store = make_store(tmp_path)
+
+        @app.route("/topup", methods=["POST"])
+        @idempotent(store)
+        def topup():
+            applied.append(1)
+            return {"balance": len(applied)}, 200
+
+        return app.test_client()
+
+    worker_a, worker_b = make_app(), make_app()
+    headers = {"Idempotency-Key": "abc"}
+    first = worker_a.post("/topup", json={"amount": 10}, headers=headers)
+    retry = worker_b.post("/topup", json={"amount": 10}, headers=headers)
+
+    assert len(applied) == 1
+    assert retry.get_json() == first.get_json()
+    assert retry.headers["Idempotent-Replayed"] == "true"
+
+
+def test_transient_conflict_is_not_replayed(tmp_path):
+    responses = [({"message": "Saldo sedang diubah"}, 409), ({"ok": True}, 200)]
+    app = Flask(__name__)
+
+    @app.route("/transfer", methods=["POST"])
+    @idempotent(make_store(tmp_path))
+    def transfer():
+        return responses.pop(0)
+
+    client = app.test_client()
+    headers = {"Idempotency-Key": "outbox:1"}
+    assert client.post("/transfer", json={}, headers=headers).status_code == 409
+    assert client.post("/transfer", json={}, headers=headers).status_code == 200
+    assert client.post("/transfer", json={}, headers=headers).headers["Idempotent-Replayed"] == "true"
@@ -0,0 +1,37 @@
+# tests/test_internal_auth.py
+"""Pengecekan request antar service (common/internal_auth.py)."""
+import pytest
+
+from common import internal_auth
+
+
+def test_secret_must_match_when_configured(monkeypatch):
+    monkeypatch.setattr(internal_auth, "INTERNAL_SECRET", "s3cret")
+    assert internal_auth.internal_headers() == {"X-Internal-Secret": "s3cret"}
+    assert internal_auth.is_internal({"X-Internal-Secret": "s3cret"}, "10.0.0.5")
+    assert not internal_auth.is_internal({"X-Internal-Secret": "wrong"}, "10.0.0.5")
+    # Loopback saja tidak cukup jika secret diset
+    assert not internal_auth.is_internal({}, "127.0.0.1")
+
+
+def test_without_secret_only_loopback_is_internal(monkeypatch):
+    monkeypatch.setattr(internal_auth, "INTERNAL_SECRET", "")
+    assert internal_auth.internal_headers() == {}
+    assert internal_auth.is_internal({}, "127.0.0.1")
+    assert not internal_auth.is_internal({"X-Internal-Secret": ""}, "203.0.113.9")
+
+
+def test_profile_endpoints_require_admin_token(monkeypatch):
+    flask = pytest.importorskip("flask")
+    from common import profiling
+
+    monkeypatch.setattr(internal_auth, "ADMIN_TOKEN", "adm1n")
+    app = flask.Flask(__name__)
+    profiling.instrument_flask(app, "test")
+    client = app.test_client()
+
+    assert client.post("/admin/profile", json={"enabled": True, "sample_rate": 1.0}).status_code == 403
+    assert client.delete("/admin/profile").status_code == 403
+    assert client.get("/admin/profile/requests").status_code == 403
+    res = client.post("/admin/profile", json={"enabled": False}, headers={"X-Admin-Token": "adm1n"})
+    assert res.status_code == 200
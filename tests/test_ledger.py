@@ -0,0 +1,58 @@
+# tests/test_ledger.py
+"""Snapshot & rekonsiliasi ledger (service-wallet/ledger.py) di SQLite."""
+from decimal import Decimal
+
+import pytest
+
+pytest.importorskip("flask_sqlalchemy")
+
+from flask import Flask
+
+from conftest import load_service_modules
+
+
+@pytest.fixture
+def wallet_db(tmp_path):
+    models, ledger = load_service_modules("service-wallet", "models", "ledger")
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{tmp_path / 'wallets.db'}"
+    models.db.init_app(app)
+    with app.app_context():
+        models.db.create_all()
+        yield models, ledger
+
+
+def add_wallet(models, ledger, credits):
+    wallet = models.Wallet(user_id=1, balance=sum(credits, Decimal("0.00")), status="active")
+    models.db.session.add(wallet)
+    models.db.session.flush()
+    ledger.append([ledger.entry(wallet.id, "credit", amount, "topup") for amount in credits])
+    models.db.session.commit()
+    return wallet
+
+
+def test_snapshot_is_built_from_previous_snapshot_and_ledger_tail(wallet_db):
+    models, ledger = wallet_db
+    wallet = add_wallet(models, ledger, [Decimal("10.00"), Decimal("5.00")])
+    assert ledger.take_snapshot(wallet.id).balance == Decimal("15.00")
+
+    ledger.append([ledger.entry(wallet.id, "debit", Decimal("3.00"), "balance")])
+    wallet.balance -= Decimal("3.00")
+    models.db.session.commit()
+    snapshot = ledger.take_snapshot(wallet.id)
+    assert snapshot.balance == Decimal("12.00")
+    assert snapshot.last_entry_id == 3
+
+    # Tanpa entry baru: snapshot berikutnya sama, last_entry_id tidak mundur
+    assert ledger.take_snapshot(wallet.id).last_entry_id == 3
+
+
+def test_drift_is_not_absorbed_by_snapshot(wallet_db):
+    models, ledger = wallet_db
+    wallet = add_wallet(models, ledger, [Decimal("10.00")])
+    wallet.balance = Decimal("99.00")  # saldo berubah tanpa entry ledger
+    models.db.session.commit()
+
+    snapshot = ledger.take_snapshot(wallet.id)
+    assert snapshot.balance == Decimal("10.00")
+    assert ledger.reconcile() == [{"wallet_id": wallet.id, "balance": "99.00", "ledger_balance": "10.00"}]
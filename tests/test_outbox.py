@@ -0,0 +1,117 @@
+# tests/test_outbox.py
+"""OutboxWorker (service-transaction/outbox.py) dengan SQLite dan service-wallet tiruan."""
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+
+pytest.importorskip("flask_sqlalchemy")
+requests = pytest.importorskip("requests")
+
+from flask import Flask
+
+from conftest import load_service_modules
+
+
+@pytest.fixture
+def outbox(tmp_path):
+    models, outbox_module = load_service_modules("service-transaction", "models", "outbox")
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{tmp_path / 'transactions.db'}"
+    models.db.init_app(app)
+    with app.app_context():
+        models.db.create_all()
+        yield app, models, outbox_module
+
+
+class FakeResponse:
+    def __init__(self, status_code, body):
+        self.status_code = status_code
+        self.ok = status_code < 400
+        self._body = body
+
+    def json(self):
+        return self._body
+
+
+class FakeWalletClient:
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.calls = []
+
+    def post(self, path, json=None, headers=None):
+        self.calls.append(headers["Idempotency-Key"])
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+def add_transfer(models):
+    transaction = models.Transaction(sender_wallet_id=0, receiver_wallet_id=0, amount=Decimal("10.00"),
+                                     status="pending")
+    models.db.session.add(transaction)
+    models.db.session.flush()
+    models.db.session.add(models.TransferOutbox(transaction_id=transaction.id, sender_user_id=1,
+                                                receiver_user_id=2, amount=Decimal("10.00")))
+    models.db.session.commit()
+    return transaction.id
+
+
+def make_worker(app, outbox_module, client, **options):
+    options.setdefault("max_attempts", 5)
+    return outbox_module.OutboxWorker(app, client, workers=0, batch_size=10, poll_interval=0.1, **options)
+
+
+def make_due(models):
+    # Lewati backoff supaya putaran berikutnya langsung mengambil baris yang di-retry
+    models.TransferOutbox.query.update({"next_attempt_at": datetime.utcnow() - timedelta(seconds=1)})
+    models.db.session.commit()
+
+
+def test_conflict_is_retried_until_success(outbox):
+    app, models, outbox_module = outbox
+    transaction_id = add_transfer(models)
+    client = FakeWalletClient([
+        FakeResponse(409, {"message": "Saldo sedang diubah oleh transaksi lain"}),
+        FakeResponse(200, {"sender": {"id": 11}, "receiver": {"id": 22}}),
+    ])
+    worker = make_worker(app, outbox_module, client)
+
+    assert worker.drain_once() == 1
+    assert models.db.session.get(models.Transaction, transaction_id).status == "pending"
+    make_due(models)
+    assert worker.drain_once() == 1
+
+    transaction = models.db.session.get(models.Transaction, transaction_id)
+    assert (transaction.status, transaction.sender_wallet_id, transaction.receiver_wallet_id) == ("success", 11, 22)
+    assert client.calls == [f"outbox:{transaction_id}"] * 2
+
+
+def test_claimed_rows_are_not_taken_again_while_in_flight(outbox):
+    app, models, outbox_module = outbox
+    add_transfer(models)
+    client = FakeWalletClient([requests.exceptions.ConnectionError("down")])
+    worker = make_worker(app, outbox_module, client, claim_timeout=300)
+
+    original_call = worker._call_wallet
+
+    def call_while_other_worker_polls(transaction_id, payload):
+        # Klaim sudah di-commit: worker lain tidak mendapat baris ini
+        assert make_worker(app, outbox_module, FakeWalletClient([])).drain_once() == 0
+        return original_call(transaction_id, payload)
+
+    worker._call_wallet = call_while_other_worker_polls
+    assert worker.drain_once() == 1
+    row = models.TransferOutbox.query.one()
+    assert row.attempts == 1 and row.processed_at is None and row.last_error.startswith("Layanan wallet")
+
+
+def test_client_error_fails_transaction(outbox):
+    app, models, outbox_module = outbox
+    transaction_id = add_transfer(models)
+    worker = make_worker(app, outbox_module, FakeWalletClient([FakeResponse(400, {"message": "Saldo kurang"})]))
+
+    worker.drain_once()
+    assert models.db.session.get(models.Transaction, transaction_id).status == "failed"
+    assert models.TransferOutbox.query.one().processed_at is not None
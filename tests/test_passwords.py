@@ -0,0 +1,31 @@
+# tests/test_passwords.py
+"""Process pool hashing password (service-user/passwords.py)."""
+import os
+import sys
+
+import pytest
+
+pytest.importorskip("bcrypt")
+
+
+@pytest.fixture
+def hasher(monkeypatch):
+    from conftest import ROOT, load_service_modules
+    (passwords,) = load_service_modules("service-user", "passwords")
+    # Fungsi yang dikirim ke process pool di-pickle per nama modul: proses worker harus bisa import `passwords`
+    monkeypatch.setitem(sys.modules, "passwords", passwords)
+    monkeypatch.syspath_prepend(os.path.join(ROOT, "service-user"))
+    hasher = passwords.PasswordHasher(workers=1, queue_size=4, rounds=4, timeout=10)
+    yield passwords, hasher
+    hasher.shutdown()
+
+
+def test_broken_pool_is_busy_then_rebuilt(hasher):
+    passwords, hasher = hasher
+    with pytest.raises(passwords.HasherBusy):
+        hasher._run(os._exit, 1)  # proses worker mati di tengah pekerjaan
+
+    password_hash = hasher.hash("rahasia")
+    assert hasher.check("rahasia", password_hash)
+    assert hasher.stats()["broken"] == 1
+    assert hasher.stats()["in_flight"] == 0
@@ -0,0 +1,138 @@
+# tests/test_resilience.py
+"""
+Fault injection untuk common/resilience.py dengan upstream tiruan lokal
+(StubUpstream dari scripts/fault_injection.py, http.server di thread).
+"""
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+requests = pytest.importorskip("requests")
+
+from common.resilience import CLOSED, HALF_OPEN, OPEN, UpstreamUnavailable
+from scripts.fault_injection import StubUpstream, make_client
+
+
+@pytest.fixture
+def stub():
+    upstreams = []
+
+    def start(**options):
+        upstream = StubUpstream(**options)
+        upstreams.append(upstream)
+        return upstream
+
+    yield start
+    for upstream in upstreams:
+        upstream.stop()
+
+
+def test_breaker_opens_rejects_fast_and_recovers(stub):
+    upstream = stub(mode="error")
+    client = make_client(upstream.url, threshold=3, reset_timeout=0.3)
+    for _ in range(3):
+        client.post("x")  # POST: tanpa retry, tiap panggilan = satu kegagalan
+    assert client.guard.breaker.state == OPEN
+
+    hits = upstream.hits
+    with pytest.raises(UpstreamUnavailable) as excinfo:
+        client.get("x")
+    assert excinfo.value.reason == "circuit_open"
+    assert upstream.hits == hits
+
+    upstream.mode = "ok"
+    time.sleep(0.35)
+    assert client.get("x").status_code == 200
+    assert client.guard.breaker.state == CLOSED
+
+
+def test_unreachable_upstream_opens_breaker(stub):
+    upstream = stub()
+    url = upstream.url
+    upstream.stop()
+    client = make_client(url, threshold=3, reset_timeout=5)
+    for _ in range(3):
+        with pytest.raises(requests.exceptions.ConnectionError):
+            client.post("x")
+    assert client.guard.breaker.state == OPEN
+    with pytest.raises(UpstreamUnavailable):
+        client.get("x")
+
+
+def test_get_retries_are_budgeted_and_post_is_never_retried(stub):
+    upstream = stub(mode="flaky")
+    client = make_client(upstream.url, threshold=1000, ratio=0.2)
+    calls = 50
+    for _ in range(calls):
+        client.get("x")
+    retries = upstream.hits - calls
+    assert 0 < retries <= 0.2 * calls + 1
+
+    hits = upstream.hits
+    for _ in range(10):
+        client.post("x")
+    assert upstream.hits - hits == 10
+
+
+def test_bulkhead_sheds_load_above_limit(stub):
+    upstream = stub(mode="slow", delay=0.5)
+    client = make_client(upstream.url, limit=3, threshold=1000)
+
+    def call(_):
+        try:
+            client.get("x")
+            return "ok"
+        except UpstreamUnavailable as e:
+            return e.reason
+
+    with ThreadPoolExecutor(max_workers=9) as pool:
+        outcomes = list(pool.map(call, range(9)))
+    assert outcomes.count("ok") == 3
+    assert outcomes.count("concurrency_limit") == 6
+    assert client.guard.bulkhead.stats()["in_flight"] == 0
+
+
+def test_unexpected_error_in_half_open_probe_is_recorded(stub):
+    upstream = stub(mode="error")
+    client = make_client(upstream.url, threshold=1, reset_timeout=0.1)
+    guard = client.guard
+    client.post("x")
+    assert guard.breaker.state == OPEN
+    time.sleep(0.15)
+
+    def broken_send():
+        raise ValueError("bukan error koneksi")
+
+    with pytest.raises(ValueError):
+        guard.execute("GET", broken_send)
+    # Probe gagal dicatat: breaker terbuka lagi (bukan HALF_OPEN dengan slot probe habis)
+    assert guard.breaker.state == OPEN
+
+    upstream.mode = "ok"
+    time.sleep(0.15)
+    assert client.get("x").status_code == 200
+    assert guard.breaker.state == CLOSED
+
+
+def test_cancelled_async_probe_is_recorded(stub):
+    client = make_client(stub().url, threshold=1, reset_timeout=0.1)
+    guard = client.guard
+    guard.record(False)
+    time.sleep(0.15)
+
+    async def hang():
+        await asyncio.sleep(10)
+
+    async def probe():
+        task = asyncio.ensure_future(guard.execute_async("GET", hang, (asyncio.TimeoutError,)))
+        await asyncio.sleep(0.01)
+        assert guard.breaker.state == HALF_OPEN
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(probe())
+    assert guard.breaker.state == OPEN
+    assert guard.bulkhead.stats()["in_flight"] == 0
@@ -0,0 +1,79 @@
+# tests/test_transaction_batch.py
+"""Transfer massal (service-transaction POST /transactions/batch) saat pencatatan transaksi gagal."""
+import pytest
+
+pytest.importorskip("flask_restx")
+requests = pytest.importorskip("requests")
+
+from sqlalchemy.exc import OperationalError
+
+
+class FakeResponse:
+    status_code = 200
+
+    def __init__(self, body):
+        self._body = body
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self._body
+
+
+@pytest.fixture
+def batch_app(tmp_path, monkeypatch):
+    from conftest import load_service_modules
+    from common import events, idempotency
+
+    monkeypatch.setenv("DATABASE_URL_TRANSACTIONS", f"sqlite:///{tmp_path / 'transactions.db'}")
+    monkeypatch.setattr(events, "EVENT_BUS_ENABLED", False)
+    monkeypatch.setattr(idempotency, "IDEMPOTENCY_BACKEND", "memory")
+    app_module, models = load_service_modules("service-transaction", "app", "models")
+
+    wallet_calls = []
+
+    def wallet_post(path, headers=None, json=None):
+        # service-wallet menjawab ulang hasil yang sama untuk Idempotency-Key yang sama
+        wallet_calls.append(headers.get("Idempotency-Key"))
+        return FakeResponse({"sender": {"id": 1}, "results": [
+            {"index": 0, "status": "success", "receiver_wallet_id": 2},
+            {"index": 1, "status": "success", "receiver_wallet_id": 3},
+        ]})
+
+    monkeypatch.setattr(app_module.wallet_client, "post", wallet_post)
+    monkeypatch.setattr(app_module.phone_cache, "get_many", lambda phones: {"0812": 2, "0813": 3})
+
+    with app_module.app.app_context():
+        models.db.create_all()
+        yield app_module.app.test_client(), models, wallet_calls
+
+
+def post_batch(client, key):
+    return client.post("/transactions/batch", headers={"X-User-Id": "1", "Idempotency-Key": key}, json={
+        "items": [{"receiver_phone": "0812", "amount": 10}, {"receiver_phone": "0813", "amount": 5}],
+    })
+
+
+def test_failed_insert_reports_wallet_results_and_retry_records_them(batch_app, monkeypatch):
+    client, models, wallet_calls = batch_app
+    session = models.db.session
+
+    def failing_commit():
+        raise OperationalError("INSERT", {}, Exception("database unavailable"))
+
+    with monkeypatch.context() as patch:
+        patch.setattr(session, "commit", failing_commit)
+        res = post_batch(client, "k1")
+    body = res.get_json()
+    assert res.status_code == 500
+    assert body["recorded"] is False
+    assert body["succeeded"] == 2
+    assert [item["receiver_wallet_id"] for item in body["results"]] == [2, 3]
+    assert "Idempotency-Key" in body["message"]
+
+    assert models.Transaction.query.count() == 0
+    retry = post_batch(client, "k1")
+    assert retry.status_code == 201, retry.get_json()
+    assert models.Transaction.query.count() == 2
+    assert wallet_calls == ["batch:1:k1", "batch:1:k1"]
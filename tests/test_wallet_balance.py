@@ -0,0 +1,54 @@
+# tests/test_wallet_balance.py
+"""Update saldo optimistic (service-wallet/balance.py) yang berpapasan dengan penutupan dompet."""
+from decimal import Decimal
+
+import pytest
+
+pytest.importorskip("flask_restx")
+
+
+@pytest.fixture
+def wallet_db(tmp_path, monkeypatch):
+    from conftest import load_service_modules
+    from common import events, idempotency
+
+    monkeypatch.setenv("DATABASE_URL_WALLETS", f"sqlite:///{tmp_path / 'wallets.db'}")
+    monkeypatch.setattr(events, "EVENT_BUS_ENABLED", False)
+    monkeypatch.setattr(idempotency, "IDEMPOTENCY_BACKEND", "memory")
+    app_module, models, balance = load_service_modules("service-wallet", "app", "models", "balance")
+
+    with app_module.app.app_context():
+        models.db.create_all()
+        models.db.session.add(models.Wallet(user_id=1, balance=Decimal("0.00"), status="active"))
+        models.db.session.commit()
+        yield models, balance
+
+
+def test_optimistic_update_rejects_wallet_closed_after_read(wallet_db, monkeypatch):
+    models, balance = wallet_db
+    original = balance.new_balance
+
+    def close_after_read(wallet, change_type, amount):
+        result = original(wallet, change_type, amount)
+        # Transaksi lain menutup dompet setelah dibaca tetapi sebelum CAS (version tidak diubah)
+        with models.db.engine.begin() as conn:
+            conn.execute(models.Wallet.__table__.update().values(status="closed"))
+        return result
+
+    monkeypatch.setattr(balance, "new_balance", close_after_read)
+    with pytest.raises(balance.BalanceError) as excinfo:
+        balance.update_balance(1, "credit", "10", mode="optimistic")
+
+    assert excinfo.value.status_code == 403
+    assert balance.stats.snapshot()["conflicts"] == 0
+    assert models.db.session.get(models.Wallet, 1).balance == Decimal("0.00")
+
+
+def test_close_wallet_bumps_version(wallet_db):
+    models, balance = wallet_db
+    version = models.db.session.get(models.Wallet, 1).version
+
+    wallet = balance.close_wallet(1)
+
+    assert wallet.status == "closed"
+    assert wallet.version == version + 1
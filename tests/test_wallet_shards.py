@@ -0,0 +1,54 @@
+# tests/test_wallet_shards.py
+"""Transfer ke dompet panas (ber-shard) di service-wallet: kredit masuk ke sub-saldo."""
+from decimal import Decimal
+
+import pytest
+
+pytest.importorskip("flask_restx")
+
+
+@pytest.fixture
+def wallet_app(tmp_path, monkeypatch):
+    from conftest import load_service_modules
+    from common import events, idempotency
+
+    monkeypatch.setenv("DATABASE_URL_WALLETS", f"sqlite:///{tmp_path / 'wallets.db'}")
+    monkeypatch.setattr(events, "EVENT_BUS_ENABLED", False)
+    monkeypatch.setattr(idempotency, "IDEMPOTENCY_BACKEND", "memory")
+    app_module, models, balance = load_service_modules("service-wallet", "app", "models", "balance")
+
+    with app_module.app.app_context():
+        models.db.create_all()
+        for user_id, amount in ((1, "100.00"), (2, "0.00"), (3, "0.00")):
+            models.db.session.add(models.Wallet(user_id=user_id, balance=Decimal(amount), status="active"))
+        models.db.session.commit()
+        balance.set_shard_count(2, 4)  # dompet user 2 = dompet panas
+        yield app_module.app.test_client(), models, balance
+
+
+def test_transfer_credits_sharded_receiver_into_shards(wallet_app):
+    client, models, balance = wallet_app
+    res = client.post("/internal/wallets/transfer",
+                      json={"sender_user_id": 1, "receiver_user_id": 2, "amount": 30})
+
+    assert res.status_code == 200, res.get_json()
+    assert res.get_json()["receiver"]["balance"] == "30.00"
+    receiver = models.db.session.get(models.Wallet, 2)
+    assert receiver.balance == Decimal("0.00")
+    assert balance.shard_total(2) == Decimal("30.00")
+    assert models.db.session.get(models.Wallet, 1).balance == Decimal("70.00")
+
+
+def test_batch_credits_sharded_receiver_into_shards(wallet_app):
+    client, models, balance = wallet_app
+    res = client.post("/internal/wallets/transfer/batch", json={
+        "sender_user_id": 1,
+        "credits": [{"receiver_user_id": 2, "amount": 10}, {"receiver_user_id": 3, "amount": 5},
+                    {"receiver_user_id": 2, "amount": 15}],
+    })
+
+    assert res.status_code == 200, res.get_json()
+    assert models.db.session.get(models.Wallet, 2).balance == Decimal("0.00")
+    assert balance.shard_total(2) == Decimal("25.00")
+    assert models.db.session.get(models.Wallet, 3).balance == Decimal("5.00")
+    assert models.db.session.get(models.Wallet, 1).balance == Decimal("70.00")